@@ -0,0 +1,120 @@
+# async_crypto_api.py
+
+import asyncio
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import aiohttp
+
+from crypto_api import BASE_URL, MAX_RETRIES, POOL_MAXSIZE, RETRY_BACKOFF, RETRY_STATUS, format_symbol
+
+logger = logging.getLogger(__name__)
+
+class AsyncCryptoComAPI:
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 limit: int = POOL_MAXSIZE, keepalive_timeout: float = 30.0,
+                 max_retries: int = MAX_RETRIES, backoff_factor: float = RETRY_BACKOFF,
+                 timeout: float = 10.0):
+        """
+        Initialize asyncio Crypto.com API client
+
+        One pooled keep-alive connector is shared by every request, so many
+        instruments can be queried concurrently from a single event loop.
+        The session is created lazily inside the running loop.
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.base_url = BASE_URL
+        self.limit = limit
+        self.keepalive_timeout = keepalive_timeout
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the shared session, creating it on first use"""
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def close(self) -> None:
+        """Close pooled connections"""
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def _get(self, endpoint: str, params: Dict) -> Dict:
+        """GET with retries on transient errors, mirroring the sync client's retry policy"""
+        session = self._get_session()
+        url = f"{self.base_url}{endpoint}"
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with session.get(url, params=params) as response:
+                    response.raise_for_status()
+                    return await response.json()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                transient = not isinstance(e, aiohttp.ClientResponseError) or e.status in RETRY_STATUS
+                if not transient or attempt >= self.max_retries:
+                    logger.error(f"Network error: {str(e)}")
+                    raise Exception(f"Network error: {str(e)}")
+                await asyncio.sleep(self.backoff_factor * (2 ** attempt))
+
+    async def get_klines(self, symbol: str, timeframe: str = "1m", limit: int = 1000) -> Dict:
+        """Get historical kline/candlestick data from Crypto.com"""
+        params = {
+            "instrument_name": format_symbol(symbol),
+            "timeframe": timeframe,
+            "count": limit
+        }
+        data = await self._get("/public/get-candlestick", params)
+        if 'result' not in data:
+            raise KeyError("Missing 'result' in API response")
+        return data['result']['data']
+
+    async def get_ticker(self, symbol: str) -> Dict:
+        """Get latest ticker data from Crypto.com"""
+        data = await self._get("/public/get-ticker", {"instrument_name": format_symbol(symbol)})
+        if data.get('code') != 0:
+            raise Exception(f"API error: {data.get('msg', 'Unknown error')}")
+        return data['result']['data']
+
+    async def get_tickers(self, symbols: Iterable[str]) -> Dict[str, Dict]:
+        """Fetch tickers for many instruments concurrently"""
+        symbols = list(symbols)
+        results = await asyncio.gather(*(self.get_ticker(s) for s in symbols), return_exceptions=True)
+        return self._collect(symbols, results, "ticker")
+
+    async def get_klines_many(self, symbols: Iterable[str], timeframe: str = "1m",
+                              limit: int = 1000) -> Dict[str, List]:
+        """Fetch klines for many instruments concurrently"""
+        symbols = list(symbols)
+        results = await asyncio.gather(
+            *(self.get_klines(s, timeframe, limit) for s in symbols), return_exceptions=True
+        )
+        return self._collect(symbols, results, "klines")
+
+    @staticmethod
+    def _collect(symbols: List[str], results: List, what: str) -> Dict:
+        """Map results back to symbols, dropping (and logging) failed requests"""
+        collected = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching {what} for {symbol}: {str(result)}")
+                continue
+            collected[symbol] = result
+        return collected
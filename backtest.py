@@ -3,16 +3,40 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime
-import matplotlib.pyplot as plt
-import seaborn as sns
 from strategy import moving_average_strategy
 from logger import setup_logger
-import yfinance as yf
+from array import array
+import argparse
+from profiling import MODES, StageProfiler, stage
+from downsample import axes_pixel_width, downsample, finish_figure, new_figure, plot_downsampled
 
 logger = setup_logger()
 
+SHORT_WINDOW = 20
+LONG_WINDOW = 50
+# 分块回测时每块携带的历史行数，需覆盖最长的滚动窗口 (MA_200)
+WARMUP_ROWS = max(200, LONG_WINDOW)
+TRADE_COLUMNS = ['entry_time', 'exit_time', 'entry_price', 'exit_price', 'size', 'pnl', 'return', 'exit_reason']
+# 止损/止盈首次触发的向前查找初始块大小 (按倍数增长)
+EXIT_SEARCH_BLOCK = 256
+
+def _download(symbol, start, end, interval='1d'):
+    """从 yfinance 下载 OHLCV 数据"""
+    import yfinance as yf  # 延迟导入：传入 data_source 或只做计算时无需加载
+    return yf.download(symbol, start=start, end=end, interval=interval)
+
+def prepare_ohlcv(data, symbol):
+    """整理原始数据为策略所需的 MultiIndex 列格式 (字段, 交易对)"""
+    if isinstance(data.columns, pd.MultiIndex):
+        data = data.droplevel(1, axis=1)
+    data = data[['Open', 'High', 'Low', 'Close', 'Volume']]
+    data.columns = pd.MultiIndex.from_product([data.columns, [symbol]])
+    return data
+
 class Backtester:
-    def __init__(self, symbol, start_date, end_date, initial_capital=10000):
+    def __init__(self, symbol, start_date, end_date, initial_capital=10000,
+                 interval='1d', chunk_size=None, data_source=None, risk_manager=None, profiler=None,
+                 plot_path=None):
         """
         初始化回测系统
         
@@ -21,87 +45,231 @@ class Backtester:
             start_date (str): 开始日期 'YYYY-MM-DD'
             end_date (str): 结束日期 'YYYY-MM-DD'
             initial_capital (float): 初始资金
+            interval (str): K线周期，如 '1d'、'1m'
+            chunk_size (str): 分块回测的时间跨度，如 '30D'；为 None 时一次性载入全部数据
+            data_source (callable): 数据源 (symbol, start, end, interval) -> OHLCV DataFrame，默认使用 yfinance
+            risk_manager (RiskManager): 提供止损/止盈百分比，按每根K线的最高/最低价模拟盘中触发；为 None 时不设止损止盈
+            profiler (StageProfiler): 按阶段（数据加载、各指标组、模拟循环、结果生成）计时/采样；为 None 时不做分析
+            plot_path (str): 结果图表保存路径（无界面渲染）；为 None 时弹出窗口显示
         """
         self.symbol = symbol
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
+        self.interval = interval
+        self.chunk_size = pd.Timedelta(chunk_size) if chunk_size is not None else None
+        self.data_source = data_source or _download
         self.positions = []
         self.trades = []
-        self.daily_returns = []
+        self.stop_loss_percent = risk_manager.stop_loss_percent if risk_manager is not None else None
+        self.take_profit_percent = risk_manager.take_profit_percent if risk_manager is not None else None
+        # 当前数据块内已定位的止损/止盈触发 (行号, 价格, 类型)，以及是否需在下一块继续查找
+        self._pending_exit = None
+        self._exit_search_pending = False
+        # 逐行权益曲线，使用紧凑数组存储以控制长周期回测的内存
+        self._equity_times = array('q')
+        self._equity_values = array('d')
+        self._equity_tz = None
+        self.rows = 0
+        self.data = None
+        self.profiler = profiler
+        self.plot_path = plot_path
         
-        # 加载数据
-        self._load_data()
+        # 分块模式下数据在 run() 中按块流式载入
+        if self.chunk_size is None:
+            self._load_data()
+        
+    def _prepare(self, data):
+        return prepare_ohlcv(data, self.symbol)
         
     def _load_data(self):
         """加载历史数据"""
         try:
             logger.info(f"正在加载 {self.symbol} 的历史数据...")
-            data = yf.download(self.symbol, start=self.start_date, end=self.end_date)
-            
-            # 确保数据格式正确
-            data = data[['Open', 'High', 'Low', 'Close', 'Volume']]
-            data.columns = pd.MultiIndex.from_product([data.columns, [self.symbol]])
+            with stage(self.profiler, 'load_data'):
+                data = self.data_source(self.symbol, self.start_date, self.end_date, self.interval)
+                
+                # 确保数据格式正确
+                data = self._prepare(data)
             
             # 应用策略
-            self.data = moving_average_strategy(data, short_window=20, long_window=50)
+            with stage(self.profiler, 'strategy'):
+                self.data = moving_average_strategy(data, short_window=SHORT_WINDOW, long_window=LONG_WINDOW,
+                                                    profiler=self.profiler)
             logger.info(f"成功加载并处理 {len(self.data)} 条数据记录")
             
         except Exception as e:
             logger.error(f"加载数据时出错: {str(e)}")
             raise
             
+    def _iter_chunks(self):
+        """按时间窗口逐块载入原始数据"""
+        start = pd.Timestamp(self.start_date)
+        end = pd.Timestamp(self.end_date)
+        while start < end:
+            chunk_end = min(start + self.chunk_size, end)
+            data = self.data_source(self.symbol, start.to_pydatetime(), chunk_end.to_pydatetime(), self.interval)
+            if data is not None and not data.empty:
+                yield self._prepare(data)
+            start = chunk_end
+            
     def run(self):
         """运行回测"""
         logger.info("开始回测...")
         
-        for i in range(1, len(self.data)):
-            current_row = self.data.iloc[i]
-            previous_row = self.data.iloc[i-1]
+        if self.chunk_size is None:
+            self.rows = len(self.data)
+            with stage(self.profiler, 'simulation'):
+                self._run_frame(self.data, start=1)
+        else:
+            self._run_chunked()
+            
+        logger.info("回测完成")
+        with stage(self.profiler, 'results'):
+            results = self._generate_results()
+        # 绘图（含 plt.show() 的阻塞等待）不计入 results 阶段
+        self._plot_results(results['每日收益'])
+        return results
+        
+    def _run_chunked(self):
+        """
+        分块流式回测
+        
+        每块前拼接上一块末尾 WARMUP_ROWS 行原始数据用于滚动指标预热，
+        EMA/OBV 通过 state 跨块续算，持仓与资金状态保存在实例上，
+        因此峰值内存只与块大小有关，结果与一次性载入模式一致。
+        """
+        state = {}
+        tail = None
+        chunks = self._iter_chunks()
+        
+        while True:
+            with stage(self.profiler, 'load_data'):
+                raw = next(chunks, None)
+            if raw is None:
+                break
+            warmup = 0 if tail is None else len(tail)
+            combined = raw if tail is None else pd.concat([tail, raw])
+            combined = combined[~combined.index.duplicated(keep='first')]
+            tail = combined.iloc[-WARMUP_ROWS:].copy()
+            
+            with stage(self.profiler, 'strategy'):
+                data = moving_average_strategy(combined.copy(), short_window=SHORT_WINDOW, long_window=LONG_WINDOW,
+                                               state=state, warmup=warmup, profiler=self.profiler)
+            chunk = data.iloc[warmup:]
+            # 与一次性模式相同，跳过整个序列的第一行
+            with stage(self.profiler, 'simulation'):
+                self._run_frame(chunk, start=1 if self.rows == 0 else 0)
+            self.rows += len(chunk)
+            logger.info(f"已处理 {self.rows} 条数据记录")
+            
+    def _run_frame(self, data, start=0):
+        """
+        逐行执行策略
+        
+        收盘价、信号和时间戳先取成 numpy 数组/列表再迭代，避免 data.iloc[i]
+        每行构造一个 Series；只有开平仓时才取出该行的 Timestamp。
+        """
+        closes = data[('Close', self.symbol)].to_numpy().tolist()
+        signals = data[('Signal', '')].to_numpy().tolist()
+        index = data.index
+        times = index.asi8.tolist()
+        if self._equity_tz is None and index.tz is not None:
+            self._equity_tz = index.tz
+        self._opens = data[('Open', self.symbol)].to_numpy()
+        self._highs = data[('High', self.symbol)].to_numpy()
+        self._lows = data[('Low', self.symbol)].to_numpy()
+        self._pending_exit = None
+        if self._exit_search_pending and self.positions:
+            self._find_exit(start)
+            
+        for i in range(start, len(closes)):
+            close = closes[i]
+            
+            # 盘中触发止损/止盈
+            if self._pending_exit is not None and self._pending_exit[0] == i:
+                _, exit_price, reason = self._pending_exit
+                self._close_positions(index[i], close, exit_price=exit_price, reason=reason)
             
             # 更新持仓收益
-            self._update_positions(current_row)
+            self._update_positions(close)
             
             # 检查信号
-            signal = current_row[('Signal', '')]
+            signal = signals[i]
             
             if signal == 1 and not self.positions:  # 买入信号且无持仓
-                self._open_long_position(current_row)
+                self._open_long_position(index[i], close)
+                self._find_exit(i + 1)
             elif signal == -1 and self.positions:  # 卖出信号且有持仓
-                self._close_positions(current_row)
+                self._close_positions(index[i], close)
                 
             # 记录每日收益
-            self._record_daily_return(current_row)
+            self._record_daily_return(times[i])
             
-        logger.info("回测完成")
-        return self._generate_results()
+    def _find_exit(self, start):
+        """
+        向量化查找持仓首次触及止损/止盈的K线
         
-    def _update_positions(self, current_row):
+        从 start 行起按块比较最低价与止损价、最高价与止盈价，块大小倍增，
+        开销与持仓时长成正比。同一根K线内两者都触及时保守地按止损处理；
+        跳空低开越过止损时按开盘价成交。
+        """
+        self._pending_exit = None
+        self._exit_search_pending = False
+        if self.stop_loss_percent is None or not self.positions:
+            return
+            
+        pos = self.positions[0]
+        stop, take_profit = pos['stop_loss'], pos['take_profit']
+        n = len(self._lows)
+        block = EXIT_SEARCH_BLOCK
+        while start < n:
+            end = min(start + block, n)
+            hit_stop = self._lows[start:end] <= stop
+            hit_take_profit = self._highs[start:end] >= take_profit
+            hits = hit_stop | hit_take_profit
+            if hits.any():
+                k = int(hits.argmax())
+                if hit_stop[k]:
+                    self._pending_exit = (start + k, min(self._opens[start + k], stop), 'stop_loss')
+                else:
+                    self._pending_exit = (start + k, take_profit, 'take_profit')
+                return
+            start = end
+            block *= 2
+            
+        # 本块内未触发，下一块继续查找
+        self._exit_search_pending = True
+        
+    def _update_positions(self, close):
         """更新持仓状态"""
         for pos in self.positions:
-            pos['current_price'] = current_row[('Close', self.symbol)]
+            pos['current_price'] = close
             pos['unrealized_pnl'] = (pos['current_price'] - pos['entry_price']) * pos['size']
             
-    def _open_long_position(self, row):
-        """开立多头仓位"""
-        price = row[('Close', self.symbol)]
+    def _open_long_position(self, timestamp, price):
+        """按收盘价开立多头仓位"""
         position_size = self.current_capital * 0.95 / price  # 使用95%资金开仓
         
         position = {
             'entry_price': price,
             'size': position_size,
-            'entry_time': row.name,
+            'entry_time': timestamp,
             'current_price': price,
             'unrealized_pnl': 0
         }
+        if self.stop_loss_percent is not None:
+            position['stop_loss'] = price * (1 - self.stop_loss_percent/100)
+            position['take_profit'] = price * (1 + self.take_profit_percent/100)
         
         self.positions.append(position)
         logger.info(f"开仓: 价格={price:.4f}, 数量={position_size:.4f}")
         
-    def _close_positions(self, row):
-        """平掉所有持仓"""
-        exit_price = row[('Close', self.symbol)]
+    def _close_positions(self, timestamp, close, exit_price=None, reason='signal'):
+        """平掉所有持仓，默认按收盘价成交"""
+        if exit_price is None:
+            exit_price = close
         
         for pos in self.positions:
             pnl = (exit_price - pos['entry_price']) * pos['size']
@@ -109,34 +277,47 @@ class Backtester:
             
             self.trades.append({
                 'entry_time': pos['entry_time'],
-                'exit_time': row.name,
+                'exit_time': timestamp,
                 'entry_price': pos['entry_price'],
                 'exit_price': exit_price,
                 'size': pos['size'],
                 'pnl': pnl,
-                'return': (exit_price/pos['entry_price'] - 1) * 100
+                'return': (exit_price/pos['entry_price'] - 1) * 100,
+                'exit_reason': reason
             })
             
-            logger.info(f"平仓: 价格={exit_price:.4f}, 收益={pnl:.2f}")
+            logger.info(f"平仓: 价格={exit_price:.4f}, 收益={pnl:.2f}, 原因={reason}")
             
         self.positions = []
+        self._pending_exit = None
+        self._exit_search_pending = False
         
-    def _record_daily_return(self, row):
-        """记录每日收益"""
+    def _record_daily_return(self, time_ns):
+        """记录每日收益（time_ns 为 UTC 纳秒时间戳，时区由 _run_frame 记录）"""
         total_value = self.current_capital
         for pos in self.positions:
             total_value += pos['unrealized_pnl']
             
-        self.daily_returns.append({
-            'date': row.name,
+        self._equity_times.append(time_ns)
+        self._equity_values.append(total_value)
+        
+    def _daily_returns_frame(self):
+        """由紧凑数组构建每日收益 DataFrame"""
+        dates = pd.to_datetime(np.frombuffer(self._equity_times, dtype=np.int64),
+                               utc=self._equity_tz is not None)
+        if self._equity_tz is not None:
+            dates = dates.tz_convert(self._equity_tz)
+        total_value = np.frombuffer(self._equity_values, dtype=np.float64)
+        return pd.DataFrame({
+            'date': dates,
             'total_value': total_value,
             'return': (total_value/self.initial_capital - 1) * 100
         })
         
     def _generate_results(self):
         """生成回测结果报告"""
-        trades_df = pd.DataFrame(self.trades)
-        daily_returns_df = pd.DataFrame(self.daily_returns)
+        trades_df = pd.DataFrame(self.trades, columns=TRADE_COLUMNS)
+        daily_returns_df = self._daily_returns_frame()
         
         # 计算关键指标
         total_trades = len(trades_df)
@@ -163,7 +344,7 @@ class Backtester:
             '初始资金': self.initial_capital,
             '最终资金': self.current_capital,
             '总收益率': (self.current_capital/self.initial_capital - 1) * 100,
-            '年化收益率': ((self.current_capital/self.initial_capital) ** (252/len(self.data)) - 1) * 100,
+            '年化收益率': ((self.current_capital/self.initial_capital) ** (252/self.rows) - 1) * 100,
             '最大回撤': max_drawdown,
             '夏普比率': sharpe_ratio,
             '总交易次数': total_trades,
@@ -175,28 +356,37 @@ class Backtester:
             '每日收益': daily_returns_df
         }
         
-        self._plot_results(daily_returns_df)
         return results
         
     def _plot_results(self, daily_returns_df):
-        """绘制回测结果图表"""
-        plt.figure(figsize=(15, 10))
+        """
+        绘制回测结果图表
         
-        # 设置样式
-        plt.style.use('seaborn')
+        资金曲线按图表像素宽度做 LTTB 降采样，回撤做最小/最大值降采样（保留所有尖峰），
+        因此任意长度的回测绘图耗时基本不变；设置 plot_path 时无界面渲染并保存为文件。
+        """
+        # 绘图库延迟导入，无图表的运行（分析、测试、profiling）不付出导入开销
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        
+        # 设置样式 (matplotlib 3.6 起 'seaborn' 更名为 'seaborn-v0_8')
+        plt.style.use('seaborn-v0_8' if 'seaborn-v0_8' in plt.style.available else 'seaborn')
         
         # 创建子图
-        fig, (ax1, ax2, ax3) = plt.subplots(3, 1, figsize=(15, 12))
+        fig = new_figure(self.plot_path, figsize=(15, 12))
+        ax1, ax2, ax3 = fig.subplots(3, 1)
         
         # 绘制资金曲线
-        ax1.plot(daily_returns_df['date'], daily_returns_df['total_value'])
+        equity = daily_returns_df.set_index('date')
+        plot_downsampled(ax1, equity['total_value'], 'lttb')
         ax1.set_title('资金曲线')
         ax1.set_xlabel('日期')
         ax1.set_ylabel('资金')
         ax1.grid(True)
         
         # 绘制回撤
-        ax2.fill_between(daily_returns_df['date'], daily_returns_df['drawdown'], 0, alpha=0.3, color='red')
+        drawdown = downsample(equity['drawdown'], axes_pixel_width(ax2), 'minmax')
+        ax2.fill_between(drawdown.index, drawdown.to_numpy(), 0, alpha=0.3, color='red')
         ax2.set_title('回撤')
         ax2.set_xlabel('日期')
         ax2.set_ylabel('回撤 (%)')
@@ -204,22 +394,32 @@ class Backtester:
         
         # 绘制收益分布
         if len(self.trades) > 0:
-            returns = pd.DataFrame(self.trades)['return']
+            returns = pd.DataFrame(self.trades, columns=TRADE_COLUMNS)['return']
             sns.histplot(returns, kde=True, ax=ax3)
             ax3.set_title('收益分布')
             ax3.set_xlabel('收益率 (%)')
             ax3.set_ylabel('频率')
             
-        plt.tight_layout()
-        plt.show()
+        fig.tight_layout()
+        finish_figure(fig, self.plot_path)
 
 def main():
+    parser = argparse.ArgumentParser(description='运行回测')
+    parser.add_argument('--profile', choices=MODES, help='按阶段分析耗时: time 仅计时, cprofile 每阶段 cProfile, sample 采样火焰图')
+    parser.add_argument('--profile-dir', default='profiles', help='分析结果输出目录')
+    parser.add_argument('--sample-interval', type=float, default=0.005, help='采样间隔(秒)')
+    parser.add_argument('--plot', metavar='PATH', help='将结果图表保存到文件（无界面），不弹出窗口')
+    args = parser.parse_args()
+    profiler = StageProfiler(args.profile, args.profile_dir, args.sample_interval) if args.profile else None
+    
     # 运行回测
     backtester = Backtester(
         symbol="DOGE-USD",
         start_date="2023-01-01",
         end_date="2024-11-11",
-        initial_capital=10000
+        initial_capital=10000,
+        profiler=profiler,
+        plot_path=args.plot
     )
     
     results = backtester.run()
@@ -238,6 +438,10 @@ def main():
     print(f"平均盈利: ${results['平均盈利']:,.2f}")
     print(f"平均亏损: ${results['平均亏损']:,.2f}")
     print(f"盈亏比: {results['盈亏比']:.2f}")
+    
+    if profiler is not None:
+        print("\n=== 阶段耗时 ===")
+        print(profiler.finish())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,40 @@
+# clock.py
+
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Union
+
+import pandas as pd
+
+class SystemClock:
+    """Wall-clock time (the default everywhere a clock can be injected)"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def utcnow(self) -> datetime:
+        return datetime.now(timezone.utc).replace(tzinfo=None)
+
+class SimulatedClock:
+    def __init__(self, start: Optional[Union[datetime, pd.Timestamp, str]] = None):
+        """
+        Manually driven clock for replays and tests
+
+        Time only moves when set() or advance() is called, e.g. to each
+        replayed tick's timestamp. now() and utcnow() return the same naive
+        value: replayed timestamps are exchange (UTC) times.
+        """
+        self._now = pd.Timestamp(start if start is not None else 0).to_pydatetime()
+
+    def now(self) -> datetime:
+        return self._now
+
+    def utcnow(self) -> datetime:
+        return self._now
+
+    def set(self, when: Union[datetime, pd.Timestamp]) -> None:
+        self._now = when.to_pydatetime() if isinstance(when, pd.Timestamp) else when
+
+    def advance(self, seconds: float) -> None:
+        self._now += timedelta(seconds=seconds)
+
+SYSTEM_CLOCK = SystemClock()
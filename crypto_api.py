@@ -5,29 +5,84 @@ import hashlib
 import time
 import logging
 from typing import Dict, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+BASE_URL = "https://api.crypto.com/v2"
+
+# Connection pool defaults (one pool per host, sized for parallel instrument queries)
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 32
+MAX_RETRIES = 3
+RETRY_BACKOFF = 0.2
+RETRY_STATUS = (429, 500, 502, 503, 504)
+
+def format_symbol(symbol: str) -> str:
+    """Format symbol for Crypto.com API (e.g., DOGE-USD -> DOGE_USDT)"""
+    # Remove any existing separators and convert to uppercase
+    clean_symbol = symbol.replace('-', '').replace('_', '').upper()
+    
+    # If symbol ends with USD, replace with USDT
+    if clean_symbol.endswith('USD'):
+        clean_symbol = clean_symbol[:-3] + '_USDT'
+    else:
+        # Add underscore between currency pairs
+        clean_symbol = clean_symbol[:-3] + '_' + clean_symbol[-3:]
+        
+    return clean_symbol
+
+def create_session(pool_connections: int = POOL_CONNECTIONS,
+                   pool_maxsize: int = POOL_MAXSIZE,
+                   max_retries: int = MAX_RETRIES,
+                   backoff_factor: float = RETRY_BACKOFF) -> requests.Session:
+    """
+    Create a keep-alive HTTP session with a tuned connection pool
+    
+    Retries only cover idempotent requests (GET); order POSTs are never
+    retried automatically so a timeout can't submit the same order twice.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS,
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
 class CryptoComAPI:
-    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 session: Optional[requests.Session] = None):
         """Initialize Crypto.com API client"""
         self.api_key = api_key
         self.api_secret = api_secret
-        self.base_url = "https://api.crypto.com/v2"
+        self.base_url = BASE_URL
+        # Persistent pooled session, reused across calls to avoid a TCP+TLS handshake per request
+        self.session = session if session is not None else create_session()
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        
+    def close(self) -> None:
+        """Close pooled connections"""
+        self.session.close()
         
     def _format_symbol(self, symbol: str) -> str:
         """Format symbol for Crypto.com API (e.g., DOGE-USD -> DOGE_USDT)"""
-        # Remove any existing separators and convert to uppercase
-        clean_symbol = symbol.replace('-', '').replace('_', '').upper()
-        
-        # If symbol ends with USD, replace with USDT
-        if clean_symbol.endswith('USD'):
-            clean_symbol = clean_symbol[:-3] + '_USDT'
-        else:
-            # Add underscore between currency pairs
-            clean_symbol = clean_symbol[:-3] + '_' + clean_symbol[-3:]
-            
-        return clean_symbol
+        return format_symbol(symbol)
         
     def get_klines(self, symbol: str, timeframe: str = "1m", limit: int = 1000) -> Dict:
         """
@@ -53,7 +108,7 @@ class CryptoComAPI:
             }
             
             logger.debug(f"Requesting klines with params: {params}")
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}{endpoint}",
                 params=params,
                 timeout=10
@@ -86,7 +141,7 @@ class CryptoComAPI:
             endpoint = "/public/get-ticker"
             params = {"instrument_name": formatted_symbol}
             
-            response = requests.get(
+            response = self.session.get(
                 f"{self.base_url}{endpoint}",
                 params=params,
                 timeout=10
@@ -0,0 +1,140 @@
+# dashboard.py
+
+import sys
+import time
+import threading
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO
+
+logger = logging.getLogger(__name__)
+
+CLEAR_SCREEN = '\x1b[2J\x1b[H'
+CLEAR_LINE = '\x1b[K'
+CLEAR_BELOW = '\x1b[J'
+HIDE_CURSOR = '\x1b[?25l'
+SHOW_CURSOR = '\x1b[?25h'
+
+class TerminalDashboard:
+    def __init__(self, render: Callable[[Dict[str, Any]], List[str]], max_fps: float = 4.0,
+                 stream: Optional[TextIO] = None, repaint_every: int = 40):
+        """
+        Render-on-change terminal dashboard
+
+        The trading loop hands over a snapshot with publish(), which only
+        swaps it into a single latest-value slot and returns. A background
+        thread turns the newest snapshot into lines with `render`, then
+        rewrites just the lines that changed since the last frame using ANSI
+        cursor positioning. Snapshots published faster than `max_fps` are
+        coalesced, so a slow terminal never holds up the caller.
+
+        Anything else printed to the terminal scrolls the screen under the
+        partial redraws, so the next frame repaints everything after a log
+        record went through a handler passed to watch_handlers(), and every
+        `repaint_every` frames regardless.
+
+        Args:
+            render: Snapshot -> list of screen lines (runs on the render thread)
+            max_fps: Upper bound on redraws per second
+            stream: Output stream (default stdout); non-terminals get whole
+                frames appended without escape codes
+            repaint_every: Full repaint after this many frames (0 disables)
+        """
+        self.render = render
+        self.min_interval = 1.0 / max_fps
+        self.stream = stream or sys.stdout
+        self.ansi = self.stream.isatty()
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._changed = threading.Event()
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+        self._lines: List[str] = []
+        self._dirty = False
+        self.repaint_every = repaint_every
+        self.frames = 0
+
+    def start(self) -> None:
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='dashboard', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._running = False
+        self._changed.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        if self.ansi and self._lines:
+            self.stream.write(f"\x1b[{len(self._lines) + 1};1H{SHOW_CURSOR}")
+            self.stream.flush()
+
+    def invalidate(self) -> None:
+        """Repaint the whole screen with the next frame (something else wrote to the terminal)"""
+        self._dirty = True
+
+    def watch_handlers(self, handlers: Iterable[logging.Handler]) -> None:
+        """Invalidate the screen whenever one of these (console) handlers emits a record"""
+        for handler in handlers:
+            handler.addFilter(self._on_log_record)
+
+    def unwatch_handlers(self, handlers: Iterable[logging.Handler]) -> None:
+        for handler in handlers:
+            handler.removeFilter(self._on_log_record)
+
+    def _on_log_record(self, record: logging.LogRecord) -> bool:
+        # Handlers check their level before filtering, so this only sees records they print
+        self._dirty = True
+        return True
+
+    def publish(self, snapshot: Dict[str, Any]) -> None:
+        """Offer a new snapshot; replaces any snapshot not yet drawn"""
+        with self._lock:
+            self._snapshot = snapshot
+        self._changed.set()
+
+    def _take(self) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            snapshot, self._snapshot = self._snapshot, None
+        return snapshot
+
+    def _run(self) -> None:
+        last_frame = 0.0
+        while self._running:
+            self._changed.wait()
+            self._changed.clear()
+            delay = last_frame + self.min_interval - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)  # Later snapshots overwrite the slot meanwhile
+            snapshot = self._take()
+            if snapshot is None or not self._running:
+                continue
+            try:
+                self._draw(self.render(snapshot))
+            except Exception as e:
+                logger.error(f"Dashboard render failed: {str(e)}")
+            last_frame = time.monotonic()
+
+    def _draw(self, lines: List[str]) -> None:
+        if not self.ansi:
+            if lines != self._lines:
+                self.stream.write('\n'.join(lines) + '\n')
+                self.stream.flush()
+                self._lines = lines
+            return
+
+        repaint = self.repaint_every and self.frames % self.repaint_every == 0
+        if not self._lines or self._dirty or repaint:
+            self._dirty = False
+            out = [HIDE_CURSOR, CLEAR_SCREEN]
+            out.extend(line + '\n' for line in lines)
+        else:
+            out = []
+            for row, line in enumerate(lines):
+                if row >= len(self._lines) or line != self._lines[row]:
+                    out.append(f"\x1b[{row + 1};1H{line}{CLEAR_LINE}")
+            if len(lines) < len(self._lines):
+                out.append(f"\x1b[{len(lines) + 1};1H{CLEAR_BELOW}")
+        if out:
+            self.stream.write(''.join(out))
+            self.stream.flush()
+        self._lines = lines
+        self.frames += 1
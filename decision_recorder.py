@@ -0,0 +1,159 @@
+# decision_recorder.py
+
+import os
+import glob
+import time
+import logging
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from trade_stats import TradeLog
+
+logger = logging.getLogger(__name__)
+
+DECISION_SCHEMA = {
+    'timestamp': 'datetime64[ns]',  # Bar/tick the decision was made on
+    'strategy': 'U32',
+    'price': 'f8',
+    'sma_short': 'f8',
+    'sma_long': 'f8',
+    'macd': 'f8',
+    'signal_line': 'f8',
+    'rsi': 'f8',
+    'bb_upper': 'f8',
+    'bb_lower': 'f8',
+    'volume': 'f8',
+    'strength': 'f8',               # Signal on generate_trading_signals' -1..1 scale
+    'signal': 'U12',
+    'action': 'U4',                 # BUY, SELL or '' when nothing was filled
+    'fill_price': 'f8',
+    'fill_amount': 'f8'
+}
+
+# Decision field -> RealTimeData column
+INDICATOR_COLUMNS = {
+    'price': 'close',
+    'sma_short': 'SMA_short',
+    'sma_long': 'SMA_long',
+    'macd': 'MACD',
+    'signal_line': 'Signal_Line',
+    'rsi': 'RSI',
+    'bb_upper': 'BB_upper',
+    'bb_lower': 'BB_lower',
+    'volume': 'volume'
+}
+
+SIGNAL_STRENGTH = {"STRONG BUY": 1.0, "BUY": 0.5, "HOLD": 0.0, "SELL": -0.5, "STRONG SELL": -1.0}
+
+SEGMENT_PATTERN = 'decisions-*.npz'
+
+class DecisionRecorder:
+    def __init__(self, directory: str = 'decisions', batch_size: int = 4096, flush_interval: float = 60.0):
+        """
+        Columnar log of every strategy evaluation
+
+        Records share the fixed DECISION_SCHEMA and are buffered in numpy
+        columns; each flush writes one .npz segment named after its first and
+        last timestamp, so load_decisions can skip segments outside a time
+        range without opening them.
+
+        Args:
+            directory: Where segments are written
+            batch_size: Records per segment
+            flush_interval: Also flush a partial batch after this many seconds
+        """
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self._buffer = TradeLog(DECISION_SCHEMA, capacity=batch_size)
+        self._last_flush = time.monotonic()
+        self.segments = len(glob.glob(os.path.join(directory, SEGMENT_PATTERN)))  # Continue numbering after a restart
+
+    @staticmethod
+    def indicators(latest) -> Dict[str, float]:
+        """Decision fields taken from the latest data row (extract once per update, share across strategies)"""
+        return {field: float(latest.get(column, np.nan)) for field, column in INDICATOR_COLUMNS.items()}
+
+    def record(self, timestamp, strategy: str, indicators: Dict[str, float], signal: str,
+               fill: Optional[Dict] = None) -> None:
+        record = dict(indicators)
+        record.update({
+            'timestamp': timestamp,
+            'strategy': strategy,
+            'strength': SIGNAL_STRENGTH.get(signal, np.nan),
+            'signal': signal,
+            'action': fill['side'] if fill else '',
+            'fill_price': fill['price'] if fill else None,
+            'fill_amount': fill['amount'] if fill else None
+        })
+        self._buffer.append(record)
+        if len(self._buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self._last_flush = time.monotonic()
+        if not len(self._buffer):
+            return
+        columns = {name: self._buffer.column(name) for name in DECISION_SCHEMA}
+        timestamps = columns['timestamp']
+        timestamps = timestamps[~np.isnat(timestamps)].astype('int64')
+        first, last = (timestamps.min(), timestamps.max()) if len(timestamps) else (0, 0)
+        name = f"decisions-{first}-{last}-{self.segments:06d}.npz"
+        tmp_path = os.path.join(self.directory, name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **columns)
+        os.replace(tmp_path, os.path.join(self.directory, name))
+        logger.debug(f"Wrote {len(self._buffer)} decisions to {name}")
+        self.segments += 1
+        self._buffer = TradeLog(DECISION_SCHEMA, capacity=self.batch_size)
+
+    def close(self) -> None:
+        self.flush()
+
+def _segment_range(path: str):
+    first, last = os.path.basename(path).split('-')[1:3]
+    return int(first), int(last)
+
+def load_decisions(directory: str = 'decisions', start=None, end=None,
+                   columns: Optional[Iterable[str]] = None) -> Dict[str, np.ndarray]:
+    """
+    Load recorded decisions as one numpy array per field
+
+    Segments entirely outside [start, end] are skipped by file name; rows are
+    then trimmed to the range. Pass `columns` to read only some fields.
+    """
+    names = list(columns) if columns is not None else list(DECISION_SCHEMA)
+    if 'timestamp' not in names:
+        names.append('timestamp')
+    start_ns = pd.Timestamp(start).value if start is not None else None
+    end_ns = pd.Timestamp(end).value if end is not None else None
+
+    parts = {name: [] for name in names}
+    for path in sorted(glob.glob(os.path.join(directory, SEGMENT_PATTERN)), key=_segment_range):
+        first, last = _segment_range(path)
+        if (start_ns is not None and last < start_ns) or (end_ns is not None and first > end_ns):
+            continue
+        with np.load(path) as segment:
+            for name in names:
+                parts[name].append(segment[name])
+
+    decisions = {
+        name: np.concatenate(arrays) if arrays else np.empty(0, dtype=DECISION_SCHEMA[name])
+        for name, arrays in parts.items()
+    }
+    if start_ns is not None or end_ns is not None:
+        ts = decisions['timestamp'].astype('int64')
+        mask = np.ones(len(ts), dtype=bool)
+        if start_ns is not None:
+            mask &= ts >= start_ns
+        if end_ns is not None:
+            mask &= ts <= end_ns
+        decisions = select(decisions, mask)
+    return decisions
+
+def select(decisions: Dict[str, np.ndarray], mask: np.ndarray) -> Dict[str, np.ndarray]:
+    """Rows of loaded decisions where mask is True, e.g. select(d, (d['rsi'] > 70) & (d['action'] == 'SELL'))"""
+    return {name: column[mask] for name, column in decisions.items()}
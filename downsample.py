@@ -0,0 +1,104 @@
+# downsample.py
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('lttb', 'minmax', 'none')
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: indices of n_out points preserving the visual shape
+
+    Keeps the first and last point and, from each of n_out - 2 equal
+    buckets, the point forming the largest triangle with the previously
+    kept point and the next bucket's mean. Bucket means come from prefix
+    sums, so the cost is one vectorized pass plus a loop over buckets.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    x_sum = np.concatenate(([0.0], np.cumsum(x)))
+    y_sum = np.concatenate(([0.0], np.cumsum(y)))
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        if i == n_out - 3:
+            avg_x, avg_y = x[-1], y[-1]
+        else:
+            next_end = edges[i + 2]
+            count = next_end - end
+            avg_x = (x_sum[next_end] - x_sum[end]) / count
+            avg_y = (y_sum[next_end] - y_sum[end]) / count
+        xs, ys = x[start:end], y[start:end]
+        area = np.abs((x[a] - avg_x) * (ys - y[a]) - (x[a] - xs) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        out[i + 1] = a
+    return out
+
+def minmax_indices(y: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Indices of the min and max of each of n_buckets equal buckets (plus endpoints), fully vectorized"""
+    n = len(y)
+    if 2 * n_buckets >= n or n_buckets < 1:
+        return np.arange(n)
+    size = -(-n // n_buckets)
+    padded = np.pad(np.asarray(y, dtype=np.float64), (0, size * n_buckets - n), mode='edge').reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    idx = np.concatenate(([0, n - 1], offsets + padded.argmin(axis=1), offsets + padded.argmax(axis=1)))
+    return np.unique(np.minimum(idx, n - 1))
+
+def downsample(series: pd.Series, n_out: int, method: str = 'lttb') -> pd.Series:
+    """
+    Reduce a series to about n_out points for plotting (NaNs are dropped)
+
+    'lttb' returns n_out points, 'minmax' the min and max of n_out / 2
+    buckets (every spike survives), 'none' the series unchanged.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown downsampling method {method!r}, expected one of {METHODS}")
+    series = series.dropna()
+    if method == 'none' or len(series) <= n_out:
+        return series
+    if method == 'minmax':
+        return series.iloc[minmax_indices(series.to_numpy(), max(1, n_out // 2))]
+    index = series.index
+    if isinstance(index, pd.DatetimeIndex):
+        x = index.asi8
+    elif pd.api.types.is_numeric_dtype(index):
+        x = index.to_numpy()
+    else:
+        x = np.arange(len(series))
+    return series.iloc[lttb_indices(x, series.to_numpy(), n_out)]
+
+def axes_pixel_width(ax) -> int:
+    """Width of a matplotlib Axes in output pixels"""
+    return max(3, int(ax.get_window_extent().width))
+
+def plot_downsampled(ax, series: pd.Series, method: str = 'lttb', **kwargs):
+    """ax.plot of `series` downsampled to the axes' pixel width"""
+    points = downsample(series, axes_pixel_width(ax), method)
+    return ax.plot(points.index, points.to_numpy(), **kwargs)
+
+def new_figure(path=None, **kwargs):
+    """
+    Figure for a chart: a pyplot figure for interactive display, or a
+    standalone Agg-rendered Figure (no GUI backend needed) when saving to path
+    """
+    if path is None:
+        import matplotlib.pyplot as plt
+        return plt.figure(**kwargs)
+    from matplotlib.figure import Figure
+    return Figure(**kwargs)
+
+def finish_figure(fig, path=None, dpi=100) -> None:
+    """Save the figure to path (headless) or show it"""
+    if path is None:
+        import matplotlib.pyplot as plt
+        plt.show()
+    else:
+        fig.savefig(path, dpi=dpi)
@@ -0,0 +1,191 @@
+# feature_export.py
+
+import os
+import json
+import time
+import logging
+import argparse
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest import LONG_WINDOW, SHORT_WINDOW, _download, prepare_ohlcv
+from strategy import moving_average_strategy
+
+logger = logging.getLogger(__name__)
+
+# Numeric columns moving_average_strategy adds, in export order
+FEATURES = (
+    'Short_MA', 'Long_MA', 'MA_50', 'MA_200',
+    'EMA_12', 'EMA_26', 'MACD', 'Signal_Line', 'MACD_Hist',
+    'RSI',
+    'BB_Middle', 'BB_Upper', 'BB_Lower', 'BB_Width',
+    'Stoch_K', 'Stoch_D',
+    'ATR', 'OBV',
+    'Trend', 'Trend_Strength', 'Trend_Direction',
+    'Momentum', 'ROC',
+    'Price_Dev_Short', 'Price_Dev_Long',
+    'Volatility',
+    'Signal'
+)
+
+# yfinance interval -> fixed pandas frequency of the shared time axis
+INTERVAL_FREQ = {
+    '1m': 'min', '2m': '2min', '5m': '5min', '15m': '15min', '30m': '30min',
+    '60m': 'h', '90m': '90min', '1h': 'h', '1d': 'D'
+}
+
+def compute_features(data: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """FEATURES for one symbol's raw OHLCV download, float32, indexed by naive UTC time"""
+    frame = moving_average_strategy(prepare_ohlcv(data, symbol), short_window=SHORT_WINDOW,
+                                    long_window=LONG_WINDOW, signals=False)
+    features = pd.DataFrame({name: _column(frame, name) for name in FEATURES}, index=frame.index)
+    if features.index.tz is not None:
+        features.index = features.index.tz_convert('UTC').tz_localize(None)
+    return features.astype(np.float32)
+
+def _column(frame: pd.DataFrame, name: str) -> pd.Series:
+    if name not in frame.columns.get_level_values(0):
+        return pd.Series(np.nan, index=frame.index)  # e.g. ATR without High/Low
+    column = frame[name]
+    return column.iloc[:, 0] if isinstance(column, pd.DataFrame) else column
+
+def _export_symbol(path: str, row: int, symbol: str, start, end, interval: str,
+                   data_source: Callable) -> Dict[str, Any]:
+    """Worker: download, compute and write one symbol's (time x features) slice in place"""
+    started = time.perf_counter()
+    out = np.load(path, mmap_mode='r+')
+    try:
+        times = pd.date_range(start, end, freq=INTERVAL_FREQ[interval], inclusive='left')
+        out[row] = np.nan
+        data = data_source(symbol, start, end, interval)
+        if data is None or data.empty:
+            return {'symbol': symbol, 'rows': 0, 'error': 'no data'}
+        features = compute_features(data, symbol)
+        positions = times.get_indexer(features.index.floor(INTERVAL_FREQ[interval]))
+        on_grid = positions >= 0
+        # A later bar in the same grid slot wins, as with reindexing
+        out[row, positions[on_grid]] = features.to_numpy()[on_grid]
+        out.flush()
+        return {
+            'symbol': symbol,
+            'rows': int(on_grid.sum()),
+            'off_grid': int((~on_grid).sum()),
+            'first': str(features.index[0]),
+            'last': str(features.index[-1]),
+            'seconds': round(time.perf_counter() - started, 3)
+        }
+    except Exception as e:
+        return {'symbol': symbol, 'rows': 0, 'error': str(e)}
+    finally:
+        del out
+
+def export_features(symbols: Sequence[str], start, end, interval: str = '1d', path: str = 'features.npy',
+                    workers: Optional[int] = None, data_source: Optional[Callable] = None) -> Dict[str, Any]:
+    """
+    Compute moving_average_strategy features for many symbols into one memory-mapped array
+
+    Writes `path`, a float32 .npy of shape (symbols, time, features), and a
+    JSON sidecar (`path` with .json) listing symbols, features, the time axis
+    and per-symbol export stats. The time axis is the regular `interval`
+    grid over [start, end); slots a symbol has no bar for stay NaN. The
+    file is created sparse and each worker process fills its own symbol's
+    slice directly, so neither side ever holds the whole array in memory.
+    Read it back with load_features().
+
+    Args:
+        data_source: (symbol, start, end, interval) -> OHLCV DataFrame as for
+            Backtester (default yfinance); must be picklable for the workers
+    """
+    if interval not in INTERVAL_FREQ:
+        raise ValueError(f"Unsupported interval {interval!r}, expected one of {list(INTERVAL_FREQ)}")
+    symbols = list(dict.fromkeys(symbols))
+    times = pd.date_range(start, end, freq=INTERVAL_FREQ[interval], inclusive='left')
+    shape = (len(symbols), len(times), len(FEATURES))
+    np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=shape).flush()
+    logger.info(f"Exporting {len(symbols)} symbols x {len(times)} {interval} bars x {len(FEATURES)} features to {path}")
+
+    started = time.perf_counter()
+    stats: Dict[str, Dict[str, Any]] = {}
+    # spawn: never fork a process that already runs the logging listener thread
+    with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context('spawn')) as pool:
+        futures = [
+            pool.submit(_export_symbol, path, row, symbol, start, end, interval, data_source or _download)
+            for row, symbol in enumerate(symbols)
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            symbol = result.pop('symbol')
+            stats[symbol] = result
+            if 'error' in result:
+                logger.warning(f"Feature export failed for {symbol}: {result['error']}")
+
+    index = {
+        'shape': list(shape),
+        'dtype': 'float32',
+        'layout': ['symbol', 'time', 'feature'],
+        'symbols': symbols,
+        'features': list(FEATURES),
+        'interval': interval,
+        'freq': INTERVAL_FREQ[interval],
+        'start': str(times[0]) if len(times) else str(pd.Timestamp(start)),
+        'periods': len(times),
+        'created': datetime.now().isoformat(),
+        'seconds': round(time.perf_counter() - started, 3),
+        'stats': {symbol: stats[symbol] for symbol in symbols}
+    }
+    tmp_path = _index_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, indent=1)
+    os.replace(tmp_path, _index_path(path))
+    logger.info(f"Exported {sum('error' not in s for s in stats.values())}/{len(symbols)} symbols "
+                f"in {index['seconds']:.1f} s")
+    return index
+
+def _index_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.json'
+
+def load_features(path: str = 'features.npy') -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Open an export read-only without loading it: (memmap array, sidecar index)
+
+    index['times'] is the DatetimeIndex of the time axis, e.g.
+        features, index = load_features()
+        rsi = features[index['symbols'].index('BTC-USD'), :, index['features'].index('RSI')]
+    """
+    features = np.load(path, mmap_mode='r')
+    with open(_index_path(path), encoding='utf-8') as f:
+        index = json.load(f)
+    index['times'] = pd.date_range(index['start'], periods=index['periods'], freq=index['freq'])
+    return features, index
+
+def _read_symbols(path: str) -> List[str]:
+    with open(path, encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def main():
+    parser = argparse.ArgumentParser(description='Export moving_average_strategy features for many symbols')
+    parser.add_argument('symbols', nargs='*', help='Symbols, e.g. BTC-USD ETH-USD')
+    parser.add_argument('--symbols-file', help='File with one symbol per line')
+    parser.add_argument('--start', required=True, help='Start date YYYY-MM-DD')
+    parser.add_argument('--end', required=True, help='End date YYYY-MM-DD (exclusive)')
+    parser.add_argument('--interval', default='1d', choices=list(INTERVAL_FREQ))
+    parser.add_argument('--out', default='features.npy', help='Output .npy (sidecar index next to it as .json)')
+    parser.add_argument('--workers', type=int, help='Worker processes (default: CPU count)')
+    args = parser.parse_args()
+    symbols = list(args.symbols) + (_read_symbols(args.symbols_file) if args.symbols_file else [])
+    if not symbols:
+        parser.error('no symbols given')
+    index = export_features(symbols, args.start, args.end, args.interval, args.out, args.workers)
+    failed = {s: v['error'] for s, v in index['stats'].items() if 'error' in v}
+    print(f"{len(symbols) - len(failed)}/{len(symbols)} symbols, shape {tuple(index['shape'])}, "
+          f"{index['seconds']:.1f} s -> {args.out}")
+    for symbol, error in failed.items():
+        print(f"  {symbol}: {error}")
+
+if __name__ == "__main__":
+    main()
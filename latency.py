@@ -0,0 +1,173 @@
+# latency.py
+
+import time
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SUB_BITS = 5                      # 32 sub-buckets per power of two: ~3% relative precision
+SUB_BUCKETS = 1 << SUB_BITS
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+class LatencyHistogram:
+    def __init__(self):
+        """
+        HDR-style log-linear histogram of integer nanosecond latencies
+
+        Each power of two is split into 32 linear sub-buckets, so recording
+        is a bit_length and a list increment and percentiles are accurate to
+        ~3% across the whole range from nanoseconds to minutes. Recording
+        takes no lock: each stage is written from one thread, and a count
+        lost to a rare concurrent write does not matter for monitoring.
+        """
+        self.counts = [0] * (64 * SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _bucket(value: int) -> int:
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BITS - 1
+        return ((shift + 1) << SUB_BITS) + (value >> shift) - SUB_BUCKETS
+
+    @staticmethod
+    def _upper_bound(index: int) -> int:
+        if index < SUB_BUCKETS:
+            return index
+        shift = (index >> SUB_BITS) - 1
+        return (((index & (SUB_BUCKETS - 1)) + SUB_BUCKETS + 1) << shift) - 1
+
+    def record(self, value_ns: int) -> None:
+        value_ns = max(0, int(value_ns))
+        self.counts[self._bucket(value_ns)] += 1
+        self.count += 1
+        self.total += value_ns
+        if value_ns > self.max:
+            self.max = value_ns
+
+    def percentile(self, q: float) -> int:
+        """Latency (ns) at or below which a fraction q of samples fall"""
+        counts = list(self.counts)
+        total = sum(counts)
+        if total == 0:
+            return 0
+        target = max(1, q * total)
+        seen = 0
+        for index, n in enumerate(counts):
+            seen += n
+            if seen >= target:
+                return min(self._upper_bound(index), self.max)
+        return self.max
+
+class LatencyMetrics:
+    def __init__(self):
+        """Registry of per-stage latency histograms, throughput counters and gauges"""
+        self.histograms: Dict[str, LatencyHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.gauges: Dict[str, float] = {}
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str) -> LatencyHistogram:
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, LatencyHistogram())
+        return histogram
+
+    def observe(self, stage: str, value_ns: int) -> None:
+        """Record one stage latency; pair with time.perf_counter_ns() around the stage"""
+        self.histogram(stage).record(value_ns)
+
+    def since(self, stage: str, started_ns: int) -> None:
+        self.histogram(stage).record(time.perf_counter_ns() - started_ns)
+
+    def incr(self, name: str, n: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set_gauge(self, name: str, value: float) -> None:
+        """Point-in-time value, e.g. one-off startup durations"""
+        self.gauges[name] = value
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count and p50/p99/max in microseconds, counter rates per second and gauges"""
+        elapsed = max(time.time() - self.started, 1e-9)
+        stages = {
+            stage: {
+                'count': h.count,
+                'p50_us': h.percentile(0.5) / 1e3,
+                'p99_us': h.percentile(0.99) / 1e3,
+                'max_us': h.max / 1e3
+            }
+            for stage, h in list(self.histograms.items())
+        }
+        rates = {name: value / elapsed for name, value in list(self.counters.items())}
+        return {'stages': stages, 'rates_per_second': rates, 'gauges': dict(self.gauges)}
+
+    def prometheus(self) -> str:
+        """Prometheus text exposition format"""
+        lines = [
+            '# HELP tick_stage_latency_seconds Latency of each tick-to-trade stage',
+            '# TYPE tick_stage_latency_seconds summary'
+        ]
+        for stage, h in sorted(list(self.histograms.items())):
+            for q in QUANTILES:
+                lines.append(f'tick_stage_latency_seconds{{stage="{stage}",quantile="{q}"}} {h.percentile(q) / 1e9:.9f}')
+            lines.append(f'tick_stage_latency_seconds{{stage="{stage}",quantile="1"}} {h.max / 1e9:.9f}')
+            lines.append(f'tick_stage_latency_seconds_sum{{stage="{stage}"}} {h.total / 1e9:.9f}')
+            lines.append(f'tick_stage_latency_seconds_count{{stage="{stage}"}} {h.count}')
+        for name, value in sorted(list(self.counters.items())):
+            lines.append(f'# TYPE {name}_total counter')
+            lines.append(f'{name}_total {value}')
+        for name, value in sorted(list(self.gauges.items())):
+            lines.append(f'# TYPE {name} gauge')
+            lines.append(f'{name} {value:.6f}')
+        lines.append('# TYPE process_start_time_seconds gauge')
+        lines.append(f'process_start_time_seconds {self.started:.3f}')
+        return '\n'.join(lines) + '\n'
+
+# Process-wide registry used by the live pipeline's instrumentation
+METRICS = LatencyMetrics()
+
+class MetricsServer:
+    def __init__(self, metrics: LatencyMetrics = METRICS, host: str = '127.0.0.1', port: int = 9108):
+        """Serves GET /metrics (Prometheus text) from a daemon thread"""
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def start(self) -> None:
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Keep scrapes out of the trading log
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, name='metrics-server', daemon=True).start()
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
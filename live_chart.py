@@ -0,0 +1,180 @@
+# live_chart.py
+
+import time
+import queue
+import logging
+import multiprocessing as mp
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COLUMNS = ('close', 'SMA_short', 'SMA_long')
+
+class LiveChart:
+    def __init__(self, columns: Sequence[str] = DEFAULT_COLUMNS, max_points: int = 2000,
+                 max_fps: float = 10.0, title: str = 'Live Price', queue_size: int = 64):
+        """
+        Incrementally updating price chart in its own process
+
+        Register update() as a RealTimeData listener. Each call slices only
+        the rows at or after the last bar already sent (the current bar is
+        revised in place on every tick) and hands them to a bounded queue
+        without waiting; pickling happens on the queue's feeder thread and
+        everything matplotlib does happens in the chart process, so watching
+        the chart adds no work to the trading thread. If the chart falls
+        behind the queue fills, updates are dropped and the unsent rows go
+        out with the next one. Updates closer together than one frame are
+        skipped the same way, so most ticks cost a single clock read.
+
+        The chart process keeps the last `max_points` bars, redraws only the
+        line artists over a cached background (blitting) and does a full
+        redraw only when the axes limits have to grow. Frames are capped at
+        `max_fps`; updates arriving in between are merged.
+        """
+        self.columns = list(columns)
+        self.max_points = max_points
+        self.max_fps = max_fps
+        self.min_interval = 1.0 / max_fps
+        self.title = title
+        self.dropped = 0
+        self._ctx = mp.get_context('spawn')  # Never fork the threaded trading process
+        self._queue = self._ctx.Queue(maxsize=queue_size)
+        self._process = None
+        self._last_ns: Optional[int] = None
+        self._last_sent = float('-inf')
+
+    def start(self) -> None:
+        self._process = self._ctx.Process(
+            target=_chart_process,
+            args=(self._queue, self.columns, self.max_points, self.max_fps, self.title),
+            name='live-chart',
+            daemon=True
+        )
+        self._process.start()
+        logger.info(f"Live chart started (pid {self._process.pid})")
+
+    def stop(self) -> None:
+        if self._process is None:
+            return
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+        self._process.join(timeout=2)
+        if self._process.is_alive():
+            self._process.terminate()
+        self._queue.cancel_join_thread()  # Don't block exit on rows the chart will never read
+        self._process = None
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def update(self, data: pd.DataFrame) -> None:
+        """RealTimeData listener: send the rows changed since the last update"""
+        now = time.monotonic()
+        if now - self._last_sent < self.min_interval or data.empty or not self.alive:
+            return  # Rows skipped here go out with the next send
+        times = data.index.asi8
+        start = 0 if self._last_ns is None else int(times.searchsorted(self._last_ns))
+        start = max(start, len(times) - self.max_points)
+        # Column-wise numpy slices: a DataFrame-level slice costs ~10x more per tick
+        values = np.full((len(times) - start, len(self.columns)), np.nan)
+        for i, column in enumerate(self.columns):
+            if column in data:
+                values[:, i] = data[column].to_numpy()[start:]
+        try:
+            self._queue.put_nowait((times[start:], values))
+        except queue.Full:
+            self.dropped += 1  # Resent with the next update
+            return
+        self._last_ns = times[-1]
+        self._last_sent = now
+
+class _Series:
+    """Fixed-window bar store; a batch overlapping the last bar revises it in place"""
+
+    def __init__(self, n_columns: int, max_points: int):
+        self.max_points = max_points
+        self.times = np.empty(0, dtype=np.int64)
+        self.values = np.empty((0, n_columns))
+
+    def merge(self, times: np.ndarray, values: np.ndarray) -> None:
+        if len(times) == 0:
+            return
+        keep = self.times < times[0]
+        self.times = np.concatenate((self.times[keep], times))[-self.max_points:]
+        self.values = np.concatenate((self.values[keep], values))[-self.max_points:]
+
+def _chart_process(q, columns, max_points, max_fps, title) -> None:
+    import matplotlib.pyplot as plt
+    import matplotlib.dates as mdates
+
+    series = _Series(len(columns), max_points)
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.set_title(title)
+    ax.xaxis_date()
+    ax.grid(True)
+    lines = [ax.plot([], [], label=c, animated=True)[0] for c in columns]
+    ax.legend(loc='upper left')
+    state = {'background': None}
+
+    def on_draw(event):
+        state['background'] = fig.canvas.copy_from_bbox(fig.bbox)
+        for line in lines:
+            ax.draw_artist(line)
+
+    fig.canvas.mpl_connect('draw_event', on_draw)
+    plt.show(block=False)
+
+    min_interval = 1.0 / max_fps
+    running = True
+    while running and plt.fignum_exists(fig.number):
+        frame_start = time.monotonic()
+        # Merge everything queued since the last frame
+        changed = False
+        timeout = min_interval
+        while True:
+            try:
+                item = q.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                running = False
+                break
+            series.merge(*item)
+            changed = True
+            timeout = 0.0005
+        if changed and len(series.times):
+            _draw_frame(fig, ax, lines, series, state, mdates)
+        fig.canvas.flush_events()
+        delay = frame_start + min_interval - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+    plt.close(fig)
+
+def _draw_frame(fig, ax, lines, series, state, mdates) -> None:
+    x = mdates.date2num(series.times.astype('datetime64[ns]'))
+    for i, line in enumerate(lines):
+        line.set_data(x, series.values[:, i])
+
+    # Limits only ever grow within the window, so most frames are a pure blit
+    (x0, x1), (y0, y1) = ax.get_xlim(), ax.get_ylim()
+    finite = series.values[np.isfinite(series.values)]
+    lo, hi = (finite.min(), finite.max()) if len(finite) else (y0, y1)
+    if state['background'] is None or x[0] < x0 or x[-1] > x1 or lo < y0 or hi > y1:
+        span = max(x[-1] - x[0], 1 / 1440)
+        pad = max(hi - lo, abs(hi) * 1e-4, 1e-12) * 0.1
+        ax.set_xlim(x[0], x[-1] + span * 0.1)  # Headroom so new bars don't force a redraw each minute
+        ax.set_ylim(lo - pad, hi + pad)
+        fig.canvas.draw()  # Recaptures the background via on_draw
+        fig.canvas.blit(fig.bbox)
+        return
+
+    fig.canvas.restore_region(state['background'])
+    for line in lines:
+        ax.draw_artist(line)
+    fig.canvas.blit(fig.bbox)
@@ -1,28 +1,183 @@
 # logger.py
 
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
+import threading
+import time
 
-def setup_logger():
-    """Setup and configure logger with proper encoding"""
-    logger = logging.getLogger('TradingLogger')
-    logger.setLevel(logging.DEBUG)
-    
-    # File handler with UTF-8 encoding
-    fh = logging.FileHandler('trading_log.txt', encoding='utf-8')
-    fh.setLevel(logging.DEBUG)
-    
-    # Console handler
-    ch = logging.StreamHandler(sys.stdout)
-    ch.setLevel(logging.INFO)
-    
-    # Formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    fh.setFormatter(formatter)
-    ch.setFormatter(formatter)
-    
-    # Add handlers
-    logger.addHandler(fh)
-    logger.addHandler(ch)
-    
-    return logger
\ No newline at end of file
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+# Logger name -> QueueListener, so each logger is configured once per process
+_listeners = {}
+_setup_lock = threading.Lock()
+
+class BatchingFileHandler(logging.FileHandler):
+    """
+    File handler that buffers formatted records and writes them in one call
+
+    A batch is written once `batch_size` records are pending, on any record
+    at ERROR or above, or when the queue listener goes idle (see
+    _FlushingQueueListener), so the file is never more than
+    `flush_interval` seconds behind.
+    """
+    def __init__(self, filename, batch_size=256, encoding='utf-8'):
+        super().__init__(filename, encoding=encoding)
+        self.batch_size = batch_size
+        self._buffer = []
+
+    def emit(self, record):
+        try:
+            self._buffer.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+        if len(self._buffer) >= self.batch_size or record.levelno >= logging.ERROR:
+            self.flush()
+
+    def flush(self):
+        self.acquire()
+        try:
+            if self._buffer and self.stream is not None:
+                self.stream.write('\n'.join(self._buffer) + '\n')
+                self._buffer.clear()
+            super().flush()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
+
+class _LocalQueueHandler(logging.handlers.QueueHandler):
+    """In-process queue handler: records are formatted on the listener thread, not the caller's"""
+    def prepare(self, record):
+        return record
+
+class _FlushingQueueListener(logging.handlers.QueueListener):
+    """QueueListener that flushes its handlers whenever the queue stays empty for flush_interval"""
+    def __init__(self, log_queue, *handlers, flush_interval=1.0):
+        super().__init__(log_queue, *handlers, respect_handler_level=True)
+        self.flush_interval = flush_interval
+
+    def dequeue(self, block):
+        while True:
+            try:
+                return self.queue.get(block, timeout=self.flush_interval)
+            except queue.Empty:
+                for handler in self.handlers:
+                    handler.flush()
+
+def setup_logger(name='TradingLogger', log_file='trading_log.txt', file_level=None,
+                 console_level=None, batch_size=256, flush_interval=1.0):
+    """
+    Setup and configure logger with proper encoding
+
+    Idempotent: repeated calls return the same logger without adding
+    handlers, but apply any file_level/console_level they pass explicitly
+    (e.g. a CLI quieting the console after modules set the logger up at
+    import). Levels default to DEBUG for the file and INFO for the console.
+    Callers only put records on a queue; a background QueueListener formats
+    them and writes the file in batches, so logging never does file I/O on
+    the calling thread.
+    """
+    logger = logging.getLogger(name)
+    with _setup_lock:
+        if name in _listeners:
+            _apply_levels(logger, _listeners[name], file_level, console_level)
+            return logger
+
+        file_level = logging.DEBUG if file_level is None else file_level
+        console_level = logging.INFO if console_level is None else console_level
+        logger.setLevel(min(file_level, console_level))
+        logger.propagate = False  # Avoid a second copy through root handlers (basicConfig)
+
+        # File handler with UTF-8 encoding
+        fh = BatchingFileHandler(log_file, batch_size=batch_size)
+        fh.setLevel(file_level)
+
+        # Console handler
+        ch = logging.StreamHandler(sys.stdout)
+        ch.setLevel(console_level)
+
+        # Formatter
+        formatter = logging.Formatter(LOG_FORMAT)
+        fh.setFormatter(formatter)
+        ch.setFormatter(formatter)
+
+        log_queue = queue.Queue(-1)
+        listener = _FlushingQueueListener(log_queue, fh, ch, flush_interval=flush_interval)
+        listener.start()
+        _listeners[name] = listener
+
+        # Replace anything attached earlier (e.g. a module-level FileHandler)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        logger.addHandler(_LocalQueueHandler(log_queue))
+
+    return logger
+
+def _apply_levels(logger, listener, file_level, console_level):
+    """Set the requested levels on an already configured logger's handlers"""
+    for handler in listener.handlers:
+        level = file_level if isinstance(handler, BatchingFileHandler) else console_level
+        if level is not None:
+            handler.setLevel(level)
+    logger.setLevel(min(handler.level for handler in listener.handlers))
+
+def console_handlers(name='TradingLogger'):
+    """Console (non-file) handlers of a logger configured by setup_logger"""
+    with _setup_lock:
+        listener = _listeners.get(name)
+        if listener is None:
+            return []
+        return [h for h in listener.handlers if not isinstance(h, BatchingFileHandler)]
+
+def shutdown_logging():
+    """Drain the queues and flush all files (also run at interpreter exit)"""
+    with _setup_lock:
+        for listener in _listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        _listeners.clear()
+
+atexit.register(shutdown_logging)
+
+class RateLimitedLogger:
+    def __init__(self, logger, interval=1.0):
+        """
+        Hot-path wrapper that emits each message template at most once per interval
+
+        Arguments are formatted lazily (logging %-style), so suppressed and
+        disabled calls cost a dict lookup. The next emitted record reports
+        how many were suppressed in between.
+        """
+        self.logger = logger
+        self.interval = interval
+        self._next = {}
+        self._suppressed = {}
+
+    def log(self, level, msg, *args):
+        self._log(level, msg, args)
+
+    def debug(self, msg, *args):
+        self._log(logging.DEBUG, msg, args)
+
+    def info(self, msg, *args):
+        self._log(logging.INFO, msg, args)
+
+    def _log(self, level, msg, args):
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now < self._next.get(msg, 0.0):
+            self._suppressed[msg] = self._suppressed.get(msg, 0) + 1
+            return
+        self._next[msg] = now + self.interval
+        suppressed = self._suppressed.pop(msg, 0)
+        if suppressed:
+            msg, args = msg + ' (%d similar suppressed)', args + (suppressed,)
+        self.logger.log(level, msg, *args, stacklevel=3)  # Attribute to the caller, not this wrapper
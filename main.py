@@ -1,149 +1,210 @@
 import os
-import sys
 import time
+STARTED = time.perf_counter()  # Startup clock: import and first-decision times are measured from here
 import logging
+import multiprocessing as mp
 import pandas as pd
 from dotenv import load_dotenv
 from datetime import datetime
-from typing import Dict, Any
+from typing import Any, Dict, List
 
 from realtime_data import RealTimeData
-from crypto_api import CryptoComAPI
-from strategy import generate_trading_signals
-from plot import plot_results
-from performance_tracker import PerformanceTracker
-from monitor import TradingMonitor
+from strategy import majority_vote_strategy, signal_score_strategy
+from strategy_runner import StrategyRunner
+from decision_recorder import DecisionRecorder
 from paper_trader import PaperTrader
+from state_journal import StateJournal
+from dashboard import TerminalDashboard
+from live_chart import LiveChart
+from replay import STRATEGIES, TickRecorder
+from shm_ring import BarRing
+from logger import console_handlers, setup_logger
+from latency import METRICS, MetricsServer
 
 # Load environment variables
 load_dotenv()
 
-# Configure logging
-logger = logging.getLogger('TradingLogger')
-logger.setLevel(logging.INFO)
+# Configure logging (idempotent; file writes happen on a background queue listener)
+logger = setup_logger()
 
-# File handler
-file_handler = logging.FileHandler('trading_log.txt', encoding='utf-8')
-file_handler.setLevel(logging.INFO)
+IMPORT_SECONDS = time.perf_counter() - STARTED
 
-# Console handler
-console_handler = logging.StreamHandler(sys.stdout)
-console_handler.setLevel(logging.INFO)
+def render_dashboard(snapshot: Dict[str, Any]) -> List[str]:
+    """Format a dashboard snapshot into screen lines (runs on the dashboard thread)"""
+    latest = snapshot['latest']
+    account = snapshot['account']
+    lines = [
+        f"================= Current Time: {snapshot['time']:%Y-%m-%d %H:%M:%S} =================",
+        "",
+        "================= Market Data =================",
+        f"Current Price: {latest['close']:.5f}",
+        f"Open Price:    {latest['open']:.5f}",
+        f"High Price:    {latest['high']:.5f}",
+        f"Low Price:     {latest['low']:.5f}",
+        f"Volume:        {latest['volume']:.2f}",
+        "",
+        "============= Moving Averages =============",
+        f"Short MA (20): {latest['SMA_short']:.5f}",
+        f"Long MA (50):  {latest['SMA_long']:.5f}",
+        "",
+        "============= MACD and RSI =============",
+        f"MACD:          {latest['MACD']:.5f}",
+        f"Signal Line:   {latest['Signal_Line']:.5f}",
+        f"RSI:           {latest['RSI']:.2f}",
+        "",
+        "============= Strategies ============="
+    ]
+    for name, row in snapshot['strategies'].items():
+        lines.append(f"{name:<16} {row['signal']:<12} return {row['return_pct']:7.2f}%  "
+                     f"trades {row['total_trades']:<4} eval {row['eval_mean_us']:8.1f} us")
+    lines.extend([
+        f"Shared indicators: {snapshot['indicator_us']:.1f} us per update",
+        "",
+        "============= Overall Recommendation =============",
+        f"Recommendation: {snapshot['recommendation']}",
+        "",
+        "Paper Trading Status:",
+        f"Initial Balance:    {account['initial_balance']:.2f} USDT",
+        f"Current Balance:    {account['balance']:.2f} USDT",
+        f"Position Size:      {account['position']:.4f}",
+        f"Position Value:     {account['position_value']:.2f} USDT",
+        f"Total Value:        {account['total_value']:.2f} USDT",
+        f"Total Return:       {account['return_pct']:.2f}%",
+        f"Total Trades:       {account['total_trades']}",
+        f"Win Rate:           {account['win_rate']:.2f}%"
+    ])
+    return lines
 
-# Formatter
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-file_handler.setFormatter(formatter)
-console_handler.setFormatter(formatter)
+def ingest_process(ring_name: str, symbol: str, api_key: str, api_secret: str, state_dir: str,
+                   metrics_port: int, stop) -> None:
+    """Multiprocess mode: websocket parsing and indicator maths, appending bars to the shared ring"""
+    ring = BarRing.attach(ring_name)
+    journal = StateJournal(os.path.join(state_dir, 'ingest'))
+    metrics_server = MetricsServer(port=metrics_port) if metrics_port else None
+    rt_data = None
+    try:
+        if metrics_server is not None:
+            metrics_server.start()
+        rt_data = RealTimeData(symbol, api_key, api_secret,
+                               history=RealTimeData.history_from_state(journal.state_for('realtime_data')))
+        journal.register('realtime_data', rt_data)
+        rt_data.add_listener(ring.update)
+        ring.update(rt_data.data)
+        rt_data.start()
+        while not stop.wait(1):
+            journal.maybe_snapshot()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if rt_data is not None:
+            rt_data.stop()
+        journal.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        ring.close()
+
+def strategy_process(ring_name: str, name: str, state_dir: str, decisions_dir: str, metrics_port: int,
+                     stop, window: int = 1000) -> None:
+    """Multiprocess mode: one strategy and its paper account, reading bar windows from the ring"""
+    ring = BarRing.attach(ring_name)
+    journal = StateJournal(os.path.join(state_dir, name))
+    recorder = DecisionRecorder(os.path.join(decisions_dir, name))
+    metrics_server = MetricsServer(port=metrics_port) if metrics_port else None
+    runner = StrategyRunner(recorder=recorder)
+    trader = runner.register(name, STRATEGIES[name])
+    journal.register('paper_trader', trader)
+    seq = 0
+    try:
+        if metrics_server is not None:
+            metrics_server.start()
+        while not stop.is_set():
+            if not ring.wait(seq, timeout=0.5):
+                continue
+            start, view = ring.window(window)
+            seq = start + len(view)
+            frame = view.copy()
+            if ring.overwritten(start):
+                # Ingest lapped the ring while copying: skip this step, a larger ring is needed
+                METRICS.incr('ring_overruns')
+                logger.warning(f"{name}: bars overwritten while copying (ring too small)")
+                continue
+            runner.step(frame)
+            journal.maybe_snapshot()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        metrics = trader.calculate_metrics()
+        logger.info(f"{name}: {metrics['total_trades']} trades, return {metrics['return_pct']:.2f}%")
+        recorder.close()
+        journal.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        ring.close()
 
-# Add handlers
-logger.addHandler(file_handler)
-logger.addHandler(console_handler)
+def run_multiprocess() -> None:
+    """
+    Run ingest and each strategy in separate processes over a shared-memory bar ring
 
-def clear_console():
-    """Clear the console output."""
-    # For Windows
-    if os.name == 'nt':
-        os.system('cls')
-    # For macOS and Linux
-    else:
-        os.system('clear')
+    Enabled with MULTIPROCESS=1; STRATEGIES picks the strategies (comma
+    separated, one process each). A burst of websocket messages then only
+    occupies the ingest process, and strategies evaluate on their own cores.
+    With METRICS_PORT set, ingest serves metrics on that port and strategy
+    i on METRICS_PORT + 1 + i.
+    """
+    load_dotenv()
+    symbol = os.getenv('TICKER', 'DOGE-USD')
+    names = [n.strip() for n in os.getenv('STRATEGIES', ','.join(STRATEGIES)).split(',') if n.strip()]
+    unknown = set(names) - set(STRATEGIES)
+    if unknown:
+        raise ValueError(f"Unknown strategies {sorted(unknown)}, expected some of {list(STRATEGIES)}")
+    state_dir = os.getenv('STATE_DIR', 'state')
+    decisions_dir = os.getenv('DECISIONS_DIR', 'decisions')
+    metrics_port = int(os.getenv('METRICS_PORT', '9108'))
 
-def display_data(data: pd.DataFrame) -> str:
-    """Display real-time trading data and signals with detailed analysis"""
+    ctx = mp.get_context('spawn')
+    stop = ctx.Event()
+    ring = BarRing.create(capacity=int(os.getenv('RING_CAPACITY', str(1 << 16))))
+    processes = [ctx.Process(
+        target=ingest_process, name='ingest',
+        args=(ring.name, symbol, os.getenv('API_KEY'), os.getenv('API_SECRET'), state_dir, metrics_port, stop)
+    )]
+    for i, name in enumerate(names):
+        processes.append(ctx.Process(
+            target=strategy_process, name=f"strategy-{name}",
+            args=(ring.name, name, state_dir, decisions_dir, metrics_port + 1 + i if metrics_port else 0, stop)
+        ))
+    logger.info(f"Multiprocess mode: ingest for {symbol} and strategies {names} over ring {ring.name}")
     try:
-        if data.empty or len(data) < 2:
-            logger.error("Insufficient data to calculate indicators")
-            return "HOLD"
-        
-        # Clear the console before displaying new data
-        clear_console()
-        
-        latest = data.iloc[-1]
-        ma_diff = latest['SMA_short'] - latest['SMA_long']
-        ma_diff_prev = data.iloc[-2]['SMA_short'] - data.iloc[-2]['SMA_long']
-        
-        # Display current time
-        current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        print(f"\n================= Current Time: {current_time} =================")
-        
-        # Determine MA Cross signal
-        ma_signal = "HOLD"
-        if ma_diff > 0 and ma_diff_prev <= 0:
-            ma_signal = "STRONG_BUY"
-        elif ma_diff < 0 and ma_diff_prev >= 0:
-            ma_signal = "STRONG_SELL"
-        elif ma_diff > 0:
-            ma_signal = "BUY"
-        else:
-            ma_signal = "SELL"
-        
-        # Initialize signals
-        signals = []
-        signals.append(("MA Cross", ma_signal))
-        
-        # Additional indicators
-        macd_signal = "HOLD"
-        if latest['MACD'] > latest['Signal_Line']:
-            macd_signal = "BUY"
-        elif latest['MACD'] < latest['Signal_Line']:
-            macd_signal = "SELL"
-        
-        rsi_signal = "HOLD"
-        if latest['RSI'] > 70:
-            rsi_signal = "SELL"
-        elif latest['RSI'] < 30:
-            rsi_signal = "BUY"
-        
-        signals.append(("MACD", macd_signal))
-        signals.append(("RSI", rsi_signal))
-        
-        # Display market data
-        print("\n================= Market Data =================")
-        print(f"Current Price: {latest['close']:.5f}")
-        print(f"Open Price:    {latest['open']:.5f}")
-        print(f"High Price:    {latest['high']:.5f}")
-        print(f"Low Price:     {latest['low']:.5f}")
-        print(f"Volume:        {latest['volume']:.2f}")
-        
-        # Display moving averages
-        print("\n============= Moving Averages =============")
-        print(f"Short MA (20): {latest['SMA_short']:.5f}")
-        print(f"Long MA (50):  {latest['SMA_long']:.5f}")
-        
-        # Display MACD and RSI
-        print("\n============= MACD and RSI =============")
-        print(f"MACD:          {latest['MACD']:.5f}")
-        print(f"Signal Line:   {latest['Signal_Line']:.5f}")
-        print(f"RSI:           {latest['RSI']:.2f}")
-        
-        # Display trading signals
-        print("\n============= Trading Signals =============")
-        for signal_name, signal_value in signals:
-            print(f"{signal_name}: {signal_value}")
-        
-        # Determine overall recommendation
-        buy_signals = sum(1 for _, signal in signals if signal in ["BUY", "STRONG_BUY"])
-        sell_signals = sum(1 for _, signal in signals if signal in ["SELL", "STRONG_SELL"])
-        
-        if buy_signals > sell_signals:
-            recommendation = "BUY"
-        elif sell_signals > buy_signals:
-            recommendation = "SELL"
-        else:
-            recommendation = "HOLD"
-        
-        print("\n============= Overall Recommendation =============")
-        print(f"Recommendation: {recommendation}")
-        
-        return recommendation
-    except Exception as e:
-        logger.error(f"Error generating trading signals: {str(e)}")
-        return "HOLD"
+        for process in processes:
+            process.start()
+        while all(process.is_alive() for process in processes):
+            time.sleep(1)
+        logger.error(f"Process exited unexpectedly: {[p.name for p in processes if not p.is_alive()]}")
+    except KeyboardInterrupt:
+        logger.info("User interrupted the stream")
+    finally:
+        stop.set()
+        for process in processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        ring.close()
+        logger.info("Program completely exited")
 
 def main():
     """Main function to run the trading bot with paper trading"""
+    if os.getenv('MULTIPROCESS', '0') == '1':
+        run_multiprocess()
+        return
     rt_data = None
     paper_trader = None
+    journal = None
+    dashboard = None
+    live_chart = None
+    tick_recorder = None
+    metrics_server = None
+    recorder = None
+    root_levels = {}
     try:
         # Load environment variables
         load_dotenv()
@@ -153,58 +214,123 @@ def main():
         
         # Initialize logging
         logger.info(f"Starting real-time data stream for {symbol}")
+        logger.info(f"Imports took {IMPORT_SECONDS * 1000:.0f} ms")
+        METRICS.set_gauge('startup_import_seconds', IMPORT_SECONDS)
+        
+        # Tick-to-trade latency histograms at http://127.0.0.1:<METRICS_PORT>/metrics (0 disables)
+        metrics_port = int(os.getenv('METRICS_PORT', '9108'))
+        if metrics_port:
+            metrics_server = MetricsServer(port=metrics_port)
+            metrics_server.start()
+        
+        # Restore trading state from the last snapshot and journal, if any
+        journal = StateJournal(os.getenv('STATE_DIR', 'state'))
         
         # Initialize real-time data handler
         rt_data = RealTimeData(
             symbol=symbol,
             api_key=api_key,
-            api_secret=api_secret
+            api_secret=api_secret,
+            history=RealTimeData.history_from_state(journal.state_for('realtime_data'))
         )
+        journal.register('realtime_data', rt_data)
+        
+        # Optional live price chart in its own process (LIVE_CHART=1), fed from the data thread
+        if os.getenv('LIVE_CHART', '0') == '1':
+            live_chart = LiveChart(title=f"{symbol} Live")
+            live_chart.start()
+            rt_data.add_listener(live_chart.update)
+        
+        # Append live ticks to a file for replay.py (RECORD_TICKS=path)
+        if os.getenv('RECORD_TICKS'):
+            tick_recorder = TickRecorder(os.getenv('RECORD_TICKS'))
+            rt_data.add_listener(tick_recorder.update)
         
         logger.info("Initializing data stream...")
         rt_data.start()
         
-        logger.info("Waiting for data stream initialization...")
-        time.sleep(2)
-        
         # Initialize paper trader
         paper_trader = PaperTrader(initial_balance=10000.0)  # Start with 10,000 USDT
+        journal.register('paper_trader', paper_trader)
+        
+        # Strategies share one indicator pipeline; each trades its own paper account
+        # Every evaluation goes to columnar decision segments (see decision_recorder.load_decisions)
+        recorder = DecisionRecorder(os.getenv('DECISIONS_DIR', 'decisions'))
+        runner = StrategyRunner(recorder=recorder)
+        runner.register('majority_vote', majority_vote_strategy, trader=paper_trader)
+        journal.register('paper_trader.signal_score', runner.register('signal_score', signal_score_strategy))
+        if journal.restored:
+            logger.info(f"Restored paper trading state: balance {paper_trader.balance:.2f} USDT, "
+                        f"{len(paper_trader.trades)} trades")
+        
+        # The dashboard owns the screen: only errors reach the console while it runs
+        # (everything still goes to the log file), and any that do force a full repaint
+        setup_logger(console_level=logging.ERROR)
+        root_levels = {h: h.level for h in logging.getLogger().handlers}  # basicConfig output (e.g. RealTimeData)
+        for handler in root_levels:
+            handler.setLevel(max(handler.level, logging.ERROR))
+        dashboard = TerminalDashboard(render_dashboard)
+        dashboard.watch_handlers(console_handlers() + logging.getLogger().handlers)
+        dashboard.start()
         
         logger.info("Starting main loop...")
+        first_decision = True
         while True:
             data = rt_data.data
-            if not data.empty:
-                latest = data.iloc[-1]
-                
-                # Display market data and signals
-                recommendation = display_data(data)
-                
-                # Execute paper trade based on recommendation
-                paper_trader.execute_trade(
-                    signal=recommendation,
-                    price=latest['close'],
-                    timestamp=latest.name
-                )
+            signals = runner.step(data)
+            if signals is not None:
+                if first_decision:
+                    # Warm history means the first decision needs neither a tick nor the REST refresh
+                    first_decision = False
+                    ready = time.perf_counter() - STARTED
+                    logger.info(f"First decision ready {ready * 1000:.0f} ms after start")
+                    METRICS.set_gauge('startup_first_decision_seconds', ready)
+                latest = runner.frame.iloc[-1]
                 
-                # Display paper trading status
+                # Hand the dashboard a snapshot; drawing happens on its own thread
                 metrics = paper_trader.calculate_metrics()
-                print("\nPaper Trading Status:")
-                print(f"Initial Balance:    {paper_trader.initial_balance:.2f} USDT")
-                print(f"Current Balance:    {paper_trader.balance:.2f} USDT")
-                print(f"Position Size:      {paper_trader.position:.4f}")
-                print(f"Position Value:     {paper_trader.get_position_value(latest['close']):.2f} USDT")
-                print(f"Total Value:        {paper_trader.get_total_value(latest['close']):.2f} USDT")
-                print(f"Total Return:       {metrics['return_pct']:.2f}%")
-                print(f"Total Trades:       {metrics['total_trades']}")
-                print(f"Win Rate:           {metrics['win_rate']:.2f}%")
+                dashboard.publish({
+                    'time': datetime.now(),
+                    'latest': latest.to_dict(),
+                    'strategies': runner.report(),
+                    'indicator_us': runner.indicator_us.mean,
+                    'recommendation': signals['majority_vote'],
+                    'account': {
+                        'initial_balance': paper_trader.initial_balance,
+                        'balance': paper_trader.balance,
+                        'position': paper_trader.position,
+                        'position_value': paper_trader.get_position_value(latest['close']),
+                        'total_value': paper_trader.get_total_value(latest['close']),
+                        'return_pct': metrics['return_pct'],
+                        'total_trades': metrics['total_trades'],
+                        'win_rate': metrics['win_rate']
+                    }
+                })
                 
+            journal.maybe_snapshot()
             time.sleep(1)
             
     except KeyboardInterrupt:
         logger.info("User interrupted the stream")
     finally:
+        if dashboard is not None:
+            dashboard.stop()
+            dashboard.unwatch_handlers(console_handlers() + list(root_levels))
+            setup_logger(console_level=logging.INFO)  # The summary below goes to the console again
+            for handler, level in root_levels.items():
+                handler.setLevel(level)
         if rt_data is not None:
             rt_data.stop()
+        if live_chart is not None:
+            live_chart.stop()
+        if tick_recorder is not None:
+            tick_recorder.close()
+        if recorder is not None:
+            recorder.close()
+        if journal is not None:
+            journal.close()
+        if metrics_server is not None:
+            metrics_server.stop()
         
         # Display final trading summary if paper trader exists
         if paper_trader is not None:
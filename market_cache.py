@@ -0,0 +1,216 @@
+# market_cache.py
+
+import asyncio
+import threading
+import time
+import logging
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from crypto_api import CryptoComAPI
+
+logger = logging.getLogger(__name__)
+
+# Per-endpoint TTLs in seconds; tickers go stale far faster than candles
+DEFAULT_TTLS = {
+    'ticker': 1.0,
+    'klines': 5.0
+}
+DEFAULT_MAXSIZE = 256
+
+class TTLCache:
+    def __init__(self, ttl: float, maxsize: int = DEFAULT_MAXSIZE):
+        """LRU-bounded cache whose entries expire after ttl seconds"""
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        """Return (found, value) for a fresh entry, counting the hit or miss"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if time.monotonic() < expires_at:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the least recently used entry when full"""
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+class _FetchCancelled(Exception):
+    """Set on a shared future when the request that owned it was cancelled; waiters retry"""
+
+class _InFlight:
+    """A request being fetched by one caller that others wait on"""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+class _CoalescingCache:
+    """Shared TTL caches and counters for the sync and async front-ends"""
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, maxsize: int = DEFAULT_MAXSIZE):
+        ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.caches = {endpoint: TTLCache(ttl, maxsize) for endpoint, ttl in ttls.items()}
+        self.coalesced = {endpoint: 0 for endpoint in ttls}
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Hit/miss counters per endpoint, for tuning TTLs against rate limits"""
+        stats = {}
+        for endpoint, cache in self.caches.items():
+            requests = cache.hits + cache.misses
+            stats[endpoint] = {
+                'hits': cache.hits,
+                'misses': cache.misses,
+                'coalesced': self.coalesced[endpoint],
+                'fetches': cache.misses - self.coalesced[endpoint],
+                'evictions': cache.evictions,
+                'size': len(cache),
+                'hit_rate': cache.hits / requests if requests else 0.0
+            }
+        return stats
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """Drop cached entries for one endpoint, or all of them"""
+        for name, cache in self.caches.items():
+            if endpoint is None or name == endpoint:
+                cache.clear()
+
+class CachedCryptoComAPI(_CoalescingCache):
+    def __init__(self, api: Optional[CryptoComAPI] = None, ttls: Optional[Dict[str, float]] = None,
+                 maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Thread-safe caching front-end for CryptoComAPI
+
+        Concurrent callers asking for the same instrument while a request is
+        in flight wait for that request instead of issuing their own.
+        Returned data is shared between callers and must be treated as read-only.
+        """
+        super().__init__(ttls, maxsize)
+        self.api = api if api is not None else CryptoComAPI()
+        self._lock = threading.Lock()
+        self._in_flight: Dict[Tuple, _InFlight] = {}
+
+    def _fetch(self, endpoint: str, key: Tuple, loader: Callable[[], Any]) -> Any:
+        cache = self.caches[endpoint]
+        with self._lock:
+            found, value = cache.get(key)
+            if found:
+                return value
+            call = self._in_flight.get(key)
+            owner = call is None
+            if owner:
+                call = self._in_flight[key] = _InFlight()
+            else:
+                self.coalesced[endpoint] += 1
+
+        if not owner:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = loader()
+            with self._lock:
+                cache.set(key, call.value)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+
+    def get_klines(self, symbol: str, timeframe: str = "1m", limit: int = 1000) -> Dict:
+        """Cached CryptoComAPI.get_klines"""
+        key = ('klines', symbol, timeframe, limit)
+        return self._fetch('klines', key, lambda: self.api.get_klines(symbol, timeframe, limit))
+
+    def get_ticker(self, symbol: str) -> Dict:
+        """Cached CryptoComAPI.get_ticker"""
+        key = ('ticker', symbol)
+        return self._fetch('ticker', key, lambda: self.api.get_ticker(symbol))
+
+class AsyncCachedCryptoComAPI(_CoalescingCache):
+    def __init__(self, api, ttls: Optional[Dict[str, float]] = None, maxsize: int = DEFAULT_MAXSIZE):
+        """
+        Caching front-end for AsyncCryptoComAPI
+
+        Duplicate requests issued from the same event loop share one future.
+        If the request that started a fetch is cancelled, the others retry
+        rather than being cancelled with it.
+        """
+        super().__init__(ttls, maxsize)
+        self.api = api
+        self._in_flight: Dict[Tuple, asyncio.Future] = {}
+
+    async def _fetch(self, endpoint: str, key: Tuple, loader: Callable[[], Any]) -> Any:
+        cache = self.caches[endpoint]
+        while True:
+            found, value = cache.get(key)
+            if found:
+                return value
+
+            future = self._in_flight.get(key)
+            if future is None:
+                break
+            self.coalesced[endpoint] += 1
+            try:
+                return await asyncio.shield(future)
+            except _FetchCancelled:
+                # The owner was cancelled, not this caller: look up again (possibly as owner),
+                # uncounting this pass so the call is counted once, by its final outcome
+                cache.misses -= 1
+                self.coalesced[endpoint] -= 1
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await loader()
+            cache.set(key, value)
+            future.set_result(value)
+            return value
+        except BaseException as e:
+            # Cancelling the owner must not cancel the waiters sharing its future
+            future.set_exception(_FetchCancelled() if isinstance(e, asyncio.CancelledError) else e)
+            # Mark retrieved so an unawaited failure doesn't log "exception never retrieved"
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+
+    async def get_klines(self, symbol: str, timeframe: str = "1m", limit: int = 1000) -> Dict:
+        """Cached AsyncCryptoComAPI.get_klines"""
+        key = ('klines', symbol, timeframe, limit)
+        return await self._fetch('klines', key, lambda: self.api.get_klines(symbol, timeframe, limit))
+
+    async def get_ticker(self, symbol: str) -> Dict:
+        """Cached AsyncCryptoComAPI.get_ticker"""
+        key = ('ticker', symbol)
+        return await self._fetch('ticker', key, lambda: self.api.get_ticker(symbol))
+
+    async def get_tickers(self, symbols) -> Dict[str, Dict]:
+        """Fetch tickers for many instruments concurrently through the cache"""
+        symbols = list(symbols)
+        results = await asyncio.gather(*(self.get_ticker(s) for s in symbols), return_exceptions=True)
+        return self.api._collect(symbols, results, "ticker")
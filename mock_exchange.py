@@ -0,0 +1,112 @@
+# mock_exchange.py
+
+import asyncio
+import hmac
+import hashlib
+import random
+import itertools
+import logging
+from typing import Optional
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+class MockExchange:
+    def __init__(self, api_key: str, api_secret: str, price: float = 0.35, latency: float = 0.0,
+                 host: str = '127.0.0.1', port: int = 0):
+        """
+        Local Binance-style exchange for testing the order gateway
+
+        Implements POST /api/v3/order (market orders fill immediately at the
+        current mock price) and GET /api/v3/ticker/price. Requests are
+        checked for the API key header and a valid HMAC-SHA256 signature.
+        The price follows a small random walk on every ticker request.
+
+        Usage:
+            async with MockExchange(key, secret) as exchange:
+                gateway = OrderGateway(key, secret, base_url=exchange.base_url)
+        """
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.price = price
+        self.latency = latency
+        self.host = host
+        self.port = port
+        self.orders = []
+        self._order_ids = itertools.count(1)
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.stop()
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_post('/api/v3/order', self._order)
+        app.router.add_get('/api/v3/ticker/price', self._ticker)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        # Resolve the OS-assigned port when started on port 0
+        self.port = self._runner.addresses[0][1]
+        logger.info(f"Mock exchange listening on {self.base_url}")
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def _verify(self, request: web.Request) -> Optional[web.Response]:
+        if request.headers.get('X-MBX-APIKEY') != self.api_key:
+            return web.json_response({'code': -2015, 'msg': 'Invalid API-key'}, status=401)
+        query_string = request.query_string
+        payload, _, signature = query_string.rpartition('&signature=')
+        expected = hmac.new(self.api_secret.encode('utf-8'), payload.encode('utf-8'), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(signature, expected):
+            return web.json_response({'code': -1022, 'msg': 'Signature for this request is not valid.'}, status=400)
+        return None
+
+    async def _order(self, request: web.Request) -> web.Response:
+        error = self._verify(request)
+        if error is not None:
+            return error
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        params = request.query
+        quantity = float(params['quantity'])
+        order = {
+            'symbol': params['symbol'],
+            'orderId': next(self._order_ids),
+            'transactTime': int(asyncio.get_running_loop().time() * 1000),
+            'side': params['side'],
+            'type': params['type'],
+            'origQty': str(quantity),
+            'executedQty': str(quantity),
+            'cummulativeQuoteQty': str(quantity * self.price),
+            'status': 'FILLED'
+        }
+        self.orders.append(order)
+        return web.json_response(order)
+
+    async def _ticker(self, request: web.Request) -> web.Response:
+        self.price *= 1 + random.gauss(0, 0.001)
+        return web.json_response({'symbol': request.query.get('symbol'), 'price': f"{self.price:.8f}"})
+
+async def _serve_forever(port: int) -> None:
+    async with MockExchange('test-key', 'test-secret', port=port) as exchange:
+        print(f"Mock exchange running at {exchange.base_url} (key=test-key, secret=test-secret)")
+        await asyncio.Event().wait()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_serve_forever(8765))
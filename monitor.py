@@ -1,16 +1,86 @@
+import time
+import logging
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+class AlertRule:
+    def __init__(self, name, metric, threshold, above=True, clear=None, cooldown=60.0, message=None):
+        """
+        Declarative threshold alert
+
+        Fires once when `metric` crosses `threshold` (upwards if above, else
+        downwards), then stays quiet until the value moves back past `clear`
+        (hysteresis, defaults to the threshold) and crosses again. A firing
+        within `cooldown` seconds of the previous one is suppressed.
+        """
+        self.name = name
+        self.metric = metric
+        self.threshold = threshold
+        self.above = above
+        self.clear = threshold if clear is None else clear
+        self.cooldown = cooldown
+        self.message = message or f"{name}: {metric} {'>=' if above else '<='} {threshold}"
+        self.active = False
+        self.last_fired = float('-inf')
+
+    def evaluate(self, value, now):
+        """Update state with a new value; True when the alert should fire"""
+        if self.active:
+            if (value < self.clear) if self.above else (value > self.clear):
+                self.active = False
+            return False
+        if (value >= self.threshold) if self.above else (value <= self.threshold):
+            self.active = True
+            if now - self.last_fired >= self.cooldown:
+                self.last_fired = now
+                return True
+        return False
+
+def default_rules():
+    return [
+        AlertRule('positions', 'active_positions', 3, clear=2,
+                  message="Position Warning: Near maximum limit"),
+        AlertRule('balance', 'balance_ratio', 0.9, above=False, clear=0.92,
+                  message="Balance Warning: Near stop loss level")
+    ]
+
 class TradingMonitor:
-    def __init__(self):
+    def __init__(self, initial_balance=None, rules=None, max_alerts=100):
+        """
+        Metrics and alerts for a trading loop
+
+        Alerts go into a ring of the last `max_alerts` entries. Rules whose
+        metric is missing (e.g. balance_ratio without an initial balance) are
+        skipped.
+        """
         self.metrics = {}
-        self.alerts = []
-        
+        self.alerts = deque(maxlen=max_alerts)
+        self.initial_balance = initial_balance
+        self.rules = default_rules() if rules is None else list(rules)
+
+    def add_rule(self, rule):
+        self.rules.append(rule)
+
     def update_metrics(self, current_price, positions, balance):
         self.metrics['current_price'] = current_price
         self.metrics['active_positions'] = len(positions)
         self.metrics['account_balance'] = balance
+        if self.initial_balance:
+            self.metrics['balance_ratio'] = balance / self.initial_balance
         self.check_alerts()
-        
+
     def check_alerts(self):
-        if self.metrics['active_positions'] >= 3:
-            self.alerts.append("Position Warning: Near maximum limit")
-        if self.metrics['account_balance'] < self.initial_balance * 0.9:
-            self.alerts.append("Balance Warning: Near stop loss level")
\ No newline at end of file
+        now = time.monotonic()
+        for rule in self.rules:
+            value = self.metrics.get(rule.metric)
+            if value is not None and rule.evaluate(value, now):
+                alert = {'time': datetime.now(), 'rule': rule.name, 'value': value, 'message': rule.message}
+                self.alerts.append(alert)
+                logger.warning(f"{rule.message} ({rule.metric}={value})")
+
+    def recent_alerts(self, n=None):
+        """Newest-last list of up to n recent alerts"""
+        alerts = list(self.alerts)
+        return alerts if n is None else alerts[-n:]
@@ -0,0 +1,381 @@
+# order_book.py
+
+import json
+import time
+import bisect
+import itertools
+import threading
+import logging
+from typing import Dict, Iterable, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+BUY = 'BUY'
+SELL = 'SELL'
+
+class BookSide:
+    def __init__(self, descending: bool):
+        """
+        One side of an L2 book: a sorted price list plus a price -> size map
+
+        Prices are kept ascending; bids read the best level from the end,
+        asks from the front. Updates are a binary search plus a list
+        insert/delete, which stays cheap at exchange depths of a few
+        hundred levels.
+        """
+        self.descending = descending
+        self.prices: List[float] = []
+        self.sizes: Dict[float, float] = {}
+
+    def clear(self) -> None:
+        self.prices.clear()
+        self.sizes.clear()
+
+    def set(self, price: float, size: float) -> None:
+        """Set a level's total size; size 0 removes the level"""
+        if size <= 0:
+            if self.sizes.pop(price, None) is not None:
+                i = bisect.bisect_left(self.prices, price)
+                del self.prices[i]
+            return
+        if price not in self.sizes:
+            bisect.insort(self.prices, price)
+        self.sizes[price] = size
+
+    def best(self) -> Optional[float]:
+        if not self.prices:
+            return None
+        return self.prices[-1] if self.descending else self.prices[0]
+
+    def levels(self) -> Iterator:
+        """Iterate (price, size) from the best level outwards"""
+        prices = reversed(self.prices) if self.descending else self.prices
+        for price in prices:
+            yield price, self.sizes[price]
+
+    def size_at(self, price: float) -> float:
+        return self.sizes.get(price, 0.0)
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+class OrderBook:
+    def __init__(self, symbol: str):
+        """Local L2 order book maintained from snapshots and deltas"""
+        self.symbol = symbol
+        self.bids = BookSide(descending=True)
+        self.asks = BookSide(descending=False)
+        self.update_id: Optional[int] = None
+        self.timestamp: Optional[int] = None
+        self.in_sync = False
+
+    def apply_snapshot(self, bids: Iterable, asks: Iterable, update_id: Optional[int] = None,
+                       timestamp: Optional[int] = None) -> None:
+        """Replace the book with a full snapshot of [price, size, ...] levels"""
+        self.bids.clear()
+        self.asks.clear()
+        for level in bids:
+            self.bids.set(float(level[0]), float(level[1]))
+        for level in asks:
+            self.asks.set(float(level[0]), float(level[1]))
+        self.update_id = update_id
+        self.timestamp = timestamp
+        self.in_sync = True
+
+    def apply_delta(self, bids: Iterable, asks: Iterable, update_id: Optional[int] = None,
+                    prev_update_id: Optional[int] = None, timestamp: Optional[int] = None) -> bool:
+        """
+        Apply an incremental update; size 0 deletes a level
+
+        Returns False (and marks the book out of sync) when the delta does not
+        follow the last applied update, so the caller can resubscribe.
+        """
+        if prev_update_id is not None and self.update_id is not None and prev_update_id != self.update_id:
+            logger.warning(f"{self.symbol} book sequence gap: expected {self.update_id}, got {prev_update_id}")
+            self.in_sync = False
+            return False
+        for level in bids:
+            self.bids.set(float(level[0]), float(level[1]))
+        for level in asks:
+            self.asks.set(float(level[0]), float(level[1]))
+        if update_id is not None:
+            self.update_id = update_id
+        self.timestamp = timestamp
+        return True
+
+    def apply_message(self, message: Dict) -> bool:
+        """Apply a Crypto.com book / book.update channel message (as decoded JSON)"""
+        result = message.get('result', message)
+        channel = result.get('channel')
+        for entry in result.get('data', []):
+            if channel == 'book.update':
+                update = entry.get('update', {})
+                if not self.apply_delta(update.get('bids', []), update.get('asks', []),
+                                        entry.get('u'), entry.get('pu'), entry.get('t')):
+                    return False
+            else:
+                self.apply_snapshot(entry.get('bids', []), entry.get('asks', []), entry.get('u'), entry.get('t'))
+        return True
+
+    def best_bid(self) -> Optional[float]:
+        return self.bids.best()
+
+    def best_ask(self) -> Optional[float]:
+        return self.asks.best()
+
+    def mid(self) -> Optional[float]:
+        bid, ask = self.best_bid(), self.best_ask()
+        if bid is None or ask is None:
+            return None
+        return (bid + ask) / 2
+
+class Order:
+    def __init__(self, order_id: int, symbol: str, side: str, quantity: float,
+                 price: Optional[float] = None, timestamp: Optional[float] = None):
+        """A simulated order; price None means market"""
+        self.id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.filled = 0.0
+        self.notional = 0.0
+        self.queue_ahead = 0.0
+        self.status = 'NEW'
+        self.timestamp = timestamp
+        self.fills: List[tuple] = []
+
+    @property
+    def remaining(self) -> float:
+        return self.quantity - self.filled
+
+    @property
+    def average_price(self) -> float:
+        return self.notional / self.filled if self.filled else 0.0
+
+    def fill(self, price: float, quantity: float) -> None:
+        self.filled += quantity
+        self.notional += price * quantity
+        self.fills.append((price, quantity))
+        self.status = 'FILLED' if self.remaining <= 1e-12 else 'PARTIALLY_FILLED'
+
+class BookSimulator:
+    def __init__(self):
+        """
+        Paper execution engine against local L2 books
+
+        Market orders walk the opposite side level by level and are
+        immediate-or-cancel, so thin books produce slippage and partial
+        fills. Limit orders that cross fill as takers; the rest rest with an
+        estimated queue position (the size already at their price) that is
+        worked down by trades and by size leaving the level. A resting order
+        also fills when the opposite side moves to or through its price.
+        """
+        self.books: Dict[str, OrderBook] = {}
+        self.open_orders: Dict[str, Dict[int, Order]] = {}
+        self._order_ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    def book(self, symbol: str) -> OrderBook:
+        if symbol not in self.books:
+            self.books[symbol] = OrderBook(symbol)
+            self.open_orders[symbol] = {}
+        return self.books[symbol]
+
+    def on_book_message(self, symbol: str, message: Dict) -> bool:
+        """Feed a raw book channel message and match resting orders against the new book"""
+        with self._lock:
+            book = self.book(symbol)
+            before = self._resting_level_sizes(symbol)
+            ok = book.apply_message(message)
+            self._advance_queues(symbol, before)
+            self._match_resting(symbol)
+            return ok
+
+    def on_trade(self, symbol: str, price: float, quantity: float) -> None:
+        """Feed a public trade; trades at a resting order's price work down its queue first"""
+        with self._lock:
+            for order in list(self.open_orders.get(symbol, {}).values()):
+                if order.price != price:
+                    continue
+                consumed = min(order.queue_ahead, quantity)
+                order.queue_ahead -= consumed
+                leftover = quantity - consumed
+                if leftover > 0 and order.queue_ahead <= 0:
+                    self._fill(order, price, min(leftover, order.remaining))
+
+    def submit_market(self, symbol: str, side: str, quantity: float) -> Order:
+        """Fill a market order against the book; unfilled quantity is cancelled"""
+        with self._lock:
+            order = Order(next(self._order_ids), symbol, side, quantity, timestamp=time.time())
+            self._take(order, limit=None)
+            order.status = 'FILLED' if order.remaining <= 1e-12 else ('PARTIALLY_FILLED' if order.filled else 'CANCELED')
+            return order
+
+    def submit_limit(self, symbol: str, side: str, quantity: float, price: float) -> Order:
+        """Submit a limit order: cross what is marketable, rest the remainder"""
+        with self._lock:
+            order = Order(next(self._order_ids), symbol, side, quantity, price, timestamp=time.time())
+            self._take(order, limit=price)
+            if order.remaining > 1e-12:
+                book = self.book(symbol)
+                own_side = book.bids if side == BUY else book.asks
+                order.queue_ahead = own_side.size_at(price)
+                self.open_orders[symbol][order.id] = order
+            return order
+
+    def cancel(self, symbol: str, order_id: int) -> Optional[Order]:
+        with self._lock:
+            order = self.open_orders.get(symbol, {}).pop(order_id, None)
+            if order is not None:
+                order.status = 'CANCELED'
+            return order
+
+    def _take(self, order: Order, limit: Optional[float]) -> None:
+        """
+        Consume opposite-side liquidity up to an optional limit price
+
+        Taken size is removed from the book, so later orders walk deeper
+        levels until the next snapshot or delta restates them.
+        """
+        book = self.book(order.symbol)
+        opposite = book.asks if order.side == BUY else book.bids
+        consumed = []
+        for price, size in opposite.levels():
+            if order.remaining <= 1e-12:
+                break
+            if limit is not None and ((order.side == BUY and price > limit) or (order.side == SELL and price < limit)):
+                break
+            taken = min(size, order.remaining)
+            order.fill(price, taken)
+            consumed.append((price, size - taken))
+        # Applied after the walk: levels() iterates the live price list
+        for price, left in consumed:
+            opposite.set(price, left if left > 1e-12 else 0.0)
+
+    def _fill(self, order: Order, price: float, quantity: float) -> None:
+        order.fill(price, quantity)
+        if order.remaining <= 1e-12:
+            self.open_orders[order.symbol].pop(order.id, None)
+
+    def _resting_level_sizes(self, symbol: str) -> Dict[int, float]:
+        book = self.book(symbol)
+        sizes = {}
+        for order in self.open_orders[symbol].values():
+            own_side = book.bids if order.side == BUY else book.asks
+            sizes[order.id] = own_side.size_at(order.price)
+        return sizes
+
+    def _advance_queues(self, symbol: str, before: Dict[int, float]) -> None:
+        """Size that left a resting order's level is assumed to have been ahead of it"""
+        book = self.book(symbol)
+        for order in self.open_orders[symbol].values():
+            own_side = book.bids if order.side == BUY else book.asks
+            removed = before.get(order.id, 0.0) - own_side.size_at(order.price)
+            if removed > 0:
+                order.queue_ahead = max(0.0, order.queue_ahead - removed)
+
+    def _match_resting(self, symbol: str) -> None:
+        """Fill resting orders whose price the opposite side has moved through"""
+        orders = self.open_orders[symbol]
+        if not orders:
+            return
+        book = self.book(symbol)
+        best_bid, best_ask = book.best_bid(), book.best_ask()
+        for order in list(orders.values()):
+            if order.side == BUY and best_ask is not None and best_ask <= order.price:
+                self._fill(order, order.price, order.remaining)
+            elif order.side == SELL and best_bid is not None and best_bid >= order.price:
+                self._fill(order, order.price, order.remaining)
+
+def iter_recorded_feed(path: str) -> Iterator[Dict]:
+    """Yield decoded book messages from a recorded JSON-lines feed"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+class BookStream:
+    def __init__(self, simulator: BookSimulator, symbol: str, depth: int = 50,
+                 record_path: Optional[str] = None):
+        """Stream a Crypto.com book channel into a BookSimulator, optionally recording it"""
+        self.simulator = simulator
+        self.symbol = symbol
+        self.depth = depth
+        self.record_path = record_path
+        self.ws = None
+        self.ws_thread = None
+        self.running = False
+        self._record_file = None
+
+    def start(self) -> None:
+        self.running = True
+        if self.record_path:
+            self._record_file = open(self.record_path, 'a', encoding='utf-8')
+        self.ws_thread = threading.Thread(target=self._run_websocket)
+        self.ws_thread.daemon = True
+        self.ws_thread.start()
+
+    def stop(self) -> None:
+        self.running = False
+        if self.ws:
+            self.ws.close()
+        if self.ws_thread and self.ws_thread.is_alive():
+            self.ws_thread.join(timeout=1)
+        if self._record_file:
+            self._record_file.close()
+            self._record_file = None
+
+    def _run_websocket(self) -> None:
+        import websocket
+        from crypto_api import format_symbol
+
+        instrument = format_symbol(self.symbol)
+
+        def on_message(ws, message):
+            try:
+                data = json.loads(message)
+                if data.get('method') == 'public/heartbeat':
+                    ws.send(json.dumps({"id": data.get('id'), "method": "public/respond-heartbeat"}))
+                    return
+                if 'result' not in data:
+                    return
+                if self._record_file:
+                    self._record_file.write(message + '\n')
+                if not self.simulator.on_book_message(self.symbol, data):
+                    # Sequence gap: resubscribe for a fresh snapshot
+                    ws.send(json.dumps(self._subscription('unsubscribe', instrument)))
+                    ws.send(json.dumps(self._subscription('subscribe', instrument)))
+            except Exception as e:
+                logger.error(f"Error processing book message: {str(e)}")
+
+        def on_open(ws):
+            logger.info(f"Book stream opened for {instrument}")
+            ws.send(json.dumps(self._subscription('subscribe', instrument)))
+
+        def on_close(ws, close_status_code, close_msg):
+            logger.info("Book stream closed")
+
+        while self.running:
+            self.ws = websocket.WebSocketApp(
+                "wss://stream.crypto.com/exchange/v1/market",
+                on_message=on_message,
+                on_open=on_open,
+                on_close=on_close,
+                on_error=lambda ws, error: logger.error(f"Book stream error: {str(error)}")
+            )
+            self.ws.run_forever()
+            if self.running:
+                logger.info("Attempting to reconnect book stream...")
+                time.sleep(5)
+
+    def _subscription(self, method: str, instrument: str) -> Dict:
+        return {
+            "id": 1,
+            "method": method,
+            "params": {
+                "channels": [f"book.{instrument}.{self.depth}"],
+                "book_subscription_type": "SNAPSHOT_AND_UPDATE"
+            }
+        }
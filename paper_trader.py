@@ -1,19 +1,58 @@
 import pandas as pd
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
+from clock import SYSTEM_CLOCK
+from trade_stats import TradeLog, RunningStats
+from logger import RateLimitedLogger
+from state_journal import parse_timestamp
 
 logger = logging.getLogger('TradingLogger')
+hot_logger = RateLimitedLogger(logger)  # Per-tick debug output, sampled
+
+TRADE_SCHEMA = {
+    "type": "U4",
+    "price": "f8",
+    "amount": "f8",
+    "cost": "f8",
+    "timestamp": "datetime64[ns]",
+    "profit": "f8",
+    "exit_price": "f8",
+    "exit_time": "datetime64[ns]"
+}
 
 class PaperTrader:
-    def __init__(self, initial_balance: float = 10000.0):
-        """Initialize paper trading account"""
+    def __init__(self, initial_balance: float = 10000.0, execution=None, symbol: str = None,
+                 metrics_window: int = 50, clock=None):
+        """
+        Initialize paper trading account
+        
+        Args:
+            initial_balance: Starting balance in USDT
+            execution: Optional order_book.BookSimulator; when set, orders are
+                filled against its local L2 book (depth, slippage, partial fills)
+                instead of entirely at the signal price
+            symbol: Symbol to trade on the execution engine's book
+            metrics_window: Number of closed trades in the rolling Sharpe/Sortino window
+            clock: Time source for trades executed without a timestamp
+                (clock.SimulatedClock in replays); defaults to the system clock
+        """
         self.initial_balance = initial_balance
+        self.execution = execution
+        self.symbol = symbol
         self.balance = initial_balance
         self.position = 0.0
-        self.trades: List[Dict] = []
+        self.position_cost = 0.0  # Entry cost of the part of the position still open
+        self.trades = TradeLog(TRADE_SCHEMA)
         self.current_price = 0.0
         self.last_action = "NONE"
+        self.journal = None  # Set by StateJournal.register
+        self.clock = clock or SYSTEM_CLOCK
+        
+        # Running accumulators so metric queries are O(1)
+        self.winning_trades = 0
+        self.total_profit = 0.0
+        self.trade_returns = RunningStats(window=metrics_window)  # % return per closed trade
         
     def calculate_metrics(self) -> Dict:
         """Calculate trading performance metrics"""
@@ -23,62 +62,150 @@ class PaperTrader:
                 "total_trades": 0,
                 "win_rate": 0.0,
                 "profit_loss": 0.0,
-                "return_pct": 0.0
+                "return_pct": 0.0,
+                "avg_return": 0.0,
+                "max_profit": 0.0,
+                "max_loss": 0.0,
+                "sharpe": 0.0,
+                "sortino": 0.0
             }
             
-        winning_trades = sum(1 for trade in self.trades if trade['profit'] > 0)
-        total_profit = sum(trade['profit'] for trade in self.trades)
-        
+        stats = self.trade_returns
         return {
             "total_trades": total_trades,
-            "win_rate": (winning_trades / total_trades) * 100,
-            "profit_loss": total_profit,
-            "return_pct": (total_profit / self.initial_balance) * 100
+            "win_rate": (self.winning_trades / total_trades) * 100,
+            "profit_loss": self.total_profit,
+            "return_pct": (self.total_profit / self.initial_balance) * 100,
+            "avg_return": stats.mean,
+            "max_profit": stats.max if stats.max is not None else 0.0,
+            "max_loss": stats.min if stats.min is not None else 0.0,
+            "sharpe": stats.sharpe(),
+            "sortino": stats.sortino()
         }
         
-    def execute_trade(self, signal: str, price: float, timestamp: datetime) -> None:
-        """Execute a paper trade based on signal"""
-        logger.debug(f"Evaluating trade signal: {signal} at price {price}")
+    def execute_trade(self, signal: str, price: float, timestamp: Optional[datetime] = None) -> Optional[Dict]:
+        """Execute a paper trade based on signal; returns the fill (side, price, amount) or None"""
+        if timestamp is None:
+            timestamp = self.clock.now()
+        hot_logger.debug("Evaluating trade signal: %s at price %s", signal, price)
         
         if signal == self.last_action:
-            logger.debug("Signal is the same as last action, no trade executed.")
-            return
+            hot_logger.debug("Signal is the same as last action, no trade executed.")
+            return None
             
         if signal in ["STRONG BUY", "BUY"] and self.position == 0:
             # Calculate position size (use 95% of balance to account for fees)
             amount = (self.balance * 0.95) / price
             cost = amount * price
             
-            self.position = amount
-            self.balance -= cost
-            self.last_action = signal
+            if self.execution is not None:
+                order = self.execution.submit_market(self.symbol, "BUY", amount)
+                if order.filled == 0:
+                    logger.info("PAPER TRADE: BUY not filled, no liquidity in book")
+                    return None
+                amount, cost, price = order.filled, order.notional, order.average_price
             
-            self.trades.append({
-                "type": "BUY",
-                "price": price,
-                "amount": amount,
-                "cost": cost,
-                "timestamp": timestamp,
-                "profit": 0
-            })
+            self._apply_buy(signal, price, amount, cost, timestamp)
+            if self.journal is not None:
+                self.journal.record("buy", {"signal": signal, "price": price, "amount": amount,
+                                            "cost": cost, "timestamp": timestamp})
             
             logger.info(f"PAPER TRADE: BUY {amount:.4f} units at {price:.4f}")
+            return {"side": "BUY", "price": price, "amount": amount}
             
         elif signal in ["STRONG SELL", "SELL"] and self.position > 0:
-            # Close position
+            sold = self.position
             revenue = self.position * price
-            profit = revenue - self.trades[-1]["cost"]
-            self.balance += revenue
             
-            self.trades[-1]["exit_price"] = price
-            self.trades[-1]["exit_time"] = timestamp
-            self.trades[-1]["profit"] = profit
+            if self.execution is not None:
+                order = self.execution.submit_market(self.symbol, "SELL", self.position)
+                if order.filled == 0:
+                    logger.info("PAPER TRADE: SELL not filled, no liquidity in book")
+                    return None
+                sold, revenue, price = order.filled, order.notional, order.average_price
+            
+            profit = self._apply_sell(signal, price, sold, revenue, timestamp)
+            if self.journal is not None:
+                self.journal.record("sell", {"signal": signal, "price": price, "sold": sold,
+                                             "revenue": revenue, "timestamp": timestamp})
             
-            logger.info(f"PAPER TRADE: SELL {self.position:.4f} units at {price:.4f}")
+            logger.info(f"PAPER TRADE: SELL {sold:.4f} units at {price:.4f}")
             logger.info(f"PAPER TRADE: Profit/Loss: {profit:.2f} USDT")
+            return {"side": "SELL", "price": price, "amount": sold}
+        
+        return None
             
+    def _apply_buy(self, signal: str, price: float, amount: float, cost: float, timestamp) -> None:
+        self.position = amount
+        self.position_cost = cost
+        self.balance -= cost
+        self.last_action = signal
+        
+        self.trades.append({
+            "type": "BUY",
+            "price": price,
+            "amount": amount,
+            "cost": cost,
+            "timestamp": timestamp,
+            "profit": 0
+        })
+        
+    def _apply_sell(self, signal: str, price: float, sold: float, revenue: float, timestamp) -> float:
+        # Close (part of) the position against its share of the entry cost
+        cost = self.position_cost * (sold / self.position)
+        profit = revenue - cost
+        self.balance += revenue
+        self.position_cost -= cost
+        
+        trade = self.trades[-1]
+        trade_profit = trade["profit"] + profit
+        self.trades.update(-1, exit_price=price, exit_time=timestamp, profit=trade_profit)
+        self.total_profit += profit
+        self.winning_trades += (trade_profit > 0) - (trade["profit"] > 0)
+        
+        self.position -= sold
+        if self.position <= 1e-12:
+            # Fully closed; a partial fill leaves last_action unchanged so the next SELL retries
             self.position = 0
             self.last_action = signal
+            self.trade_returns.add(trade_profit / trade["cost"] * 100)
+        return profit
+        
+    def get_state(self) -> Dict:
+        """Serializable account state for state_journal snapshots"""
+        return {
+            "balance": self.balance,
+            "position": self.position,
+            "position_cost": self.position_cost,
+            "last_action": self.last_action,
+            "trades": list(self.trades)
+        }
+        
+    def load_state(self, state: Dict) -> None:
+        """Restore from get_state(); running metrics are rebuilt from the trade log"""
+        self.balance = state["balance"]
+        self.position = state["position"]
+        self.position_cost = state["position_cost"]
+        self.last_action = state["last_action"]
+        self.trades = TradeLog(TRADE_SCHEMA, capacity=max(256, len(state["trades"])))
+        self.winning_trades = 0
+        self.total_profit = 0.0
+        self.trade_returns = RunningStats(window=self.trade_returns.window)
+        for i, trade in enumerate(state["trades"]):
+            self.trades.append(trade)
+            self.total_profit += trade["profit"]
+            self.winning_trades += trade["profit"] > 0
+            still_open = i == len(state["trades"]) - 1 and self.position > 0
+            if trade["exit_time"] is not None and not still_open:
+                self.trade_returns.add(trade["profit"] / trade["cost"] * 100)
+        
+    def apply_event(self, event: str, data: Dict) -> None:
+        """Replay a journaled buy/sell"""
+        timestamp = parse_timestamp(data["timestamp"])
+        if event == "buy":
+            self._apply_buy(data["signal"], data["price"], data["amount"], data["cost"], timestamp)
+        elif event == "sell":
+            self._apply_sell(data["signal"], data["price"], data["sold"], data["revenue"], timestamp)
             
     def get_position_value(self, current_price: float) -> float:
         """Calculate current position value"""
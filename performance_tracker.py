@@ -1,14 +1,29 @@
 import pandas as pd
 from datetime import datetime
+from trade_stats import TradeLog, RunningStats
+
+TRADE_SCHEMA = {
+    'entry_time': 'datetime64[ns]',
+    'exit_time': 'datetime64[ns]',
+    'entry_price': 'f8',
+    'exit_price': 'f8',
+    'position_size': 'f8',
+    'profit_loss': 'f8',
+    'return_percent': 'f8'
+}
 
 class PerformanceTracker:
-    def __init__(self):
-        self.trades = []
+    def __init__(self, window=50):
+        self.trades = TradeLog(TRADE_SCHEMA)
         self.current_balance = 0
         self.initial_balance = 0
-    
+        # Running accumulators so get_statistics is O(1)
+        self.profit_loss = RunningStats(window=window)
+        self.returns = RunningStats(window=window)
+
     def add_trade(self, entry_price, exit_price, entry_time, exit_time, position_size):
         profit_loss = (exit_price - entry_price) * position_size
+        return_percent = (exit_price/entry_price - 1) * 100
         self.trades.append({
             'entry_time': entry_time,
             'exit_time': exit_time,
@@ -16,21 +31,28 @@ class PerformanceTracker:
             'exit_price': exit_price,
             'position_size': position_size,
             'profit_loss': profit_loss,
-            'return_percent': (exit_price/entry_price - 1) * 100
+            'return_percent': return_percent
         })
-    
+        self.profit_loss.add(profit_loss)
+        self.returns.add(return_percent)
+
     def get_statistics(self):
-        if not self.trades:
+        if not len(self.trades):
             return "No trades recorded"
-            
-        df = pd.DataFrame(self.trades)
+
         return {
-            'Total Trades': len(df),
-            'Profitable Trades': len(df[df.profit_loss > 0]),
-            'Loss Trades': len(df[df.profit_loss < 0]),
-            'Win Rate': len(df[df.profit_loss > 0]) / len(df) * 100,
-            'Average Return': df.return_percent.mean(),
-            'Max Profit': df.return_percent.max(),
-            'Max Loss': df.return_percent.min(),
-            'Total Profit': df.profit_loss.sum()
-        } 
\ No newline at end of file
+            'Total Trades': self.profit_loss.count,
+            'Profitable Trades': self.profit_loss.wins,
+            'Loss Trades': self.profit_loss.losses,
+            'Win Rate': self.profit_loss.wins / self.profit_loss.count * 100,
+            'Average Return': self.returns.mean,
+            'Max Profit': self.returns.max,
+            'Max Loss': self.returns.min,
+            'Total Profit': self.profit_loss.total,
+            'Rolling Sharpe': self.returns.sharpe(),
+            'Rolling Sortino': self.returns.sortino()
+        }
+
+    def to_frame(self):
+        """All recorded trades as a DataFrame"""
+        return self.trades.to_frame()
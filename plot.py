@@ -1,16 +1,19 @@
-import matplotlib.pyplot as plt
 import pandas as pd
+from downsample import new_figure, finish_figure, plot_downsampled
 
-def plot_results(data: pd.DataFrame):
+def plot_results(data: pd.DataFrame, path: str = None, method: str = 'lttb'):
     """Plot trading results
     
     Args:
         data (DataFrame): DataFrame containing prices, moving averages and signals
+        path (str): Save the chart to this file (headless) instead of showing it
+        method (str): Downsampling to the chart's pixel width: 'lttb', 'minmax' or 'none'
     """
-    plt.figure(figsize=(12, 6))
-    plt.plot(data[('Close', data.columns.get_level_values(1)[0])], label='Price')
-    plt.plot(data[('Short_MA', '')], label='Short MA')
-    plt.plot(data[('Long_MA', '')], label='Long MA')
-    plt.title('Trading Strategy Backtest Results')
-    plt.legend()
-    plt.show() 
\ No newline at end of file
+    fig = new_figure(path, figsize=(12, 6))
+    ax = fig.add_subplot()
+    plot_downsampled(ax, data[('Close', data.columns.get_level_values(1)[0])], method, label='Price')
+    plot_downsampled(ax, data[('Short_MA', '')], method, label='Short MA')
+    plot_downsampled(ax, data[('Long_MA', '')], method, label='Long MA')
+    ax.set_title('Trading Strategy Backtest Results')
+    ax.legend()
+    finish_figure(fig, path)
@@ -1,29 +1,32 @@
 # plotter.py
 
-import matplotlib.pyplot as plt
 import pandas as pd
+from downsample import new_figure, finish_figure, plot_downsampled
 
-def plot_results(data: pd.DataFrame):
+def plot_results(data: pd.DataFrame, path: str = None, method: str = 'lttb'):
     """
     绘制策略的累计收益曲线，与市场的累计收益进行比较。
 
     参数:
     - data: pd.DataFrame, 包含市场和策略累计收益的 DataFrame
+    - path: str, 指定时保存为图片文件（无界面渲染），否则弹出窗口显示
+    - method: str, 按图表像素宽度降采样的方式: 'lttb'、'minmax' 或 'none'
     """
-    plt.figure(figsize=(12, 6))
+    fig = new_figure(path, figsize=(12, 6))
+    ax = fig.add_subplot()
 
     # 绘制市场累计收益曲线
-    plt.plot(data['Market_Cumulative'], label='Market Cumulative Return', linestyle='-', linewidth=1.5)
+    plot_downsampled(ax, data['Market_Cumulative'], method, label='Market Cumulative Return', linestyle='-', linewidth=1.5)
 
     # 绘制策略累计收益曲线
-    plt.plot(data['Strategy_Cumulative'], label='Strategy Cumulative Return', linestyle='--', linewidth=1.5)
+    plot_downsampled(ax, data['Strategy_Cumulative'], method, label='Strategy Cumulative Return', linestyle='--', linewidth=1.5)
 
     # 添加标题和标签
-    plt.title('Cumulative Returns Comparison')
-    plt.xlabel('Date')
-    plt.ylabel('Cumulative Return')
-    plt.legend()
-    plt.grid(True)
+    ax.set_title('Cumulative Returns Comparison')
+    ax.set_xlabel('Date')
+    ax.set_ylabel('Cumulative Return')
+    ax.legend()
+    ax.grid(True)
 
-    # 显示图表
-    plt.show()
\ No newline at end of file
+    # 保存或显示图表
+    finish_figure(fig, path)
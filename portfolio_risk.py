@@ -0,0 +1,139 @@
+# portfolio_risk.py
+
+import logging
+from statistics import NormalDist
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class PortfolioRisk:
+    def __init__(self, symbols: Iterable[str] = (), decay: float = 0.94, confidence: float = 0.99,
+                 history: int = 500, min_observations: int = 20):
+        """
+        Cross-asset risk model for the current book of positions
+
+        Keeps an exponentially weighted (RiskMetrics-style, zero-mean) covariance
+        matrix of per-symbol simple returns, updated in place once per bar, plus
+        a ring buffer of recent return vectors for historical simulation.
+
+        Args:
+            symbols: Symbols to track up front (more can be added later)
+            decay: EWMA decay factor (lambda)
+            confidence: VaR/CVaR confidence level, e.g. 0.99
+            history: Number of return vectors kept for historical VaR
+            min_observations: Bars required before estimates are considered ready
+        """
+        self.decay = decay
+        self.confidence = confidence
+        self.history = history
+        self.min_observations = min_observations
+        self.z = NormalDist().inv_cdf(confidence)
+        # E[Z | Z > z] scaling for normal expected shortfall
+        self.es_factor = NormalDist().pdf(self.z) / (1 - confidence)
+
+        self.symbols = []
+        self._index: Dict[str, int] = {}
+        self.cov = np.zeros((0, 0))
+        self.last_prices = np.zeros(0)
+        self._returns = np.zeros((history, 0))
+        self._cursor = 0
+        self.observations = 0
+        for symbol in symbols:
+            self.add_symbol(symbol)
+
+    @property
+    def ready(self) -> bool:
+        return self.observations >= self.min_observations
+
+    def add_symbol(self, symbol: str) -> int:
+        """Start tracking a symbol; its covariance row/column starts at zero"""
+        if symbol in self._index:
+            return self._index[symbol]
+        n = len(self.symbols)
+        self._index[symbol] = n
+        self.symbols.append(symbol)
+
+        cov = np.zeros((n + 1, n + 1))
+        cov[:n, :n] = self.cov
+        self.cov = cov
+        self.last_prices = np.append(self.last_prices, np.nan)
+        self._returns = np.hstack([self._returns, np.zeros((self.history, 1))])
+        return n
+
+    def update(self, prices: Dict[str, float]) -> None:
+        """
+        Update with the latest bar's prices
+
+        Symbols missing from this bar are treated as unchanged; a symbol's
+        first price only seeds its reference price.
+        """
+        for symbol in prices:
+            if symbol not in self._index:
+                self.add_symbol(symbol)
+
+        idx = np.fromiter((self._index[s] for s in prices), dtype=np.intp, count=len(prices))
+        new_prices = np.fromiter(prices.values(), dtype=float, count=len(prices))
+
+        returns = np.zeros(len(self.symbols))
+        previous = self.last_prices[idx]
+        seen = ~np.isnan(previous)
+        returns[idx[seen]] = new_prices[seen] / previous[seen] - 1
+        self.last_prices[idx] = new_prices
+        self.update_returns(returns)
+
+    def update_returns(self, returns: np.ndarray) -> None:
+        """Fold one bar of returns (ordered like self.symbols) into the model"""
+        self.cov *= self.decay
+        self.cov += (1 - self.decay) * np.outer(returns, returns)
+        self._returns[self._cursor] = returns
+        self._cursor = (self._cursor + 1) % self.history
+        self.observations += 1
+
+    def exposures(self, quantities: Dict[str, float]) -> np.ndarray:
+        """Convert per-symbol quantities into a currency exposure vector at last prices"""
+        exposure = np.zeros(len(self.symbols))
+        for symbol, quantity in quantities.items():
+            i = self._index.get(symbol)
+            if i is not None and not np.isnan(self.last_prices[i]):
+                exposure[i] = quantity * self.last_prices[i]
+        return exposure
+
+    def parametric_var(self, exposure: np.ndarray) -> Tuple[float, float]:
+        """Normal (variance-covariance) one-bar VaR and CVaR in currency units"""
+        sigma = float(np.sqrt(max(exposure @ self.cov @ exposure, 0.0)))
+        return self.z * sigma, self.es_factor * sigma
+
+    def historical_var(self, exposure: np.ndarray) -> Tuple[float, float]:
+        """Historical-simulation one-bar VaR and CVaR in currency units"""
+        rows = min(self.observations, self.history)
+        if rows == 0:
+            return 0.0, 0.0
+        losses = -(self._returns[:rows] @ exposure)
+        var = float(np.quantile(losses, self.confidence))
+        tail = losses[losses >= var]
+        return var, float(tail.mean()) if len(tail) else var
+
+    def risk(self, quantities: Dict[str, float]) -> Dict[str, float]:
+        """VaR/CVaR of a set of positions under both methods"""
+        exposure = self.exposures(quantities)
+        var, cvar = self.parametric_var(exposure)
+        hist_var, hist_cvar = self.historical_var(exposure)
+        return {
+            'exposure': float(np.abs(exposure).sum()),
+            'parametric_var': var,
+            'parametric_cvar': cvar,
+            'historical_var': hist_var,
+            'historical_cvar': hist_cvar
+        }
+
+    def marginal_var(self, quantities: Dict[str, float], symbol: str, quantity: float,
+                     method: str = 'parametric') -> Optional[float]:
+        """VaR after hypothetically adding quantity of symbol, or None if not estimable yet"""
+        if not self.ready or symbol not in self._index:
+            return None
+        exposure = self.exposures({**quantities, symbol: quantities.get(symbol, 0.0) + quantity})
+        if method == 'historical':
+            return self.historical_var(exposure)[0]
+        return self.parametric_var(exposure)[0]
@@ -0,0 +1,179 @@
+# profiling.py
+
+import os
+import sys
+import time
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MODES = ('time', 'cprofile', 'sample')
+
+class StageProfiler:
+    def __init__(self, mode: str = 'time', output_dir: str = 'profiles', sample_interval: float = 0.005):
+        """
+        Opt-in stage timer with optional per-stage profiles
+
+        Stages nest and are reported by path ('strategy/macd'). Every mode
+        records call count, total and max wall time per stage. On top of that:
+          - 'cprofile': one cProfile per top-level stage, dumped to
+            <stage>.prof (snakeviz, flameprof, pstats)
+          - 'sample': a background thread samples the profiled thread's stack
+            every `sample_interval` seconds and writes collapsed stacks per
+            stage (<stage>.collapsed) and for the whole run (all.collapsed),
+            ready for flamegraph.pl or speedscope
+
+        Usage:
+            profiler = StageProfiler('sample')
+            Backtester(..., profiler=profiler).run()
+            print(profiler.finish())
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode {mode!r}, expected one of {MODES}")
+        self.mode = mode
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.timings: Dict[str, List[float]] = {}  # path -> [calls, total seconds, max seconds]
+        self._stack: List[str] = []
+        self._profiles: Dict[str, cProfile.Profile] = {}
+        self._samples: Dict[str, Counter] = {}
+        self._thread_id: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self._sampling = False
+
+    @contextmanager
+    def stage(self, name: str):
+        path = f"{self._stack[-1]}/{name}" if self._stack else name
+        profile = self._enter(path)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._exit(path, time.perf_counter() - started, profile)
+
+    def sections(self) -> 'SectionTimer':
+        """Lap timer for consecutive sections of one function (see SectionTimer)"""
+        return SectionTimer(self)
+
+    def _enter(self, path: str) -> Optional[cProfile.Profile]:
+        if self.mode == 'sample' and self._sampler is None:
+            self._start_sampler()
+        profile = None
+        if self.mode == 'cprofile' and not self._stack:
+            # Only one cProfile can be active, so nested stages are timed only
+            profile = self._profiles.setdefault(path, cProfile.Profile())
+            profile.enable()
+        self._stack.append(path)
+        self.timings.setdefault(path, [0, 0.0, 0.0])  # Registered on entry so parents list before children
+        return profile
+
+    def _exit(self, path: str, elapsed: float, profile: Optional[cProfile.Profile]) -> None:
+        self._stack.pop()
+        if profile is not None:
+            profile.disable()
+        timing = self.timings[path]
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+
+    def _start_sampler(self) -> None:
+        self._thread_id = threading.get_ident()
+        self._sampling = True
+        self._sampler = threading.Thread(target=self._sample_loop, name='stage-sampler', daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self) -> None:
+        while self._sampling:
+            time.sleep(self.sample_interval)
+            frame = sys._current_frames().get(self._thread_id)
+            try:
+                current = self._stack[-1]
+            except IndexError:
+                continue  # Between stages
+            if frame is None:
+                continue
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self._samples.setdefault(current, Counter())[';'.join(reversed(frames))] += 1
+
+    def summary(self) -> str:
+        """Per-stage table; % is relative to the sum of top-level stages"""
+        run_total = sum(t[1] for path, t in self.timings.items() if '/' not in path) or 1e-12
+        lines = [f"{'stage':<40} {'calls':>7} {'total s':>10} {'mean ms':>10} {'max ms':>10} {'%':>6}"]
+        for path, (calls, total, longest) in self.timings.items():
+            indent = '  ' * path.count('/')
+            label = indent + path.rsplit('/', 1)[-1]
+            lines.append(f"{label:<40} {calls:>7} {total:>10.3f} {total / calls * 1000:>10.2f} "
+                         f"{longest * 1000:>10.2f} {total / run_total * 100:>6.1f}")
+        return '\n'.join(lines)
+
+    def finish(self) -> str:
+        """Stop sampling, write profile files and summary.txt; returns the summary table"""
+        if self._sampler is not None:
+            self._sampling = False
+            self._sampler.join()
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        for path, profile in self._profiles.items():
+            profile.dump_stats(os.path.join(self.output_dir, f"{path.replace('/', '.')}.prof"))
+
+        if self._samples:
+            combined = Counter()
+            for path, samples in self._samples.items():
+                self._write_collapsed(os.path.join(self.output_dir, f"{path.replace('/', '.')}.collapsed"), samples)
+                for stack, count in samples.items():
+                    combined[f"{path.replace('/', ';')};{stack}"] += count
+            self._write_collapsed(os.path.join(self.output_dir, 'all.collapsed'), combined)
+
+        summary = self.summary()
+        with open(os.path.join(self.output_dir, 'summary.txt'), 'w', encoding='utf-8') as f:
+            f.write(summary + '\n')
+        logger.info(f"Profiling output written to {self.output_dir}")
+        return summary
+
+    @staticmethod
+    def _write_collapsed(path: str, samples: Counter) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+class SectionTimer:
+    def __init__(self, profiler: Optional[StageProfiler]):
+        """
+        Times consecutive sections of one function without re-indenting it
+
+        begin(name) ends the running section (if any) and starts the next as
+        a stage nested under the caller's current stage; end() closes the
+        last one. With profiler=None every call is a no-op.
+        """
+        self.profiler = profiler
+        self._current = None
+
+    def begin(self, name: str) -> None:
+        if self.profiler is None:
+            return
+        self.end()
+        self._current = self.profiler.stage(name)
+        self._current.__enter__()
+
+    def end(self) -> None:
+        if self._current is not None:
+            current, self._current = self._current, None
+            current.__exit__(None, None, None)
+
+@contextmanager
+def stage(profiler: Optional[StageProfiler], name: str):
+    """profiler.stage(name), or nothing when profiling is off"""
+    if profiler is None:
+        yield
+    else:
+        with profiler.stage(name):
+            yield
@@ -7,22 +7,45 @@ import time
 import logging
 import pandas as pd
 import numpy as np
-from typing import Optional, Dict, Any
+from typing import Any, Callable, Dict, Optional
 from crypto_api import CryptoComAPI
+from clock import SYSTEM_CLOCK
+from logger import RateLimitedLogger
+from latency import METRICS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("RealTimeData")
+hot_logger = RateLimitedLogger(logger)  # Per-tick debug output, sampled
 
 class RealTimeData:
-    def __init__(self, symbol: str, api_key: Optional[str] = None, api_secret: Optional[str] = None):
-        """Initialize real-time data handler"""
+    def __init__(self, symbol: str, api_key: Optional[str] = None, api_secret: Optional[str] = None,
+                 history: Optional[pd.DataFrame] = None, background_refresh: bool = True, clock=None):
+        """
+        Initialize real-time data handler
+        
+        Args:
+            history: OHLCV bars restored from a state snapshot (see
+                history_from_state); only bars after its last timestamp are
+                fetched instead of the full kline history
+            background_refresh: With history, fetch the missed bars on a
+                background thread and merge them in when they arrive, so the
+                constructor returns without waiting on the REST API. Without
+                history the initial fetch is always synchronous.
+            clock: Decides which bars count as missed since the history;
+                a SimulatedClock set to the last bar means nothing is fetched
+        """
         self.symbol = symbol
         self.api = CryptoComAPI(api_key, api_secret)
         self.data = pd.DataFrame()
         self.ws = None
         self.ws_thread = None
         self.running = False
+        self.background_refresh = background_refresh
+        self.clock = clock or SYSTEM_CLOCK
+        self.refresh_thread = None
+        self._lock = threading.Lock()  # Serializes replacing self.data (ticks vs. history refresh)
+        self.history_version = 0  # Bumped when bars under already-streamed ticks are rewritten
         
         # Initialize attributes
         self.short_window = 20
@@ -35,32 +58,20 @@ class RealTimeData:
         # Setup logger
         self.logger = logging.getLogger("RealTimeData")
         
+        self.journal = None  # Set by StateJournal.register
+        self.listeners = []  # Called with the updated frame after every tick
+        
         # Initialize data structure
-        self._initialize_data_structure()
+        if history is not None and not history.empty:
+            self._initialize_from_history(history)
+        else:
+            self._initialize_data_structure()
         
     def _initialize_data_structure(self) -> None:
         """Initialize historical data and indicators"""
         try:
-            # Get historical klines
-            klines = self.api.get_klines(self.symbol)
-            
-            # Convert klines to DataFrame
-            df_data = []
-            for kline in klines:
-                df_data.append({
-                    'timestamp': pd.to_datetime(int(kline['t']), unit='ms'),
-                    'open': float(kline['o']),
-                    'high': float(kline['h']),
-                    'low': float(kline['l']),
-                    'close': float(kline['c']),
-                    'volume': float(kline['v'])
-                })
-            
-            self.data = pd.DataFrame(df_data)
-            self.data.set_index('timestamp', inplace=True)
-            
-            # Calculate indicators
-            self._calculate_indicators()
+            # Get historical klines and calculate indicators
+            self.data = self._calculate_indicators(self._klines_to_frame(self.api.get_klines(self.symbol)))
             
             logger.info(f"Successfully loaded {len(self.data)} historical records")
             
@@ -68,43 +79,135 @@ class RealTimeData:
             logger.error(f"Error initializing data structure: {str(e)}")
             raise
             
-    def _calculate_indicators(self) -> None:
-        """Calculate technical indicators for trading signals"""
+    @staticmethod
+    def _klines_to_frame(klines) -> pd.DataFrame:
+        """Convert klines to an OHLCV DataFrame indexed by timestamp"""
+        df_data = []
+        for kline in klines:
+            df_data.append({
+                'timestamp': pd.to_datetime(int(kline['t']), unit='ms'),
+                'open': float(kline['o']),
+                'high': float(kline['h']),
+                'low': float(kline['l']),
+                'close': float(kline['c']),
+                'volume': float(kline['v'])
+            })
+        return pd.DataFrame(df_data).set_index('timestamp')
+        
+    def _initialize_from_history(self, history: pd.DataFrame) -> None:
+        """Warm start from restored bars, fetching only the minutes missed since"""
+        self.data = self._calculate_indicators(history)
+        logger.info(f"Restored {len(history)} records from snapshot")
+        now = pd.Timestamp(self.clock.utcnow())
+        missing = int((now - history.index[-1]) / pd.Timedelta(minutes=1))
+        if missing <= 0:
+            return
+        if self.background_refresh:
+            self.refresh_thread = threading.Thread(target=self._refresh_history, args=(missing,),
+                                                   name='history-refresh', daemon=True)
+            self.refresh_thread.start()
+        else:
+            self._refresh_history(missing)
+            
+    def _refresh_history(self, missing: int) -> None:
+        """Fetch bars missed since the restored history and merge them under the live ticks"""
+        started = time.perf_counter_ns()
+        try:
+            recent = self._klines_to_frame(self.api.get_klines(self.symbol, limit=min(missing + 1, 1000)))
+        except Exception as e:
+            # Trade on the restored bars; the stream fills in from here
+            logger.warning(f"Could not fetch bars since snapshot: {str(e)}")
+            return
+        if recent.empty:
+            return
+        with self._lock:
+            bars = self.data[recent.columns]
+            # Ticks streamed while fetching are newer than the last kline and stay on top
+            data = self._calculate_indicators(pd.concat([
+                bars[bars.index < recent.index[0]],
+                recent,
+                bars[bars.index > recent.index[-1]]
+            ]).tail(1000))
+            # Listeners that keep only new rows (e.g. BarRing) must republish the whole frame
+            self.history_version += 1
+            data.attrs['history_version'] = self.history_version
+            self.data = data  # Published only once complete: readers never see a frame without indicators
+        METRICS.since('history_refresh', started)
+        logger.info(f"Fetched {len(recent)} bars since snapshot")
+        self._notify()
+        
+    def get_state(self) -> Dict[str, Any]:
+        """OHLCV buffer for state_journal snapshots (indicators are recomputed on restore)"""
+        data = self.data
+        if data.empty:
+            return {'index': [], 'columns': [], 'values': []}
+        bars = data[['open', 'high', 'low', 'close', 'volume']]
+        return {
+            'index': (bars.index.asi8 // 1_000_000).tolist(),
+            'columns': list(bars.columns),
+            'values': bars.to_numpy().tolist()
+        }
+        
+    @staticmethod
+    def history_from_state(state: Optional[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+        """Inverse of get_state(); None when there is nothing to restore"""
+        if not state or not state['index']:
+            return None
+        index = pd.to_datetime(state['index'], unit='ms')
+        return pd.DataFrame(state['values'], index=index, columns=state['columns'])
+        
+    def _calculate_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Calculate technical indicators for trading signals on `data` (in place) and return it"""
+        started = time.perf_counter_ns()
         try:
             # Moving Averages
-            self.data['SMA_short'] = self.data['close'].rolling(window=self.short_window).mean()
-            self.data['SMA_long'] = self.data['close'].rolling(window=self.long_window).mean()
+            data['SMA_short'] = data['close'].rolling(window=self.short_window).mean()
+            data['SMA_long'] = data['close'].rolling(window=self.long_window).mean()
             
             # MACD (12, 26, 9)
-            exp1 = self.data['close'].ewm(span=12, adjust=False).mean()
-            exp2 = self.data['close'].ewm(span=26, adjust=False).mean()
-            self.data['MACD'] = exp1 - exp2
-            self.data['Signal_Line'] = self.data['MACD'].ewm(span=9, adjust=False).mean()
+            exp1 = data['close'].ewm(span=12, adjust=False).mean()
+            exp2 = data['close'].ewm(span=26, adjust=False).mean()
+            data['MACD'] = exp1 - exp2
+            data['Signal_Line'] = data['MACD'].ewm(span=9, adjust=False).mean()
             
             # RSI with more aggressive thresholds (25/75 instead of 30/70)
-            delta = self.data['close'].diff()
+            delta = data['close'].diff()
             gain = (delta.where(delta > 0, 0)).rolling(window=self.rsi_period).mean()
             loss = (-delta.where(delta < 0, 0)).rolling(window=self.rsi_period).mean()
             rs = gain / loss
-            self.data['RSI'] = 100 - (100 / (1 + rs))
+            data['RSI'] = 100 - (100 / (1 + rs))
             
             # Bollinger Bands (more sensitive)
-            self.data['BB_middle'] = self.data['close'].rolling(window=20).mean()
-            std = self.data['close'].rolling(window=20).std()
-            self.data['BB_upper'] = self.data['BB_middle'] + (std * 2)
-            self.data['BB_lower'] = self.data['BB_middle'] - (std * 2)
+            data['BB_middle'] = data['close'].rolling(window=20).mean()
+            std = data['close'].rolling(window=20).std()
+            data['BB_upper'] = data['BB_middle'] + (std * 2)
+            data['BB_lower'] = data['BB_middle'] - (std * 2)
             
             # Price Rate of Change (ROC)
-            self.data['ROC'] = self.data['close'].pct_change(periods=10) * 100
+            data['ROC'] = data['close'].pct_change(periods=10) * 100
             
             # Volume Indicators
-            self.data['Volume_MA'] = self.data['volume'].rolling(window=20).mean()
-            self.data['Volume_Ratio'] = self.data['volume'] / self.data['Volume_MA']
+            data['Volume_MA'] = data['volume'].rolling(window=20).mean()
+            data['Volume_Ratio'] = data['volume'] / data['Volume_MA']
+            METRICS.since('indicators', started)
+            return data
             
         except Exception as e:
             logger.error(f"Error calculating indicators: {str(e)}")
             raise
             
+    def add_listener(self, callback: Callable[[pd.DataFrame], None]) -> None:
+        """Call `callback(data)` on the websocket thread after each update's indicators are computed"""
+        self.listeners.append(callback)
+        
+    def _notify(self) -> None:
+        data = self.data
+        for callback in self.listeners:
+            try:
+                callback(data)
+            except Exception as e:
+                logger.error(f"Error in data listener: {str(e)}")
+            
     def start(self) -> None:
         """Start the WebSocket connection"""
         self.running = True
@@ -127,22 +230,17 @@ class RealTimeData:
             ws_url = "wss://stream.crypto.com/v2/market"
             
             def on_message(ws, message):
+                received_ns = time.perf_counter_ns()
+                METRICS.incr('ws_messages')
                 try:
-                    data = json.loads(message)
-                    if 'result' in data and 'data' in data['result']:
-                        ticker = data['result']['data'][0]
-                        self._process_ticker_data({
-                            't': ticker['t'],                    # timestamp
-                            'o': ticker['k'],                    # open (using k as current price)
-                            'h': ticker['h'],                    # high
-                            'l': ticker['l'],                    # low
-                            'c': ticker['k'],                    # close (using k as current price)
-                            'v': ticker['v']                     # volume
-                        })
-                        logger.debug(f"Processed ticker: {ticker['k']}")
+                    ticker = self.ticker_from_message(json.loads(message))
+                    if ticker is not None:
+                        self._process_ticker_data(ticker, received_ns)
+                        hot_logger.debug("Processed ticker: %s", ticker['c'])
                 except Exception as e:
                     logger.error(f"Error processing message: {str(e)}")
                     logger.debug(f"Raw message: {message}")
+                METRICS.since('on_message', received_ns)
                     
             def on_error(ws, error):
                 logger.error(f"WebSocket error: {str(error)}")
@@ -180,8 +278,29 @@ class RealTimeData:
         except Exception as e:
             logger.error(f"Error in WebSocket thread: {str(e)}")
             
-    def _process_ticker_data(self, ticker_data: Dict[str, Any]) -> None:
-        """Process incoming ticker data"""
+    @staticmethod
+    def ticker_from_message(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Tick fields (t, o, h, l, c, v) of a ticker channel message; None for other messages"""
+        if 'result' not in message or 'data' not in message['result']:
+            return None
+        ticker = message['result']['data'][0]
+        return {
+            't': ticker['t'],                    # timestamp
+            'o': ticker['k'],                    # open (using k as current price)
+            'h': ticker['h'],                    # high
+            'l': ticker['l'],                    # low
+            'c': ticker['k'],                    # close (using k as current price)
+            'v': ticker['v']                     # volume
+        }
+        
+    def _process_ticker_data(self, ticker_data: Dict[str, Any], received_ns: Optional[int] = None) -> None:
+        """
+        Process incoming ticker data
+        
+        `received_ns` (time.perf_counter_ns() at message arrival) is kept in
+        data.attrs so downstream stages can measure tick-to-trade latency.
+        """
+        started = time.perf_counter_ns()
         try:
             timestamp = pd.to_datetime(int(ticker_data['t']), unit='ms')
             new_data = pd.DataFrame({
@@ -192,15 +311,19 @@ class RealTimeData:
                 'volume': [float(ticker_data['v'])]
             }, index=[timestamp])
             
-            # Update the latest data
-            self.data = pd.concat([self.data, new_data])
-            self.data = self.data.tail(1000)  # Keep last 1000 records
-            
-            # Recalculate indicators
-            self._calculate_indicators()
+            with self._lock:
+                # Append, keep the last 1000 records and recalculate indicators on a new frame
+                data = self._calculate_indicators(pd.concat([self.data, new_data]).tail(1000))
+                data.attrs['received_ns'] = received_ns if received_ns is not None else started
+                data.attrs['history_version'] = self.history_version
+                # Published only once complete: readers never see a frame without indicators
+                self.data = data
+            METRICS.since('process_ticker', started)
+            METRICS.incr('ticks_processed')
+            self._notify()
             
             # Log the update
-            logger.debug(f"Updated price: {ticker_data['c']} at {timestamp}")
+            hot_logger.debug("Updated price: %s at %s", ticker_data['c'], timestamp)
             
         except Exception as e:
             logger.error(f"Error processing ticker data: {str(e)}")
\ No newline at end of file
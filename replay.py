@@ -0,0 +1,216 @@
+# replay.py
+
+import json
+import time
+import logging
+import argparse
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from clock import SimulatedClock
+from decision_recorder import DecisionRecorder
+from latency import METRICS
+from logger import setup_logger
+from paper_trader import PaperTrader
+from realtime_data import RealTimeData
+from strategy import majority_vote_strategy, signal_score_strategy
+from strategy_runner import StrategyRunner
+
+logger = logging.getLogger(__name__)
+
+TICK_FIELDS = ('t', 'o', 'h', 'l', 'c', 'v')
+
+# Strategies main.py runs live
+STRATEGIES: Dict[str, Callable[[pd.DataFrame], str]] = {
+    'majority_vote': majority_vote_strategy,
+    'signal_score': signal_score_strategy
+}
+
+def load_ticks(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Read ticks from a file as dicts with keys t (ms), o, h, l, c, v
+
+    .csv files need a t and c column (missing o/h/l default to c, v to 0).
+    .jsonl files hold one tick per line, or raw ticker channel messages as
+    received from the websocket, converted exactly as the live stream does.
+    """
+    if path.endswith('.csv'):
+        frame = pd.read_csv(path)
+        for field in ('o', 'h', 'l'):
+            if field not in frame:
+                frame[field] = frame['c']
+        if 'v' not in frame:
+            frame['v'] = 0.0
+        for row in frame[list(TICK_FIELDS)].itertuples(index=False):
+            yield dict(zip(TICK_FIELDS, row))
+        return
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if 'c' not in record:
+                # Raw websocket message; subscription acks and heartbeats carry no tick
+                record = RealTimeData.ticker_from_message(record)
+                if record is None:
+                    continue
+            yield record
+
+def write_ticks(ticks: Iterable[Dict[str, Any]], path: str) -> int:
+    """Write ticks as JSONL (the format load_ticks reads); returns the count"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for tick in ticks:
+            f.write(json.dumps(tick) + '\n')
+            count += 1
+    return count
+
+def synthetic_ticks(n: int, start: str = '2024-01-01', interval_ms: int = 1000, price: float = 0.1,
+                    volatility: float = 0.0005, seed: int = 0) -> Iterator[Dict[str, Any]]:
+    """Geometric random walk ticks, one every interval_ms, with a reproducible seed"""
+    rng = np.random.default_rng(seed)
+    closes = price * np.exp(np.cumsum(rng.normal(0.0, volatility, n)))
+    spreads = np.abs(rng.normal(0.0, volatility, n)) * closes
+    volumes = rng.gamma(2.0, 5000.0, n)
+    t0 = pd.Timestamp(start).value // 1_000_000
+    for i in range(n):
+        c = float(closes[i])
+        yield {'t': t0 + i * interval_ms, 'o': c, 'h': c + float(spreads[i]), 'l': c - float(spreads[i]),
+               'c': c, 'v': float(volumes[i])}
+
+class TickRecorder:
+    def __init__(self, path: str):
+        """RealTimeData listener appending each new tick (the frame's last row) to a JSONL file for replay"""
+        self.path = path
+        self._file = open(path, 'a', encoding='utf-8')
+        self._last_ts = None
+
+    def update(self, data: pd.DataFrame) -> None:
+        if data.empty or data.index[-1] == self._last_ts:
+            return
+        self._last_ts = data.index[-1]
+        row = data.iloc[-1]
+        self._file.write(json.dumps({
+            't': self._last_ts.value // 1_000_000,
+            'o': float(row['open']), 'h': float(row['high']), 'l': float(row['low']),
+            'c': float(row['close']), 'v': float(row['volume'])
+        }) + '\n')
+
+    def close(self) -> None:
+        self._file.close()
+
+class TickReplay:
+    def __init__(self, strategies: Optional[List[str]] = None, warmup: int = 200,
+                 initial_balance: float = 10000.0, recorder: Optional[DecisionRecorder] = None,
+                 symbol: str = 'REPLAY'):
+        """
+        Tick-level backtest through the live code path
+
+        The first `warmup` ticks become RealTimeData's starting history; every
+        later tick goes through the same _process_ticker_data the websocket
+        handler calls, and a StrategyRunner attached as its listener turns
+        each update into signals and PaperTrader fills, as in main.py. A
+        SimulatedClock follows the tick timestamps, so nothing reads the wall
+        clock or the network and the replay runs as fast as the CPU allows.
+        """
+        self.strategy_names = strategies or list(STRATEGIES)
+        unknown = set(self.strategy_names) - set(STRATEGIES)
+        if unknown:
+            raise ValueError(f"Unknown strategies {sorted(unknown)}, expected some of {list(STRATEGIES)}")
+        self.warmup = warmup
+        self.initial_balance = initial_balance
+        self.recorder = recorder
+        self.symbol = symbol
+        self.clock = SimulatedClock()
+        self.runner: Optional[StrategyRunner] = None
+
+    def run(self, ticks: Iterable[Dict[str, Any]], limit: Optional[int] = None) -> Dict[str, Any]:
+        ticks = iter(ticks)
+        history = RealTimeData._klines_to_frame(list(islice(ticks, self.warmup)))
+        if history.empty:
+            raise ValueError("No ticks to replay")
+        self.clock.set(history.index[-1])
+
+        rt_data = RealTimeData(self.symbol, history=history, clock=self.clock)
+        self.runner = StrategyRunner(recorder=self.recorder)
+        for name in self.strategy_names:
+            trader = PaperTrader(initial_balance=self.initial_balance, clock=self.clock)
+            self.runner.register(name, STRATEGIES[name], trader=trader)
+        self.runner.attach(rt_data)
+
+        if limit is not None:
+            ticks = islice(ticks, limit)
+        count = 0
+        first_ts = last_ts = None
+        started = time.perf_counter()
+        for tick in ticks:
+            timestamp = pd.Timestamp(int(tick['t']), unit='ms')
+            self.clock.set(timestamp)
+            rt_data._process_ticker_data(tick, time.perf_counter_ns())
+            if first_ts is None:
+                first_ts = timestamp
+            last_ts = timestamp
+            count += 1
+        elapsed = time.perf_counter() - started
+        if self.recorder is not None:
+            self.recorder.flush()
+
+        simulated = (last_ts - first_ts).total_seconds() if count else 0.0
+        price = float(rt_data.data['close'].iloc[-1])
+        return {
+            'ticks': count,
+            'seconds': elapsed,
+            'ticks_per_second': count / elapsed if elapsed > 0 else 0.0,
+            'simulated_seconds': simulated,
+            'speedup': simulated / elapsed if elapsed > 0 else 0.0,
+            'strategies': self.runner.report(price),
+            'latency': METRICS.snapshot()['stages']
+        }
+
+def format_report(report: Dict[str, Any]) -> str:
+    lines = [
+        f"Replayed {report['ticks']} ticks in {report['seconds']:.2f} s: "
+        f"{report['ticks_per_second']:.0f} ticks/s, {report['speedup']:.0f}x real time "
+        f"({report['simulated_seconds'] / 3600:.2f} h simulated)",
+        ""
+    ]
+    for name, row in report['strategies'].items():
+        lines.append(f"{name:<16} value {row['total_value']:12.2f}  return {row['return_pct']:7.2f}%  "
+                     f"trades {row['total_trades']:<5} win rate {row['win_rate']:6.2f}%")
+    lines.append("")
+    lines.append(f"{'stage':<28} {'count':>8} {'p50 us':>10} {'p99 us':>10}")
+    for stage, row in sorted(report['latency'].items()):
+        lines.append(f"{stage:<28} {row['count']:>8} {row['p50_us']:>10.1f} {row['p99_us']:>10.1f}")
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay ticks through the live data, signal and paper trading path')
+    parser.add_argument('ticks', nargs='?', help='Tick file (.csv, or .jsonl of ticks or raw ticker messages)')
+    parser.add_argument('--synthetic', type=int, metavar='N', help='Replay N synthetic ticks instead of a file')
+    parser.add_argument('--write', metavar='PATH', help='With --synthetic: write the ticks to PATH and exit')
+    parser.add_argument('--warmup', type=int, default=200, help='Leading ticks used as starting history')
+    parser.add_argument('--limit', type=int, help='Replay at most this many ticks after the warm-up')
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), help='Strategies to run (default: all)')
+    parser.add_argument('--decisions', metavar='DIR', help='Record every decision to this directory')
+    args = parser.parse_args()
+    if (args.ticks is None) == (args.synthetic is None):
+        parser.error('give either a tick file or --synthetic N')
+
+    setup_logger(console_level=logging.WARNING)  # Fills go to the log file, not the report
+    if args.synthetic is not None:
+        ticks = synthetic_ticks(args.synthetic + args.warmup)
+        if args.write:
+            print(f"Wrote {write_ticks(ticks, args.write)} ticks to {args.write}")
+            return
+    else:
+        ticks = load_ticks(args.ticks)
+
+    recorder = DecisionRecorder(args.decisions) if args.decisions else None
+    report = TickReplay(args.strategies, warmup=args.warmup, recorder=recorder).run(ticks, limit=args.limit)
+    print(format_report(report))
+
+if __name__ == "__main__":
+    main()
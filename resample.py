@@ -0,0 +1,191 @@
+# resample.py
+
+import logging
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+
+from strategy import moving_average_strategy
+
+logger = logging.getLogger(__name__)
+
+# Fixed-width timeframes in Crypto.com notation
+TIMEFRAMES = {
+    '1m': pd.Timedelta(minutes=1),
+    '5m': pd.Timedelta(minutes=5),
+    '15m': pd.Timedelta(minutes=15),
+    '30m': pd.Timedelta(minutes=30),
+    '1h': pd.Timedelta(hours=1),
+    '4h': pd.Timedelta(hours=4),
+    '6h': pd.Timedelta(hours=6),
+    '12h': pd.Timedelta(hours=12),
+    '1d': pd.Timedelta(days=1)
+}
+
+OHLCV_AGG = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum'
+}
+
+def resample_ohlcv(bars: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """
+    Aggregate OHLCV bars into a higher timeframe
+
+    Args:
+        bars: DataFrame indexed by bar open time with open/high/low/close/volume columns
+        timeframe: Target timeframe, e.g. '5m', '1h', '1d'
+
+    Returns:
+        DataFrame indexed by bucket open time; empty buckets are dropped
+    """
+    if bars.empty:
+        return bars[list(OHLCV_AGG)].copy()
+    resampled = bars.resample(TIMEFRAMES[timeframe], label='left', closed='left').agg(OHLCV_AGG)
+    return resampled.dropna(subset=['close'])
+
+def to_strategy_frame(bars: pd.DataFrame, symbol: str) -> pd.DataFrame:
+    """Convert lowercase OHLCV bars to the MultiIndex layout moving_average_strategy expects"""
+    frame = bars[['open', 'high', 'low', 'close', 'volume']].copy()
+    frame.columns = pd.MultiIndex.from_product([['Open', 'High', 'Low', 'Close', 'Volume'], [symbol]])
+    return frame
+
+class MultiTimeframeResampler:
+    def __init__(self, timeframes: Iterable[str] = ('5m', '1h', '1d'), base_timeframe: str = '1m',
+                 max_base_bars: Optional[int] = None):
+        """
+        Derive higher timeframes from a single stored base series
+
+        Args:
+            timeframes: Higher timeframes to maintain
+            base_timeframe: Timeframe of the stored base bars
+            max_base_bars: Keep at most this many base bars (None keeps all);
+                higher timeframes keep only the buckets the kept bars fully cover
+        """
+        self.base_timeframe = base_timeframe
+        self.timeframes = [tf for tf in timeframes if tf != base_timeframe]
+        for tf in [base_timeframe] + self.timeframes:
+            if tf not in TIMEFRAMES:
+                raise ValueError(f"Unsupported timeframe: {tf}")
+        self.max_base_bars = max_base_bars
+        self.base = pd.DataFrame(columns=list(OHLCV_AGG), dtype=float)
+        self.frames: Dict[str, pd.DataFrame] = {tf: self.base.copy() for tf in self.timeframes}
+        # Bumped whenever a timeframe's bars change, so derived indicators can be cached
+        self.versions: Dict[str, int] = {tf: 0 for tf in [base_timeframe] + self.timeframes}
+
+    def update(self, new_bars: pd.DataFrame) -> None:
+        """
+        Merge new (or revised) base bars and refresh only the affected buckets
+
+        A bar whose timestamp already exists replaces the stored one, so the
+        still-forming base bar can be pushed repeatedly.
+        """
+        if new_bars.empty:
+            return
+        new_bars = new_bars[list(OHLCV_AGG)].sort_index()
+        first_new = new_bars.index[0]
+
+        if self.base.empty:
+            self.base = new_bars[~new_bars.index.duplicated(keep='last')]
+        else:
+            base = pd.concat([self.base, new_bars])
+            base = base[~base.index.duplicated(keep='last')]
+            if first_new < self.base.index[-1]:
+                base = base.sort_index()
+            self.base = base
+        trimmed = self.max_base_bars is not None and len(self.base) > self.max_base_bars
+        if trimmed:
+            self.base = self.base.iloc[-self.max_base_bars:]
+        self.versions[self.base_timeframe] += 1
+
+        for tf in self.timeframes:
+            bucket_start = first_new.floor(TIMEFRAMES[tf])
+            refreshed = resample_ohlcv(self.base[self.base.index >= bucket_start], tf)
+            kept = self.frames[tf]
+            if not kept.empty:
+                refreshed = pd.concat([kept[kept.index < bucket_start], refreshed])
+            if trimmed:
+                # Same window as the base; a bucket it only partly covers would be wrong
+                refreshed = refreshed[refreshed.index >= self.base.index[0].ceil(TIMEFRAMES[tf])]
+            self.frames[tf] = refreshed
+            self.versions[tf] += 1
+
+    def get(self, timeframe: str, completed_only: bool = False) -> pd.DataFrame:
+        """Return bars for a timeframe, optionally dropping the still-forming last bucket"""
+        frame = self.base if timeframe == self.base_timeframe else self.frames[timeframe]
+        if completed_only and not frame.empty:
+            last_close = self.base.index[-1] + TIMEFRAMES[self.base_timeframe]
+            if frame.index[-1] + TIMEFRAMES[timeframe] > last_close:
+                frame = frame.iloc[:-1]
+        return frame
+
+class MultiTimeframeIndicators:
+    def __init__(self, resampler: MultiTimeframeResampler, symbol: str,
+                 short_window: int = 20, long_window: int = 50):
+        """
+        Run moving_average_strategy on every timeframe of a resampler
+
+        Indicator frames are cached per timeframe and only recomputed when
+        that timeframe's bars changed, so no extra network round trips or
+        redundant indicator passes are needed.
+        """
+        self.resampler = resampler
+        self.symbol = symbol
+        self.short_window = short_window
+        self.long_window = long_window
+        self._cache: Dict[str, tuple] = {}
+
+    def frame(self, timeframe: str) -> pd.DataFrame:
+        """Indicator frame for one timeframe (completed bars only for higher timeframes)"""
+        version = self.resampler.versions[timeframe]
+        cached = self._cache.get(timeframe)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        completed_only = timeframe != self.resampler.base_timeframe
+        bars = self.resampler.get(timeframe, completed_only=completed_only)
+        frame = moving_average_strategy(to_strategy_frame(bars, self.symbol),
+                                        short_window=self.short_window, long_window=self.long_window)
+        self._cache[timeframe] = (version, frame)
+        return frame
+
+    def frames(self) -> Dict[str, pd.DataFrame]:
+        """Indicator frames for the base and every higher timeframe"""
+        return {tf: self.frame(tf) for tf in [self.resampler.base_timeframe] + self.resampler.timeframes}
+
+    def aligned(self, columns: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Base-timeframe indicator frame with higher-timeframe indicators joined on
+
+        Higher-timeframe values become visible only once their bucket has
+        closed, so no base bar sees data from its own future. Joined columns
+        are keyed (indicator, timeframe), e.g. ('RSI', '1h').
+        """
+        base_tf = self.resampler.base_timeframe
+        base = self.frame(base_tf)
+        if base.empty:
+            return base
+        base_close = base.index + TIMEFRAMES[base_tf]
+        aligned = [base]
+
+        for tf in self.resampler.timeframes:
+            frame = self.frame(tf)
+            names = [c for c in frame.columns.get_level_values(0).unique()
+                     if c not in ('Open', 'High', 'Low', 'Close', 'Volume')]
+            if columns is not None:
+                names = [c for c in names if c in set(columns)]
+            values = frame[[(c, '') for c in names]]
+            values.columns = pd.MultiIndex.from_product([names, [tf]])
+            # Index by bucket close time and carry the last closed bucket forward
+            values.index = values.index + TIMEFRAMES[tf]
+            positions = values.index.searchsorted(base_close, side='right') - 1
+            if values.empty:
+                joined = pd.DataFrame(float('nan'), index=base.index, columns=values.columns)
+            else:
+                joined = values.iloc[positions.clip(min=0)].set_axis(base.index, axis=0)
+                joined.iloc[positions < 0] = float('nan')
+            aligned.append(joined)
+
+        return pd.concat(aligned, axis=1)
@@ -1,12 +1,18 @@
+import heapq
+import math
 import pandas as pd
 import numpy as np
-from datetime import datetime
-from logger import setup_logger
+from collections import deque
+from clock import SYSTEM_CLOCK
+from logger import setup_logger, RateLimitedLogger
+from state_journal import parse_timestamp
 
 logger = setup_logger()
+hot_logger = RateLimitedLogger(logger)  # 开仓检查的拒绝原因，限频输出
 
 class RiskManager:
-    def __init__(self, stop_loss_percent, take_profit_percent, max_positions, max_drawdown_percent=20):
+    def __init__(self, stop_loss_percent, take_profit_percent, max_positions, max_drawdown_percent=20,
+                 volatility_window=20, portfolio_risk=None, max_portfolio_var=None, clock=None):
         self.stop_loss_percent = stop_loss_percent
         self.take_profit_percent = take_profit_percent
         self.max_positions = max_positions
@@ -14,84 +20,231 @@ class RiskManager:
         self.max_daily_loss = -5.0  # 每日最大亏损限制(%)
         self.max_position_size = 0.2  # 单个仓位最大资金比例
         self.min_volume = 100  # 最小交易量限制
-        self.positions = []
+        self._positions = {}          # 仓位ID -> 仓位
+        self._stop_heaps = {}         # 交易对 -> 止损价最大堆 [(-stop_loss, id)]
+        self._take_profit_heaps = {}  # 交易对 -> 止盈价最小堆 [(take_profit, id)]
+        self._open_counts = {}        # 交易对 -> 未平仓数量
+        self._quantities = {}         # 交易对 -> 持仓总量，供组合风险计算
+        
+        # 组合风险 (PortfolioRisk) 及 VaR 上限 (计价货币)
+        self.portfolio_risk = portfolio_risk
+        self.max_portfolio_var = max_portfolio_var
+        self._next_position_id = 1
+        self.journal = None  # 由 StateJournal.register 设置
+        self.clock = clock or SYSTEM_CLOCK  # 未传入时间戳时的开仓时间来源，回放时注入模拟时钟
+        
+        # 增量风险统计，使每次开仓前检查为 O(1)
+        self.volatility_window = volatility_window
+        self._reset_pnl_stats()
+        
+    def _reset_pnl_stats(self):
         self.daily_pnl = []
         self.max_drawdown = 0
+        self.cumulative_pnl = 0.0
+        self.peak_pnl = None
+        self._last_pnl = None
+        self._returns = deque()      # 最近 volatility_window-1 个盈亏变化率
+        self._returns_invalid = 0    # 窗口内非有限值 (前值为 0) 的个数
+        self._returns_mean = 0.0
+        self._returns_m2 = 0.0
+        
+    @property
+    def positions(self):
+        """当前持仓列表（按开仓顺序）"""
+        return list(self._positions.values())
         
-    def can_open_position(self, price, position_size):
+    def can_open_position(self, price, position_size, symbol=None):
         """检查是否可以开新仓位"""
         # 检查持仓数量限制
-        if len(self.positions) >= self.max_positions:
-            logger.info("达到最大持仓数量限制")
+        if len(self._positions) >= self.max_positions:
+            hot_logger.info("达到最大持仓数量限制")
             return False
             
         # 检查当前回撤
         if self.check_drawdown():
-            logger.info("超过最大回撤限制")
+            hot_logger.info("超过最大回撤限制")
             return False
             
         # 计算波动率风险
         volatility = self.calculate_volatility()
         if volatility > 0.5:  # 50%年化波动率阈值
-            logger.info(f"当前波动率过高: {volatility:.2%}")
+            hot_logger.info("当前波动率过高: %.2f%%", volatility * 100)
             return False
             
+        # 检查加仓后的组合 VaR
+        if self.portfolio_risk is not None and self.max_portfolio_var is not None:
+            var = self.portfolio_risk.marginal_var(self._quantities, symbol, position_size)
+            if var is not None and var > self.max_portfolio_var:
+                hot_logger.info("组合VaR超限: %.2f > %.2f", var, self.max_portfolio_var)
+                return False
+            
         return True
         
-    def add_position(self, price, size, timestamp=None):
-        """添加新仓位"""
+    def add_position(self, price, size, timestamp=None, symbol=None):
+        """添加新仓位，并将止损/止盈价登记到该交易对的价格堆中"""
         if timestamp is None:
-            timestamp = datetime.now()
+            timestamp = self.clock.now()
         
         position = {
+            'id': self._next_position_id,
+            'symbol': symbol,
             'entry_price': price,
             'size': size,
             'timestamp': timestamp,
             'stop_loss': price * (1 - self.stop_loss_percent/100),
             'take_profit': price * (1 + self.take_profit_percent/100)
         }
-        self.positions.append(position)
+        self._insert_position(position)
+        if self.journal is not None:
+            self.journal.record('open', position)
         logger.info(f"新建仓位: 价格={price}, 数量={size}")
+        return position
+        
+    def _insert_position(self, position):
+        symbol = position['symbol']
+        self._positions[position['id']] = position
+        self._next_position_id = max(self._next_position_id, position['id'] + 1)
+        self._open_counts[symbol] = self._open_counts.get(symbol, 0) + 1
+        self._quantities[symbol] = self._quantities.get(symbol, 0.0) + position['size']
+        heapq.heappush(self._stop_heaps.setdefault(symbol, []), (-position['stop_loss'], position['id']))
+        heapq.heappush(self._take_profit_heaps.setdefault(symbol, []), (position['take_profit'], position['id']))
+        
+    def close_position(self, position_id, exit_price, size=None):
+        """按出场价平掉指定仓位（size 小于持仓量时只平部分），返回已实现盈亏"""
+        pos = self._positions[position_id]
+        if size is None or size >= pos['size']:
+            size = pos['size']
+            del self._positions[position_id]
+            self._open_counts[pos['symbol']] -= 1
+            self._compact_heaps(pos['symbol'])
+        else:
+            pos['size'] -= size
+        self._quantities[pos['symbol']] -= size
+        pnl = (exit_price - pos['entry_price']) * size
+        self.record_pnl(pnl)
+        if self.journal is not None:
+            self.journal.record('close', {'id': position_id, 'exit_price': exit_price, 'size': size})
+        return pnl
+        
+    def triggered_positions(self, current_price, symbol=None):
+        """
+        找出当前价格触发止损/止盈的仓位，但不平仓
         
-    def check_positions(self, current_price):
-        """检查所有持仓是否触发止盈止损"""
-        closed_positions = []
-        remaining_positions = []
-        
-        for pos in self.positions:
-            # 检查止损
-            if current_price <= pos['stop_loss']:
-                pnl = (current_price - pos['entry_price']) * pos['size']
-                self.daily_pnl.append(pnl)
-                closed_positions.append({
-                    'type': 'stop_loss',
-                    'position': pos,
-                    'exit_price': current_price,
-                    'pnl': pnl
-                })
+        价格只属于一个交易对，因此只检查该 symbol 的堆；symbol 为 None 时
+        只检查未指定交易对的仓位，若存在指定了交易对的持仓则抛出 ValueError。
+        供先下单、成交后再 close_position 的调用方使用；未成交的仓位
+        留在堆中，下次检查时会再次触发。只遍历堆顶被价格穿越的部分，
+        复杂度为 O(k)（k 为触发数量）。
+        """
+        if symbol is None and any(count > 0 for s, count in self._open_counts.items() if s is not None):
+            raise ValueError("存在指定交易对的持仓时，检查止损止盈必须传入 symbol")
+        triggered = []
+        for kind, heaps, bound in (('stop_loss', self._stop_heaps, -current_price),
+                                   ('take_profit', self._take_profit_heaps, current_price)):
+            heap = heaps.get(symbol, [])
+            while heap and heap[0][1] not in self._positions:
+                heapq.heappop(heap)  # 已平仓的过期条目
+            for _, position_id in self._heap_at_most(heap, bound):
+                pos = self._positions.get(position_id)
+                if pos is not None:
+                    triggered.append({'type': kind, 'position': pos, 'exit_price': current_price})
+        return triggered
+        
+    @staticmethod
+    def _heap_at_most(heap, bound):
+        """堆中键 <= bound 的条目（按键排序），只访问满足条件的子树"""
+        found = []
+        stack = [0]
+        while stack:
+            i = stack.pop()
+            if i < len(heap) and heap[i][0] <= bound:
+                found.append(heap[i])
+                stack.extend((2 * i + 1, 2 * i + 2))
+        found.sort()
+        return found
+        
+    def check_positions(self, current_price, symbol=None):
+        """
+        检查持仓是否触发止盈止损，并按当前价平仓（symbol 规则同 triggered_positions）
+        
+        止损价和止盈价按交易对分别保存在堆中，只访问被当前价格穿越的条目，
+        复杂度为 O(k log n)（k 为触发数量），而不是逐个扫描全部持仓。
+        """
+        closed_positions = self.triggered_positions(current_price, symbol)
+        for closed in closed_positions:
+            pos = closed['position']
+            closed['pnl'] = self.close_position(pos['id'], current_price)
+            if closed['type'] == 'stop_loss':
                 logger.info(f"触发止损: 入场价={pos['entry_price']}, 出场价={current_price}")
-                continue
-                
-            # 检查止盈
-            if current_price >= pos['take_profit']:
-                pnl = (current_price - pos['entry_price']) * pos['size']
-                self.daily_pnl.append(pnl)
-                closed_positions.append({
-                    'type': 'take_profit',
-                    'position': pos,
-                    'exit_price': current_price,
-                    'pnl': pnl
-                })
+            else:
                 logger.info(f"触发止盈: 入场价={pos['entry_price']}, 出场价={current_price}")
-                continue
-                
-            remaining_positions.append(pos)
-            
-        self.positions = remaining_positions
         return closed_positions
         
-    def calculate_volatility(self, window=20):
+    def _compact_heaps(self, symbol):
+        """过期条目过多时重建该交易对的堆，控制堆大小"""
+        stop_heap = self._stop_heaps.get(symbol, [])
+        take_profit_heap = self._take_profit_heaps.get(symbol, [])
+        if len(stop_heap) + len(take_profit_heap) > 4 * self._open_counts.get(symbol, 0) + 64:
+            stop_heap[:] = [e for e in stop_heap if e[1] in self._positions]
+            take_profit_heap[:] = [e for e in take_profit_heap if e[1] in self._positions]
+            heapq.heapify(stop_heap)
+            heapq.heapify(take_profit_heap)
+            
+    def record_pnl(self, pnl):
+        """记录一笔已实现盈亏，并增量更新累计盈亏、峰值、最大回撤和滚动方差"""
+        self.daily_pnl.append(pnl)
+        
+        # 累计盈亏与回撤
+        self.cumulative_pnl += pnl
+        if self.peak_pnl is None or self.cumulative_pnl > self.peak_pnl:
+            self.peak_pnl = self.cumulative_pnl
+        if self.peak_pnl > 0:
+            drawdown = abs((self.cumulative_pnl - self.peak_pnl) / self.peak_pnl * 100)
+            self.max_drawdown = max(self.max_drawdown, drawdown)
+            
+        # 盈亏变化率的滚动方差 (Welford 增删)
+        if self._last_pnl is not None:
+            change = pnl / self._last_pnl - 1 if self._last_pnl != 0 else math.nan
+            self._push_return(change)
+            if len(self._returns) > self.volatility_window - 1:
+                self._pop_return()
+        self._last_pnl = pnl
+        
+    def _push_return(self, value):
+        self._returns.append(value)
+        if not math.isfinite(value):
+            self._returns_invalid += 1
+            return
+        n = len(self._returns) - self._returns_invalid
+        delta = value - self._returns_mean
+        self._returns_mean += delta / n
+        self._returns_m2 += delta * (value - self._returns_mean)
+        
+    def _pop_return(self):
+        value = self._returns.popleft()
+        if not math.isfinite(value):
+            self._returns_invalid -= 1
+            return
+        n = len(self._returns) - self._returns_invalid
+        if n == 0:
+            self._returns_mean = 0.0
+            self._returns_m2 = 0.0
+            return
+        delta = value - self._returns_mean
+        self._returns_mean -= delta / n
+        self._returns_m2 = max(0.0, self._returns_m2 - delta * (value - self._returns_mean))
+        
+    def calculate_volatility(self, window=None):
         """计算最近的波动率"""
+        if window is None or window == self.volatility_window:
+            if len(self.daily_pnl) < self.volatility_window:
+                return 0
+            n = len(self._returns)
+            if self._returns_invalid or n < 2:
+                return math.nan
+            return math.sqrt(self._returns_m2 / (n - 1)) * np.sqrt(252)  # 年化波动率
+            
+        # 非默认窗口回退到完整计算
         if len(self.daily_pnl) < window:
             return 0
             
@@ -100,21 +253,48 @@ class RiskManager:
         
     def check_drawdown(self):
         """检查是否超过最大回撤限制"""
-        if not self.daily_pnl:
-            return False
-            
-        cumulative = np.cumsum(self.daily_pnl)
-        peak = np.maximum.accumulate(cumulative)
-        drawdown = (cumulative - peak) / peak * 100
-        self.max_drawdown = abs(min(drawdown))
-        
         return self.max_drawdown > self.max_drawdown_percent
         
     def get_risk_metrics(self):
         """获取风险指标"""
         return {
-            '当前持仓数': len(self.positions),
+            '当前持仓数': len(self._positions),
             '最大回撤': f"{self.max_drawdown:.2f}%",
             '年化波动率': f"{self.calculate_volatility():.2f}%",
-            '累计盈亏': f"{sum(self.daily_pnl):.2f}"
-        }
\ No newline at end of file
+            '累计盈亏': f"{self.cumulative_pnl:.2f}"
+        }
+        
+    def get_portfolio_risk(self):
+        """当前持仓的组合 VaR/CVaR（参数法与历史模拟法）"""
+        if self.portfolio_risk is None:
+            return {}
+        return self.portfolio_risk.risk(self._quantities)
+        
+    def get_state(self):
+        """可序列化的持仓与盈亏状态，供 state_journal 快照使用"""
+        return {
+            'positions': self.positions,
+            'daily_pnl': self.daily_pnl,
+            'next_position_id': self._next_position_id
+        }
+        
+    def load_state(self, state):
+        """从 get_state() 恢复；增量统计与价格堆按原顺序重建"""
+        self._positions = {}
+        self._stop_heaps = {}
+        self._take_profit_heaps = {}
+        self._open_counts = {}
+        self._quantities = {}
+        self._reset_pnl_stats()
+        for pnl in state['daily_pnl']:
+            self.record_pnl(pnl)
+        for position in state['positions']:
+            self._insert_position(dict(position, timestamp=parse_timestamp(position['timestamp'])))
+        self._next_position_id = max(self._next_position_id, state['next_position_id'])
+        
+    def apply_event(self, event, data):
+        """重放日志中的开仓/平仓事件"""
+        if event == 'open':
+            self._insert_position(dict(data, timestamp=parse_timestamp(data['timestamp'])))
+        elif event == 'close':
+            self.close_position(data['id'], data['exit_price'], data.get('size'))
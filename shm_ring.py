@@ -0,0 +1,184 @@
+# shm_ring.py
+
+import json
+import time
+import logging
+import threading
+from multiprocessing import shared_memory
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# RealTimeData's OHLCV and indicator columns
+BAR_COLUMNS = (
+    'close', 'open', 'high', 'low', 'volume',
+    'SMA_short', 'SMA_long', 'MACD', 'Signal_Line', 'RSI',
+    'BB_middle', 'BB_upper', 'BB_lower', 'ROC', 'Volume_MA', 'Volume_Ratio'
+)
+
+MAGIC = 0x42415252494E4731  # "BARRING1"
+HEADER_SLOTS = 8
+NAMES_BYTES = 1024
+# Header slot indices
+_MAGIC, _CAPACITY, _COLUMNS, _PUBLISHED, _CLAIMED = range(5)
+
+class BarRing:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        """
+        Single-writer-process, multi-reader ring of bars in shared memory
+
+        Use BarRing.create() in the parent and BarRing.attach(name) in the
+        ingest and strategy processes. Every row is stored twice, at slot i
+        and i + capacity, so any window of up to `capacity` newest rows is
+        one contiguous block and window() hands out numpy views (and a
+        DataFrame over them) without copying.
+
+        Two sequence counters make it lock-free for readers: the writer bumps
+        `claimed` before overwriting slots and `published` after, both single
+        aligned 8-byte stores issued in that order. Readers read `published`,
+        copy their window and then check overwritten(start): true when the
+        writer has since claimed one of the window's slots and the copy must
+        be discarded. Within the writer process appends are serialized by a
+        lock, so RealTimeData's tick and history-refresh threads can both
+        feed update().
+        """
+        self.shm = shm
+        self.owner = owner
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        if header[_MAGIC] != MAGIC:
+            raise ValueError(f"Shared memory {shm.name!r} is not a bar ring")
+        self.capacity = int(header[_CAPACITY])
+        n_columns = int(header[_COLUMNS])
+        offset = HEADER_SLOTS * 8
+        raw_names = bytes(shm.buf[offset:offset + NAMES_BYTES]).rstrip(b'\0')
+        self.columns = json.loads(raw_names.decode('utf-8'))
+        offset += NAMES_BYTES
+        rows = 2 * self.capacity
+        self._header = header
+        self._times = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += rows * 8
+        self._received = np.ndarray((rows,), dtype=np.int64, buffer=shm.buf, offset=offset)
+        offset += rows * 8
+        self._values = np.ndarray((rows, n_columns), dtype=np.float64, buffer=shm.buf, offset=offset)
+        self._last_ns: Optional[int] = None  # Writer side: newest timestamp appended
+        self._history_version = 0  # Writer side: RealTimeData history_version last published
+        self._write_lock = threading.Lock()
+
+    @classmethod
+    def create(cls, capacity: int = 1 << 16, columns: Sequence[str] = BAR_COLUMNS,
+               name: Optional[str] = None) -> 'BarRing':
+        names = json.dumps(list(columns)).encode('utf-8')
+        if len(names) > NAMES_BYTES:
+            raise ValueError(f"Column names take {len(names)} bytes, at most {NAMES_BYTES} fit")
+        size = HEADER_SLOTS * 8 + NAMES_BYTES + 2 * capacity * (16 + 8 * len(columns))
+        shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((HEADER_SLOTS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_COLUMNS] = len(columns)
+        shm.buf[HEADER_SLOTS * 8:HEADER_SLOTS * 8 + len(names)] = names
+        header[_MAGIC] = MAGIC  # Last, so attach() never sees a half-initialized ring
+        del header
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> 'BarRing':
+        return cls(shared_memory.SharedMemory(name=name), owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def published(self) -> int:
+        """Rows written so far (the sequence number of the next row)"""
+        return int(self._header[_PUBLISHED])
+
+    def append(self, times: np.ndarray, values: np.ndarray, received_ns: int = 0) -> None:
+        """Writer: append rows (int64 ns timestamps, float64 values in column order)"""
+        with self._write_lock:
+            self._append(times, values, received_ns)
+
+    def _append(self, times: np.ndarray, values: np.ndarray, received_ns: int) -> None:
+        if len(times) > self.capacity:
+            times, values = times[-self.capacity:], values[-self.capacity:]
+        start = int(self._header[_PUBLISHED])
+        end = start + len(times)
+        slots = np.arange(start, end) % self.capacity
+        self._header[_CLAIMED] = end
+        for base in (0, self.capacity):
+            self._times[slots + base] = times
+            self._received[slots + base] = received_ns
+            self._values[slots + base] = values
+        self._header[_PUBLISHED] = end
+
+    def update(self, data: pd.DataFrame) -> None:
+        """
+        RealTimeData listener (ingest process): append the rows newer than the last one written
+
+        When the history refresh has rewritten bars under ticks already
+        written (a newer attrs['history_version']), the whole frame is
+        republished instead, so the newest rows again match RealTimeData.
+        """
+        if data.empty:
+            return
+        with self._write_lock:
+            times = data.index.asi8
+            version = data.attrs.get('history_version', 0)
+            if version > self._history_version or self._last_ns is None:
+                start = 0
+                self._history_version = version
+            else:
+                start = int(times.searchsorted(self._last_ns, side='right'))
+            if start >= len(times):
+                return
+            values = np.full((len(times) - start, len(self.columns)), np.nan)
+            for i, column in enumerate(self.columns):
+                if column in data:
+                    values[:, i] = data[column].to_numpy()[start:]
+            self._append(times[start:], values, data.attrs.get('received_ns') or time.perf_counter_ns())
+            self._last_ns = int(times[-1])
+
+    def window(self, n: int) -> Tuple[int, pd.DataFrame]:
+        """
+        Reader: (sequence of the first row, DataFrame of the newest n rows)
+
+        The frame is a zero-copy view of shared memory the writer may reuse:
+        copy it, then check overwritten(start) before trusting the copy. attrs['received_ns'] is
+        the ingest arrival time of the newest tick (perf_counter_ns, which is
+        system-wide on Linux) for cross-process tick-to-trade latency.
+        """
+        end = self.published
+        n = min(n, end, self.capacity)
+        start = end - n
+        first = start % self.capacity
+        index = pd.DatetimeIndex(self._times[first:first + n].view('datetime64[ns]'))
+        frame = pd.DataFrame(self._values[first:first + n], index=index, columns=self.columns, copy=False)
+        if n:
+            frame.attrs['received_ns'] = int(self._received[first + n - 1])
+        return start, frame
+
+    def overwritten(self, start: int) -> bool:
+        """Whether rows from sequence `start` on may have been overwritten since they were read"""
+        return int(self._header[_CLAIMED]) - start > self.capacity
+
+    def wait(self, seq: int, timeout: float, poll: float = 0.0002) -> bool:
+        """Reader: wait until rows beyond `seq` are published; False on timeout"""
+        deadline = time.monotonic() + timeout
+        while self._header[_PUBLISHED] <= seq:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll)
+        return True
+
+    def close(self) -> None:
+        self._header = self._times = self._received = self._values = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass  # A frame from window() still references the buffer; freed with the process
+        if self.owner:
+            self.shm.unlink()
@@ -0,0 +1,179 @@
+# state_journal.py
+
+import os
+import json
+import time
+import logging
+from datetime import datetime, date
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FILE = 'snapshot.json'
+JOURNAL_FILE = 'journal.jsonl'
+
+def _encode(value):
+    """JSON fallback for timestamps and numpy scalars"""
+    if isinstance(value, (pd.Timestamp, datetime, date)):
+        return value.isoformat()
+    if isinstance(value, np.datetime64):
+        return None if np.isnat(value) else pd.Timestamp(value).isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+def parse_timestamp(value) -> Optional[pd.Timestamp]:
+    """Inverse of the journal's timestamp encoding"""
+    return None if value is None else pd.Timestamp(value)
+
+class _ComponentJournal:
+    """Handle given to a registered component for recording its own events"""
+    def __init__(self, journal: 'StateJournal', name: str):
+        self._journal = journal
+        self._name = name
+
+    def record(self, event: str, data: Dict[str, Any]) -> None:
+        self._journal.record(self._name, event, data)
+
+class StateJournal:
+    def __init__(self, directory: str = 'state', snapshot_interval: float = 60.0, fsync: bool = False):
+        """
+        Append-only event journal with periodic compact snapshots
+
+        Components register under a name and expose `get_state()` and
+        optionally `load_state(state)` / `apply_event(event, data)`. Every
+        state change is appended to the journal as one JSON line with a
+        sequence number; a snapshot captures all components at once and is
+        written to a temp file and atomically renamed over the old one before
+        the journal is truncated. On restart the snapshot is loaded and only
+        journal entries newer than it are replayed, so a crash at any point
+        (including mid-line or between snapshot and truncation) is recovered;
+        a torn last line is cut off before the journal is appended to again.
+        Events for components not yet registered are carried in the snapshot
+        until they register.
+
+        Args:
+            directory: Where snapshot.json and journal.jsonl live
+            snapshot_interval: Seconds between snapshots taken by maybe_snapshot()
+            fsync: Also fsync every journal line (survives power loss, slower);
+                by default lines are flushed to the OS, which survives a process crash
+        """
+        self.directory = directory
+        self.snapshot_interval = snapshot_interval
+        self.fsync = fsync
+        self.snapshot_path = os.path.join(directory, SNAPSHOT_FILE)
+        self.journal_path = os.path.join(directory, JOURNAL_FILE)
+        os.makedirs(directory, exist_ok=True)
+
+        self.components: Dict[str, Any] = {}
+        self.seq = 0
+        self._snapshot_state: Dict[str, Any] = {}
+        self._pending: Dict[str, List[Dict[str, Any]]] = {}
+        self._last_snapshot = time.monotonic()
+        self._load()
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+
+    def _load(self) -> None:
+        snapshot_seq = 0
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot['seq']
+            self._snapshot_state = snapshot['components']
+            # Events of components that never registered before the snapshot was taken
+            self._pending = {name: list(entries) for name, entries in snapshot.get('pending', {}).items()}
+        self.seq = snapshot_seq
+
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, 'r+b') as f:
+                good = 0  # Byte offset just past the last complete entry
+                terminated = True
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning("Ignoring torn journal tail")
+                        break
+                    good += len(line)
+                    terminated = line.endswith(b'\n')
+                    if entry['seq'] <= snapshot_seq:
+                        continue  # Already contained in the snapshot
+                    self._pending.setdefault(entry['name'], []).append(entry)
+                    self.seq = entry['seq']
+                    replayed += 1
+                # Cut the torn tail so new entries start on a fresh line
+                f.truncate(good)
+                if not terminated:
+                    f.seek(good)
+                    f.write(b'\n')
+        if self._snapshot_state or replayed:
+            logger.info(f"Loaded state snapshot (seq {snapshot_seq}) and {replayed} journal events")
+
+    @property
+    def restored(self) -> bool:
+        return bool(self._snapshot_state or self._pending)
+
+    def state_for(self, name: str) -> Optional[Dict[str, Any]]:
+        """Snapshot state of a component, for components that restore in their constructor"""
+        return self._snapshot_state.get(name)
+
+    def register(self, name: str, component) -> None:
+        """
+        Attach a component, restoring it from the snapshot and pending events
+
+        Components without load_state are snapshot-only and restore
+        themselves from state_for(name) before registering.
+        """
+        if hasattr(component, 'load_state'):
+            state = self._snapshot_state.get(name)
+            if state is not None:
+                component.load_state(state)
+            for entry in self._pending.pop(name, []):
+                component.apply_event(entry['event'], entry['data'])
+        self.components[name] = component
+        component.journal = _ComponentJournal(self, name)
+
+    def record(self, name: str, event: str, data: Dict[str, Any]) -> None:
+        self.seq += 1
+        line = json.dumps({'seq': self.seq, 'name': name, 'event': event, 'data': data}, default=_encode)
+        self._file.write(line + '\n')
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+    def snapshot(self) -> None:
+        """Write all component states atomically, then compact the journal"""
+        state = {
+            'seq': self.seq,
+            'time': datetime.now().isoformat(),
+            'components': {name: c.get_state() for name, c in self.components.items()}
+        }
+        # Keep state and journaled events of components that have not registered (yet) this run
+        for name, pending_state in self._snapshot_state.items():
+            state['components'].setdefault(name, pending_state)
+        state['pending'] = self._pending
+        tmp_path = self.snapshot_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, default=_encode)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+
+        # Every journaled event is now in the snapshot
+        self._file.close()
+        self._file = open(self.journal_path, 'w', encoding='utf-8')
+        self._last_snapshot = time.monotonic()
+        logger.debug(f"State snapshot written at seq {self.seq}")
+
+    def maybe_snapshot(self) -> None:
+        if time.monotonic() - self._last_snapshot >= self.snapshot_interval:
+            self.snapshot()
+
+    def close(self, snapshot: bool = True) -> None:
+        if snapshot:
+            self.snapshot()
+        self._file.close()
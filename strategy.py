@@ -4,6 +4,8 @@ import pandas as pd
 import logging
 import numpy as np
 from datetime import datetime
+from typing import List, Tuple
+from profiling import SectionTimer
 
 # 配置日志记录器
 logger = logging.getLogger(__name__)
@@ -118,10 +120,118 @@ def generate_trading_signals(data: pd.DataFrame) -> dict:
             'risks': []
         }
 
-def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window: int) -> pd.DataFrame:
+def evaluate_signals(data: pd.DataFrame) -> Tuple[List[Tuple[str, str]], str]:
+    """Per-indicator signals and the majority-vote recommendation for the latest bar"""
+    try:
+        if data.empty or len(data) < 2:
+            logger.error("Insufficient data to calculate indicators")
+            return [], "HOLD"
+        
+        latest = data.iloc[-1]
+        ma_diff = latest['SMA_short'] - latest['SMA_long']
+        ma_diff_prev = data.iloc[-2]['SMA_short'] - data.iloc[-2]['SMA_long']
+        
+        # Determine MA Cross signal
+        ma_signal = "HOLD"
+        if ma_diff > 0 and ma_diff_prev <= 0:
+            ma_signal = "STRONG_BUY"
+        elif ma_diff < 0 and ma_diff_prev >= 0:
+            ma_signal = "STRONG_SELL"
+        elif ma_diff > 0:
+            ma_signal = "BUY"
+        else:
+            ma_signal = "SELL"
+        
+        # Initialize signals
+        signals = []
+        signals.append(("MA Cross", ma_signal))
+        
+        # Additional indicators
+        macd_signal = "HOLD"
+        if latest['MACD'] > latest['Signal_Line']:
+            macd_signal = "BUY"
+        elif latest['MACD'] < latest['Signal_Line']:
+            macd_signal = "SELL"
+        
+        rsi_signal = "HOLD"
+        if latest['RSI'] > 70:
+            rsi_signal = "SELL"
+        elif latest['RSI'] < 30:
+            rsi_signal = "BUY"
+        
+        signals.append(("MACD", macd_signal))
+        signals.append(("RSI", rsi_signal))
+        
+        # Determine overall recommendation
+        buy_signals = sum(1 for _, signal in signals if signal in ["BUY", "STRONG_BUY"])
+        sell_signals = sum(1 for _, signal in signals if signal in ["SELL", "STRONG_SELL"])
+        
+        if buy_signals > sell_signals:
+            recommendation = "BUY"
+        elif sell_signals > buy_signals:
+            recommendation = "SELL"
+        else:
+            recommendation = "HOLD"
+        
+        return signals, recommendation
+    except Exception as e:
+        logger.error(f"Error generating trading signals: {str(e)}")
+        return [], "HOLD"
+
+def majority_vote_strategy(data: pd.DataFrame) -> str:
+    """Majority vote of MA cross, MACD and RSI (the live default)"""
+    return evaluate_signals(data)[1]
+
+def score_to_signal(score: float) -> str:
+    """Map generate_trading_signals' numeric signal to a trade signal"""
+    if score >= 1:
+        return "STRONG BUY"
+    if score > 0:
+        return "BUY"
+    if score <= -1:
+        return "STRONG SELL"
+    if score < 0:
+        return "SELL"
+    return "HOLD"
+
+def signal_score_strategy(data: pd.DataFrame) -> str:
+    """generate_trading_signals as a live strategy (needs MA_50/MA_200/MACD_Hist/BB_Upper/BB_Lower)"""
+    return score_to_signal(generate_trading_signals(data)['signal'])
+
+def _series(data: pd.DataFrame, name: str) -> pd.Series:
+    """取出单列价格数据，兼容 MultiIndex 列 (name, symbol)"""
+    column = data[name]
+    return column.iloc[:, 0] if isinstance(column, pd.DataFrame) else column
+
+def _ewm(series: pd.Series, span: int, state: dict = None, key: str = None, warmup: int = 0) -> pd.Series:
+    """
+    EMA (adjust=False)，可从上一段数据末尾的 EMA 值续算。
+
+    续算时以 state[key] 作为种子，只在 warmup 之后的新行上递推，
+    与在完整序列上计算的结果逐位一致；warmup 行置为 NaN。
+    """
+    if state is None or key not in state:
+        ema = series.ewm(span=span, adjust=False).mean()
+    else:
+        seeded = pd.concat([pd.Series([state[key]]), series.iloc[warmup:]], ignore_index=True)
+        ema = pd.Series(np.nan, index=series.index)
+        ema.iloc[warmup:] = seeded.ewm(span=span, adjust=False).mean().to_numpy()[1:]
+    if state is not None and len(ema):
+        state[key] = ema.iloc[-1]
+    return ema
+
+def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window: int,
+                            state: dict = None, warmup: int = 0, profiler=None, signals: bool = True) -> pd.DataFrame:
     """
     增强版移动平均策略，包含多个技术指标和信号过滤。
+
+    分块计算时传入 state（跨调用保存 EMA/OBV 末值的字典）以及 warmup：
+    data 开头 warmup 行为上一块的尾部数据，只用于滚动窗口预热，
+    其指标值不可用，调用方应丢弃。
+    传入 profiling.StageProfiler 时按指标组分段计时。
+    signals=False 时只计算指标列（含综合 Signal 列），不生成最新一行的交易建议，供批量特征导出使用。
     """
+    sections = SectionTimer(profiler)
     try:
         # 获取收盘价列
         if isinstance(data.columns, pd.MultiIndex):
@@ -132,19 +242,22 @@ def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window:
         close_prices = data[close_col]
         
         # === 移动平均线 ===
+        sections.begin('moving_averages')
         data[('Short_MA', '')] = close_prices.rolling(window=short_window).mean()
         data[('Long_MA', '')] = close_prices.rolling(window=long_window).mean()
         data[('MA_50', '')] = close_prices.rolling(window=50).mean()
         data[('MA_200', '')] = close_prices.rolling(window=200).mean()
         
         # === MACD ===
-        data[('EMA_12', '')] = close_prices.ewm(span=12, adjust=False).mean()
-        data[('EMA_26', '')] = close_prices.ewm(span=26, adjust=False).mean()
+        sections.begin('macd')
+        data[('EMA_12', '')] = _ewm(close_prices, 12, state, 'EMA_12', warmup)
+        data[('EMA_26', '')] = _ewm(close_prices, 26, state, 'EMA_26', warmup)
         data[('MACD', '')] = data[('EMA_12', '')] - data[('EMA_26', '')]
-        data[('Signal_Line', '')] = data[('MACD', '')].ewm(span=9, adjust=False).mean()
+        data[('Signal_Line', '')] = _ewm(data[('MACD', '')], 9, state, 'Signal_Line', warmup)
         data[('MACD_Hist', '')] = data[('MACD', '')] - data[('Signal_Line', '')]
         
         # === RSI ===
+        sections.begin('rsi')
         delta = close_prices.diff()
         gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
         loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
@@ -152,6 +265,7 @@ def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window:
         data[('RSI', '')] = 100 - (100 / (1 + rs))
         
         # === 布林带 ===
+        sections.begin('bollinger')
         data[('BB_Middle', '')] = close_prices.rolling(window=20).mean()
         std = close_prices.rolling(window=20).std()
         data[('BB_Upper', '')] = data[('BB_Middle', '')] + (std * 2)
@@ -159,15 +273,17 @@ def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window:
         data[('BB_Width', '')] = (data[('BB_Upper', '')] - data[('BB_Lower', '')]) / data[('BB_Middle', '')]
         
         # === 随机指标 ===
+        sections.begin('stochastic')
         low_min = close_prices.rolling(window=14).min()
         high_max = close_prices.rolling(window=14).max()
         data[('Stoch_K', '')] = 100 * (close_prices - low_min) / (high_max - low_min)
         data[('Stoch_D', '')] = data[('Stoch_K', '')].rolling(window=3).mean()
         
         # === ATR (平均真实范围) ===
+        sections.begin('atr')
         if 'High' in data.columns and 'Low' in data.columns:
-            high = data['High']
-            low = data['Low']
+            high = _series(data, 'High')
+            low = _series(data, 'Low')
             tr1 = high - low
             tr2 = abs(high - close_prices.shift())
             tr3 = abs(low - close_prices.shift())
@@ -175,27 +291,42 @@ def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window:
             data[('ATR', '')] = tr.rolling(window=14).mean()
         
         # === OBV (能量潮指标) ===
+        sections.begin('obv')
         if 'Volume' in data.columns:
-            obv = (close_prices.diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * data['Volume']).cumsum()
+            obv_delta = close_prices.diff().apply(lambda x: 1 if x > 0 else (-1 if x < 0 else 0)) * _series(data, 'Volume')
+            if state is not None and 'OBV' in state:
+                # 以上一块的 OBV 末值为起点继续累加
+                seeded = pd.concat([pd.Series([state['OBV']]), obv_delta.iloc[warmup:]], ignore_index=True)
+                obv = pd.Series(np.nan, index=data.index)
+                obv.iloc[warmup:] = seeded.cumsum().to_numpy()[1:]
+            else:
+                obv = obv_delta.cumsum()
+            if state is not None and len(obv):
+                state['OBV'] = obv.iloc[-1]
             data[('OBV', '')] = obv
         
         # === 趋势强度指标 ===
+        sections.begin('trend')
         data[('Trend', '')] = data[('Short_MA', '')] - data[('Long_MA', '')]
         data[('Trend_Strength', '')] = abs(data[('Trend', '')]) / data[('Long_MA', '')] * 100
         data[('Trend_Direction', '')] = np.where(data[('Trend', '')] > 0, 1, -1)
         
         # === 动量指标 ===
+        sections.begin('momentum')
         data[('Momentum', '')] = close_prices.diff(periods=10)
         data[('ROC', '')] = close_prices.pct_change(periods=10) * 100
         
         # === 价格偏离度 ===
+        sections.begin('price_deviation')
         data[('Price_Dev_Short', '')] = (close_prices - data[('Short_MA', '')]) / data[('Short_MA', '')] * 100
         data[('Price_Dev_Long', '')] = (close_prices - data[('Long_MA', '')]) / data[('Long_MA', '')] * 100
         
         # === 波动率指标 ===
+        sections.begin('volatility')
         data[('Volatility', '')] = close_prices.rolling(window=20).std() / close_prices.rolling(window=20).mean() * 100
         
         # === 信号生成 ===
+        sections.begin('signals')
         # 1. 趋势确认
         trend_confirmed = (data[('MA_50', '')] > data[('MA_200', '')]) & (data[('Short_MA', '')] > data[('Long_MA', '')])
         
@@ -232,18 +363,24 @@ def moving_average_strategy(data: pd.DataFrame, short_window: int, long_window:
             )
         )
         
+        if not signals:
+            return data
+        
         # 在返回数据之前生成交易信号
-        signals = generate_trading_signals(data)
+        sections.begin('trading_signals')
+        advice = generate_trading_signals(data)
         
         # 将信号添加到数据中
-        data.loc[data.index[-1], ('Trading_Advice', '')] = signals['summary']
-        data.loc[data.index[-1], ('Signal_Strength', '')] = signals['strength']
-        data.loc[data.index[-1], ('Signal_Confidence', '')] = signals['confidence']
-        data.loc[data.index[-1], ('Trading_Details', '')] = signals['details']
+        data.loc[data.index[-1], ('Trading_Advice', '')] = advice['summary']
+        data.loc[data.index[-1], ('Signal_Strength', '')] = advice['strength']
+        data.loc[data.index[-1], ('Signal_Confidence', '')] = advice['confidence']
+        data.loc[data.index[-1], ('Trading_Details', '')] = advice['details']
         
         return data
         
     except Exception as e:
         logger.error(f"策略计算出错: {str(e)}")
         logger.debug("错误详情:", exc_info=True)
-        return data
\ No newline at end of file
+        return data
+    finally:
+        sections.end()
\ No newline at end of file
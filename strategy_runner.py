@@ -0,0 +1,149 @@
+# strategy_runner.py
+
+import time
+import logging
+import threading
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+from decision_recorder import DecisionRecorder
+from latency import METRICS
+from paper_trader import PaperTrader
+from trade_stats import RunningStats
+
+logger = logging.getLogger(__name__)
+
+Strategy = Callable[[pd.DataFrame], str]
+
+# Indicators RealTimeData does not compute itself, added once per update in
+# order (later entries may use earlier ones)
+SHARED_INDICATORS: Dict[str, Callable[[pd.DataFrame], pd.Series]] = {
+    'MA_50': lambda data: data['close'].rolling(window=50).mean(),
+    'MA_200': lambda data: data['close'].rolling(window=200).mean(),
+    'MACD_Hist': lambda data: data['MACD'] - data['Signal_Line'],
+    'BB_Upper': lambda data: data['BB_upper'],
+    'BB_Lower': lambda data: data['BB_lower']
+}
+
+class RegisteredStrategy:
+    def __init__(self, name: str, fn: Strategy, trader: PaperTrader):
+        self.name = name
+        self.fn = fn
+        self.trader = trader
+        self.last_signal = "HOLD"
+        self.stage = f"signal.{name}"  # Latency histogram name
+        self.eval_us = RunningStats(window=1000)  # Evaluation time per update in microseconds
+
+class StrategyRunner:
+    def __init__(self, indicators: Optional[Dict[str, Callable[[pd.DataFrame], pd.Series]]] = None,
+                 recorder: Optional[DecisionRecorder] = None):
+        """
+        Run many strategies side by side on one market data stream
+
+        On each new frame the shared indicators are computed once into a
+        single frame that every strategy reads (strategies must not modify
+        it). Each strategy is a function frame -> signal ("STRONG BUY",
+        "BUY", "HOLD", "SELL", "STRONG SELL") driving its own PaperTrader,
+        and its evaluation time is tracked separately from order execution.
+        With a DecisionRecorder every evaluation is logged as one columnar
+        record (indicators, signal, fill).
+
+        Usage:
+            runner = StrategyRunner()
+            runner.register('majority_vote', majority_vote_strategy)
+            runner.register('signal_score', signal_score_strategy)
+            runner.attach(rt_data)  # or call runner.step(rt_data.data) from a loop
+        """
+        self.indicators = dict(SHARED_INDICATORS if indicators is None else indicators)
+        self.recorder = recorder
+        self.strategies: Dict[str, RegisteredStrategy] = {}
+        self.indicator_us = RunningStats(window=1000)
+        self.frame: Optional[pd.DataFrame] = None
+        self._last_data = None
+        self._lock = threading.Lock()
+
+    def register(self, name: str, fn: Strategy, trader: Optional[PaperTrader] = None,
+                 initial_balance: float = 10000.0) -> PaperTrader:
+        """Add a strategy; returns the PaperTrader it trades on"""
+        if name in self.strategies:
+            raise ValueError(f"Strategy {name!r} is already registered")
+        trader = trader or PaperTrader(initial_balance=initial_balance)
+        self.strategies[name] = RegisteredStrategy(name, fn, trader)
+        return trader
+
+    def attach(self, rt_data) -> None:
+        """Evaluate on every RealTimeData update (runs on its websocket thread)"""
+        rt_data.add_listener(self.step)
+
+    def compute_indicators(self, data: pd.DataFrame) -> pd.DataFrame:
+        frame = data.copy()
+        for name, indicator in self.indicators.items():
+            frame[name] = indicator(frame)
+        return frame
+
+    def step(self, data: pd.DataFrame) -> Optional[Dict[str, str]]:
+        """
+        Evaluate all strategies on a new frame and trade their signals
+
+        Returns name -> signal, or None when the frame was already
+        evaluated (RealTimeData replaces its frame on every update, so
+        polling the same object is a no-op) or is too short.
+        """
+        with self._lock:
+            if data is self._last_data or len(data) < 2:
+                return None
+            self._last_data = data
+
+            started = time.perf_counter_ns()
+            frame = self.compute_indicators(data)
+            elapsed = time.perf_counter_ns() - started
+            self.indicator_us.add(elapsed / 1e3)
+            METRICS.observe('shared_indicators', elapsed)
+            self.frame = frame
+
+            latest = frame.iloc[-1]
+            price = float(latest['close'])
+            indicators = self.recorder.indicators(latest) if self.recorder is not None else None
+            signals = {}
+            for strategy in self.strategies.values():
+                started = time.perf_counter_ns()
+                try:
+                    signal = strategy.fn(frame)
+                except Exception as e:
+                    logger.error(f"Strategy {strategy.name} failed: {str(e)}")
+                    signal = "HOLD"
+                elapsed = time.perf_counter_ns() - started
+                strategy.eval_us.add(elapsed / 1e3)
+                METRICS.observe(strategy.stage, elapsed)
+                strategy.last_signal = signal
+
+                started = time.perf_counter_ns()
+                fill = strategy.trader.execute_trade(signal, price, latest.name)
+                METRICS.since('execute_trade', started)
+                if self.recorder is not None:
+                    self.recorder.record(latest.name, strategy.name, indicators, signal, fill)
+                signals[strategy.name] = signal
+
+            METRICS.incr('strategy_steps')
+            received_ns = data.attrs.get('received_ns')
+            if received_ns is not None:
+                METRICS.since('tick_to_trade', received_ns)
+            return signals
+
+    def report(self, price: Optional[float] = None) -> Dict[str, Dict]:
+        """Per-strategy signal, account metrics and evaluation time"""
+        report = {}
+        for name, strategy in self.strategies.items():
+            metrics = strategy.trader.calculate_metrics()
+            report[name] = {
+                'signal': strategy.last_signal,
+                'total_value': strategy.trader.get_total_value(price) if price is not None else None,
+                'return_pct': metrics['return_pct'],
+                'total_trades': metrics['total_trades'],
+                'win_rate': metrics['win_rate'],
+                'evaluations': strategy.eval_us.count,
+                'eval_mean_us': strategy.eval_us.mean,
+                'eval_max_us': strategy.eval_us.max or 0.0
+            }
+        return report
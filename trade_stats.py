@@ -0,0 +1,160 @@
+# trade_stats.py
+
+import math
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+class TradeLog:
+    def __init__(self, schema: Dict[str, str], capacity: int = 256):
+        """
+        Compact, array-backed trade storage with a fixed schema
+
+        Each field is a numpy column that grows geometrically, so a trade
+        costs a few bytes per field instead of a dict of Python objects.
+        Records read back as plain dicts.
+
+        Args:
+            schema: Field name -> numpy dtype (e.g. 'f8', 'U4', 'datetime64[ns]')
+            capacity: Initial number of rows to allocate
+        """
+        self.schema = dict(schema)
+        self._columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.schema.items()}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(self._size):
+            yield self[i]
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        index = self._index(index)
+        return {name: self._to_python(column[index]) for name, column in self._columns.items()}
+
+    def append(self, record: Dict[str, Any]) -> int:
+        """Append a record; missing fields are stored as NaN/NaT/empty"""
+        if self._size == len(next(iter(self._columns.values()))):
+            self._grow()
+        index = self._size
+        self._size += 1
+        for name, column in self._columns.items():
+            column[index] = self._to_numpy(record.get(name), column.dtype)
+        return index
+
+    def update(self, index: int, **fields) -> None:
+        """Update fields of an existing record in place"""
+        index = self._index(index)
+        for name, value in fields.items():
+            column = self._columns[name]
+            column[index] = self._to_numpy(value, column.dtype)
+
+    def column(self, name: str) -> np.ndarray:
+        """Read-only view of one field across all records"""
+        view = self._columns[name][:self._size]
+        view.flags.writeable = False
+        return view
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame({name: column[:self._size] for name, column in self._columns.items()})
+
+    def _index(self, index: int) -> int:
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("trade index out of range")
+        return index
+
+    def _grow(self) -> None:
+        for name, column in self._columns.items():
+            grown = np.empty(max(2 * len(column), 16), dtype=column.dtype)
+            grown[:len(column)] = column
+            self._columns[name] = grown
+
+    @staticmethod
+    def _to_numpy(value, dtype: np.dtype):
+        if dtype.kind == 'M':
+            return np.datetime64('NaT') if value is None else pd.Timestamp(value).to_datetime64()
+        if value is None:
+            return np.nan if dtype.kind == 'f' else dtype.type()
+        return value
+
+    @staticmethod
+    def _to_python(value):
+        if isinstance(value, np.datetime64):
+            return pd.Timestamp(value) if not np.isnat(value) else None
+        return value.item() if isinstance(value, np.generic) else value
+
+class RunningStats:
+    def __init__(self, window: int = 50):
+        """
+        O(1) running statistics over a stream of values (e.g. trade returns)
+
+        Keeps count, wins/losses, total, extremes and a Welford mean/variance
+        over the whole stream, plus rolling sums over the last `window`
+        values for Sharpe and Sortino ratios.
+        """
+        self.window = window
+        self.count = 0
+        self.wins = 0
+        self.losses = 0
+        self.total = 0.0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.max: Optional[float] = None
+        self.min: Optional[float] = None
+        self._recent = deque()
+        self._recent_sum = 0.0
+        self._recent_sumsq = 0.0
+        self._recent_downside_sumsq = 0.0
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        if value > 0:
+            self.wins += 1
+        elif value < 0:
+            self.losses += 1
+        self.total += value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.max = value if self.max is None else max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+        self._recent.append(value)
+        self._recent_sum += value
+        self._recent_sumsq += value * value
+        self._recent_downside_sumsq += min(value, 0.0) ** 2
+        if len(self._recent) > self.window:
+            old = self._recent.popleft()
+            self._recent_sum -= old
+            self._recent_sumsq -= old * old
+            self._recent_downside_sumsq -= min(old, 0.0) ** 2
+
+    @property
+    def variance(self) -> float:
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def sharpe(self) -> float:
+        """Mean over standard deviation of the last `window` values (not annualized)"""
+        n = len(self._recent)
+        if n < 2:
+            return 0.0
+        mean = self._recent_sum / n
+        variance = max(0.0, (self._recent_sumsq - n * mean * mean) / (n - 1))
+        return mean / math.sqrt(variance) if variance > 0 else 0.0
+
+    def sortino(self) -> float:
+        """Mean over downside deviation of the last `window` values (not annualized)"""
+        n = len(self._recent)
+        if n < 2:
+            return 0.0
+        downside = math.sqrt(max(0.0, self._recent_downside_sumsq) / n)
+        return (self._recent_sum / n) / downside if downside > 0 else 0.0
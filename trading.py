@@ -1,10 +1,20 @@
 # trading.py
 
-import requests
 import time
 import os
+import hmac
+import hashlib
 import asyncio
 import logging
+from collections import deque
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlencode
+
+import aiohttp
+
+from crypto_api import create_session
+from monitor import TradingMonitor
+from state_journal import StateJournal
 
 logger = logging.getLogger(__name__)
 
@@ -12,76 +22,298 @@ API_KEY = os.getenv('API_KEY')
 SECRET_KEY = os.getenv('SECRET_KEY')
 BASE_URL = 'https://api.binance.com'
 
+# Shared keep-alive session for order endpoints (POSTs are never auto-retried)
+session = create_session()
+
+# Binance request weights
+ORDER_ENDPOINT = '/api/v3/order'
+TICKER_ENDPOINT = '/api/v3/ticker/price'
+ORDER_WEIGHT = 1
+TICKER_WEIGHT = 2
+WEIGHT_LIMIT_PER_MINUTE = 1200
+
+# Signal spellings the strategies emit
+BUY_SIGNALS = ("BUY", "STRONG_BUY", "STRONG BUY")
+SELL_SIGNALS = ("SELL", "STRONG_SELL", "STRONG SELL")
+# Order statuses with an executed quantity to settle
+FILL_STATUSES = ('FILLED', 'PARTIALLY_FILLED')
+
+class RequestSigner:
+    def __init__(self, secret: str):
+        """HMAC-SHA256 signer with the key schedule computed once and copied per request"""
+        self._mac = hmac.new(secret.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def sign(self, query_string: str) -> str:
+        mac = self._mac.copy()
+        mac.update(query_string.encode('utf-8'))
+        return mac.hexdigest()
+
+class TokenBucket:
+    def __init__(self, capacity: float = WEIGHT_LIMIT_PER_MINUTE, refill_per_second: float = WEIGHT_LIMIT_PER_MINUTE / 60):
+        """
+        Weight-aware token bucket for staying under exchange rate limits locally
+
+        Each request acquires its endpoint weight; callers wait (without
+        blocking the event loop) until enough weight has refilled.
+        """
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_per_second)
+        self.updated = now
+
+    async def acquire(self, weight: float = 1) -> None:
+        async with self._lock:
+            self._refill()
+            while self.tokens < weight:
+                await asyncio.sleep((weight - self.tokens) / self.refill_per_second)
+                self._refill()
+            self.tokens -= weight
+
+class OrderGateway:
+    def __init__(self, api_key: str, api_secret: str, base_url: str = BASE_URL,
+                 rate_limiter: Optional[TokenBucket] = None, pool_size: int = 20,
+                 recv_window: int = 5000, timeout: float = 10.0):
+        """
+        Async signed-order gateway
+
+        Orders go out concurrently over one pooled keep-alive connector with
+        headers and the HMAC key prepared once. A local token bucket enforces
+        request weights before anything is sent, and every request's
+        round-trip latency is recorded.
+        """
+        self.base_url = base_url
+        self.signer = RequestSigner(api_secret)
+        self.headers = {'X-MBX-APIKEY': api_key}
+        self.rate_limiter = rate_limiter or TokenBucket()
+        self.pool_size = pool_size
+        self.recv_window = recv_window
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.latencies = deque(maxlen=10000)  # Seconds per order round trip
+
+    async def __aenter__(self):
+        self._get_session()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(connector=connector, headers=self.headers, timeout=self.timeout)
+        return self.session
+
+    async def close(self) -> None:
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def place_order(self, symbol: str, side: str, quantity: float, order_type: str = 'MARKET',
+                          price: Optional[float] = None) -> Dict:
+        """Sign and submit one order; the response gets 'latency_ms' added"""
+        # Wait for the rate limit first so the timestamp is fresh when the order goes out
+        await self.rate_limiter.acquire(ORDER_WEIGHT)
+        params = {
+            'symbol': symbol,
+            'side': side,
+            'type': order_type,
+            'quantity': quantity
+        }
+        if order_type == 'LIMIT':
+            params.update({'price': price, 'timeInForce': 'GTC'})
+        params['recvWindow'] = self.recv_window
+        params['timestamp'] = int(time.time() * 1000)
+        query_string = urlencode(params)
+        url = f"{self.base_url}{ORDER_ENDPOINT}?{query_string}&signature={self.signer.sign(query_string)}"
+
+        started = time.perf_counter()
+        async with self._get_session().post(url) as response:
+            result = await response.json()
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+
+        if response.status != 200:
+            logger.error(f"Order rejected ({response.status}): {result}")
+        result['latency_ms'] = latency * 1000
+        return result
+
+    async def place_orders(self, orders: List[Dict]) -> List[Dict]:
+        """Submit many orders concurrently; each dict holds place_order keyword arguments"""
+        results = await asyncio.gather(*(self.place_order(**order) for order in orders), return_exceptions=True)
+        for order, result in zip(orders, results):
+            if isinstance(result, Exception):
+                logger.error(f"Order failed {order}: {str(result)}")
+        return results
+
+    async def get_price(self, symbol: str) -> float:
+        await self.rate_limiter.acquire(TICKER_WEIGHT)
+        async with self._get_session().get(f"{self.base_url}{TICKER_ENDPOINT}", params={'symbol': symbol}) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return float(data['price'])
+
+    def latency_stats(self) -> Dict[str, float]:
+        """Order round-trip latency percentiles in milliseconds"""
+        if not self.latencies:
+            return {'count': 0}
+        ordered = sorted(self.latencies)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+        return {'count': len(ordered), 'p50_ms': pick(0.5), 'p99_ms': pick(0.99), 'max_ms': ordered[-1] * 1000}
+
+def fill_price(result: Dict, default: float) -> float:
+    """Average fill price of an order response"""
+    executed = float(result.get('executedQty', 0) or 0)
+    if executed > 0:
+        return float(result['cummulativeQuoteQty']) / executed
+    return default
+
+def executed_quantity(result, ordered: float) -> float:
+    """Quantity an order response executed (0 unless FILLED or PARTIALLY_FILLED)"""
+    if not isinstance(result, dict) or result.get('status') not in FILL_STATUSES:
+        return 0.0
+    if result.get('executedQty') is None:
+        return ordered if result['status'] == 'FILLED' else 0.0
+    return float(result['executedQty'])
+
 class AutoTrader:
-    def __init__(self, api_key, api_secret, risk_manager):
+    def __init__(self, api_key, api_secret, risk_manager, symbol='DOGEUSDT', quantity=100.0,
+                 initial_balance=10000.0, signal_fn: Optional[Callable[[float], str]] = None,
+                 gateway: Optional[OrderGateway] = None, poll_interval=1.0,
+                 journal: Optional[StateJournal] = None):
         self.api_key = api_key
         self.api_secret = api_secret
         self.risk_manager = risk_manager
-        self.monitor = TradingMonitor()
-        
+        self.symbol = symbol
+        self.quantity = quantity
+        self.balance = initial_balance
+        self.signal_fn = signal_fn or (lambda price: "HOLD")
+        self.gateway = gateway or OrderGateway(api_key, api_secret)
+        self.poll_interval = poll_interval
+        self.monitor = TradingMonitor(initial_balance=initial_balance)
+        # 交易所上的持仓需跨重启保留：快照加日志恢复止损止盈跟踪
+        self.journal = journal
+        if journal is not None:
+            journal.register('risk_manager', risk_manager)
+
+    @property
+    def positions(self):
+        return self.risk_manager.positions
+
     async def start_trading(self):
         """启动自动交易"""
-        while True:
-            try:
-                # 获取市场数据
-                market_data = await self.get_market_data()
-                
-                # 更新监控指标
-                self.monitor.update_metrics(
-                    market_data['price'],
-                    self.positions,
-                    self.balance
-                )
-                
-                # 检查是否需要交易
-                if self.should_trade(market_data):
-                    await self.execute_trade(market_data)
-                    
-                # 检查持仓管理
-                await self.manage_positions()
-                
-            except Exception as e:
-                logger.error(f"交易执行错误: {str(e)}")
-                await asyncio.sleep(5)
+        try:
+            while True:
+                try:
+                    # 获取市场数据
+                    market_data = await self.get_market_data()
 
-def place_buy_order(symbol, quantity):
-    endpoint = '/api/v3/order'
+                    # 更新监控指标
+                    self.monitor.update_metrics(
+                        market_data['price'],
+                        self.positions,
+                        self.balance
+                    )
+
+                    # 检查是否需要交易
+                    if self.should_trade(market_data):
+                        await self.execute_trade(market_data)
+
+                    # 检查持仓管理
+                    await self.manage_positions(market_data)
+
+                    if self.journal is not None:
+                        self.journal.maybe_snapshot()
+
+                    await asyncio.sleep(self.poll_interval)
+
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"交易执行错误: {str(e)}")
+                    await asyncio.sleep(5)
+        finally:
+            await self.gateway.close()
+
+    async def get_market_data(self):
+        """获取最新价格和信号"""
+        price = await self.gateway.get_price(self.symbol)
+        return {'price': price, 'signal': self.signal_fn(price)}
+
+    def should_trade(self, market_data):
+        signal = market_data['signal']
+        if signal in BUY_SIGNALS:
+            return self.risk_manager.can_open_position(market_data['price'], self.quantity, self.symbol)
+        return signal in SELL_SIGNALS and len(self.positions) > 0
+
+    async def execute_trade(self, market_data):
+        """按信号下单：买入开新仓，卖出平掉全部持仓；部分成交按成交量记账"""
+        if market_data['signal'] in BUY_SIGNALS:
+            result = await self.gateway.place_order(self.symbol, 'BUY', self.quantity)
+            executed = executed_quantity(result, self.quantity)
+            if executed > 0:
+                price = fill_price(result, market_data['price'])
+                self.balance -= price * executed
+                self.risk_manager.add_position(price, executed, symbol=self.symbol)
+        else:
+            positions = self.positions
+            results = await self.gateway.place_orders([
+                {'symbol': self.symbol, 'side': 'SELL', 'quantity': pos['size']} for pos in positions
+            ])
+            self._settle_sells(positions, results, market_data['price'])
+
+    async def manage_positions(self, market_data):
+        """止损/止盈触发的仓位并发提交卖单，成交后才平仓记账"""
+        triggered = self.risk_manager.triggered_positions(market_data['price'], self.symbol)
+        if not triggered:
+            return
+        positions = [t['position'] for t in triggered]
+        results = await self.gateway.place_orders([
+            {'symbol': self.symbol, 'side': 'SELL', 'quantity': pos['size']} for pos in positions
+        ])
+        self._settle_sells(positions, results, market_data['price'])
+
+    def _settle_sells(self, positions, results, price):
+        for pos, result in zip(positions, results):
+            executed = executed_quantity(result, pos['size'])
+            if executed > 0:
+                exit_price = fill_price(result, price)
+                self.risk_manager.close_position(pos['id'], exit_price, executed)
+                self.balance += exit_price * executed
+
+# Sync order helpers reuse one signer and header dict
+_signer = RequestSigner(SECRET_KEY) if SECRET_KEY else None
+_headers = {'X-MBX-APIKEY': API_KEY}
+
+def _place_order(symbol, side, quantity):
     params = {
         'symbol': symbol,
-        'side': 'BUY',
+        'side': side,
         'type': 'MARKET',
         'quantity': quantity,
         'timestamp': int(time.time() * 1000),
     }
-    headers = {
-        'X-MBX-APIKEY': API_KEY,
-    }
     # Add HMAC-SHA256 signature (required for secure requests)
     params['signature'] = sign_request(params, SECRET_KEY)
-    
-    response = requests.post(BASE_URL + endpoint, headers=headers, params=params)
+
+    response = session.post(BASE_URL + ORDER_ENDPOINT, headers=_headers, params=params, timeout=10)
     return response.json()
 
+def place_buy_order(symbol, quantity):
+    return _place_order(symbol, 'BUY', quantity)
+
 def place_sell_order(symbol, quantity):
-    endpoint = '/api/v3/order'
-    params = {
-        'symbol': symbol,
-        'side': 'SELL',
-        'type': 'MARKET',
-        'quantity': quantity,
-        'timestamp': int(time.time() * 1000),
-    }
-    headers = {
-        'X-MBX-APIKEY': API_KEY,
-    }
-    params['signature'] = sign_request(params, SECRET_KEY)
-    
-    response = requests.post(BASE_URL + endpoint, headers=headers, params=params)
-    return response.json()
+    return _place_order(symbol, 'SELL', quantity)
 
 def sign_request(params, secret):
     # Create a signature with HMAC-SHA256 (specific to Binance)
-    import hmac
-    import hashlib
     query_string = '&'.join(["{}={}".format(d, params[d]) for d in params])
-    return hmac.new(secret.encode('utf-8'), query_string.encode('utf-8'), hashlib.sha256).hexdigest()
\ No newline at end of file
+    if _signer is not None and secret == SECRET_KEY:
+        return _signer.sign(query_string)
+    return RequestSigner(secret).sign(query_string)